@@ -1,22 +1,46 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+import asyncio
 import logging
-from app.models.request import PriceComparisonRequest
-from app.models.response import OptimizedBasketResponse
+import time
+from datetime import date
+from app.models.request import PriceComparisonRequest, BatchPriceComparisonRequest
+from app.models.response import (
+    OptimizedBasketResponse, PlatformPrice, BatchBasketResult, BatchBasketResponse,
+    DailyPrice, PriceTrendResponse, LowestPrice, LowestPriceResponse
+)
 from app.services.scraper_manager import ScraperManager
 from app.services.price_optimizer import PriceOptimizerService
+from app.services.price_matrix import PriceMatrix, to_decimal
+from app.services.price_history import PriceHistoryStore, get_price_history, current_day
+from app.services.response_cache import EncodedResponse, ResponseCache, get_response_cache
 from app.services.product_mapping import ProductMappingService
+from app.services.prewarm import get_prewarm_scheduler
+from app.scrapers.registry import ScraperRegistry, get_scraper_registry
 from app.core.exceptions import ScrapingError, OptimizationError
+from app.core.config import settings
+from app.utils.serialization import dumps, encode_payload
 
 router = APIRouter(tags=["prices"])
 logger = logging.getLogger(__name__)
 
+# Day numbers in the price history count days since 1970-01-01
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
 @router.post("/get_prices", response_model=OptimizedBasketResponse)
 async def get_optimized_prices(
     request: PriceComparisonRequest,
+    http_request: Request,
+    deadline_ms: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Latency budget in milliseconds; defaults to REQUEST_DEADLINE_MS"
+    ),
     scraper_manager: ScraperManager = Depends(),
     product_mapping_service: ProductMappingService = Depends(),
-    price_optimizer: PriceOptimizerService = Depends()
+    price_optimizer: PriceOptimizerService = Depends(),
+    response_cache: Optional[ResponseCache] = Depends(get_response_cache)
 ):
     """
     Get the most cost-effective basket of grocery items across multiple platforms.
@@ -27,23 +51,44 @@ async def get_optimized_prices(
     3. Applies available discounts
     4. Optimizes the selection for the lowest total cost
     5. Returns the optimized basket with detailed pricing
+    
+    Scraping is bounded by a deadline. Platforms that have not responded
+    when it expires are served from the cache where possible, and the
+    response lists the items and platforms that are still incomplete.
+    
+    Responses are cached per basket until their prices go stale, incomplete
+    ones only briefly. Responses carry an ETag, and a request with a
+    matching If-None-Match gets 304 Not Modified.
     """
+    deadline = time.monotonic() + (deadline_ms or settings.REQUEST_DEADLINE_MS) / 1000
+    
+    cache_key = None
+    if response_cache is not None:
+        cache_key = response_cache.key(request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            # Count the products as requested, as a miss would, to keep them warm
+            product_mapping_service.record_requested(cached.products)
+            return _encoded_json_response(cached, http_request, "HIT")
+    
     try:
         # Map generic product names to platform-specific names and IDs
-        mapped_products = product_mapping_service.map_products(request.items)
+        mapped_products, products = product_mapping_service.resolve_products(request.items)
+        product_mapping_service.record_requested(products)
         
         # Fetch prices and discounts concurrently from all platforms
-        price_data = await scraper_manager.fetch_all_prices_and_discounts(mapped_products)
-        
-        # Optimize the basket for lowest total cost
-        optimized_basket = price_optimizer.optimize_basket(price_data, request.items)
-        
-        # Return the optimized basket
-        return OptimizedBasketResponse(
-            total_price=optimized_basket["total_price"],
-            savings=optimized_basket["savings"],
-            items=optimized_basket["items"]
+        matrix = PriceMatrix.for_items(request.items, scraper_manager.scrapers)
+        price_data = await scraper_manager.fetch_all_prices_and_discounts(
+            mapped_products, deadline=deadline, matrix=matrix
         )
+        incomplete = scraper_manager.find_incomplete(mapped_products, price_data)
+        
+        # Optimize the basket for lowest total cost, off the event loop
+        basket = await asyncio.to_thread(_build_basket_payload, price_optimizer, matrix, request, incomplete)
+        if cache_key is None:
+            return _encoded_json_response(EncodedResponse(basket), http_request, "BYPASS")
+        encoded = response_cache.put(cache_key, basket, matrix, products, complete=not incomplete)
+        return _encoded_json_response(encoded, http_request, "MISS")
     
     except ScrapingError as e:
         logger.error(f"Scraping error: {str(e)}")
@@ -55,4 +100,323 @@ async def get_optimized_prices(
     
     except Exception as e:
         logger.exception("Unexpected error")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+@router.post("/get_prices/stream")
+async def stream_optimized_prices(
+    request: PriceComparisonRequest,
+    deadline_ms: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Latency budget in milliseconds; defaults to REQUEST_DEADLINE_MS"
+    ),
+    scraper_manager: ScraperManager = Depends(),
+    product_mapping_service: ProductMappingService = Depends(),
+    price_optimizer: PriceOptimizerService = Depends()
+):
+    """
+    Stream prices as platforms respond, followed by the optimized basket.
+    
+    The response is newline-delimited JSON. Each line is an object with an
+    "event" and its "data":
+    - "price": a PlatformPrice, emitted as soon as a platform responds for an item
+    - "basket": the final OptimizedBasketResponse, as returned by /get_prices
+    - "error": {"detail": ...} if the request fails after streaming has started
+    """
+    deadline = time.monotonic() + (deadline_ms or settings.REQUEST_DEADLINE_MS) / 1000
+    mapped_products = product_mapping_service.map_products(request.items)
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            price_data = {}
+            matrix = PriceMatrix.for_items(request.items, scraper_manager.scrapers)
+            
+            async for generic_name, platform, result in scraper_manager.stream_prices_and_discounts(
+                mapped_products, deadline
+            ):
+                price_data.setdefault(generic_name, {})[platform] = result
+                matrix.add(generic_name, platform, result)
+                price = {
+                    "name": generic_name,
+                    "platform": platform,
+                    "original_price": result["original_price"],
+                    "discount": result["discount"],
+                    "final_price": result["final_price"],
+                    "in_stock": result.get("in_stock", True),
+                    "platform_specific_name": result.get("product_name"),
+                    "product_id": result.get("product_id"),
+                    "url": result.get("url"),
+                    "freshness": result.get("freshness", "fresh"),
+                    "price_age_seconds": result.get("price_age_seconds"),
+                    "from_cache": result.get("from_cache", False)
+                }
+                yield _ndjson_event("price", encode_payload(PlatformPrice, price))
+            
+            incomplete = scraper_manager.find_incomplete(mapped_products, price_data)
+            basket = await asyncio.to_thread(_build_basket_payload, price_optimizer, matrix, request, incomplete)
+            yield _ndjson_event("basket", encode_payload(OptimizedBasketResponse, basket))
+        
+        except Exception as e:
+            logger.exception("Error while streaming prices")
+            yield _ndjson_event("error", dumps({"detail": str(e)}))
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.post("/get_prices/batch", response_model=BatchBasketResponse)
+async def get_optimized_prices_batch(
+    request: BatchPriceComparisonRequest,
+    deadline_ms: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Latency budget in milliseconds; defaults to REQUEST_DEADLINE_MS"
+    ),
+    scraper_manager: ScraperManager = Depends(),
+    product_mapping_service: ProductMappingService = Depends(),
+    price_optimizer: PriceOptimizerService = Depends()
+):
+    """
+    Optimize many baskets with a single scrape of all their products.
+    
+    Every (product, platform) pair in the union of the baskets is scraped
+    once, under one deadline, and each basket is then optimized against
+    the shared price matrix. Results are returned in request order, each
+    with either its basket or an error.
+    
+    Batches of more than BATCH_STREAM_THRESHOLD baskets are streamed as
+    newline-delimited JSON instead, with one "basket" event (a
+    BatchBasketResult) per basket as soon as it is optimized.
+    """
+    if len(request.baskets) > settings.BATCH_MAX_BASKETS:
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {settings.BATCH_MAX_BASKETS} baskets")
+    
+    deadline = time.monotonic() + (deadline_ms or settings.REQUEST_DEADLINE_MS) / 1000
+    
+    try:
+        # Map and scrape the union of the products of all baskets once
+        items = list({item.name: item for basket in request.baskets for item in basket.items}.values())
+        mapped_products = product_mapping_service.map_products(items)
+        matrix = PriceMatrix.for_items(items, scraper_manager.scrapers)
+        price_data = await scraper_manager.fetch_all_prices_and_discounts(
+            mapped_products, deadline=deadline, matrix=matrix
+        )
+        incomplete = scraper_manager.find_incomplete(mapped_products, price_data)
+    
+    except ScrapingError as e:
+        logger.error(f"Scraping error: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Error fetching prices: {str(e)}")
+    
+    # Baskets are optimized in a worker thread, keeping the event loop free
+    if len(request.baskets) <= settings.BATCH_STREAM_THRESHOLD:
+        def encode_results() -> bytes:
+            results = [
+                _build_batch_result(price_optimizer, matrix, basket, incomplete, index)
+                for index, basket in enumerate(request.baskets)
+            ]
+            return encode_payload(BatchBasketResponse, {"results": results})
+        
+        body = await asyncio.to_thread(encode_results)
+        return Response(content=body, media_type="application/json")
+    
+    async def events() -> AsyncIterator[bytes]:
+        for index, basket in enumerate(request.baskets):
+            result = await asyncio.to_thread(_build_batch_result, price_optimizer, matrix, basket, incomplete, index)
+            yield _ndjson_event("basket", encode_payload(BatchBasketResult, result))
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def _encoded_json_response(encoded: EncodedResponse, http_request: Request, cache_status: str) -> Response:
+    """Send an encoded response, or 304 Not Modified if the client holds the same ETag."""
+    headers = {
+        "ETag": encoded.etag,
+        "Cache-Control": f"max-age={encoded.max_age()}",
+        "X-Cache": cache_status,
+    }
+    if _etag_matches(http_request.headers.get("If-None-Match"), encoded.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=encoded.body(), media_type="application/json", headers=headers)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return whether an If-None-Match header lists an ETag, compared weakly as RFC 9110 specifies."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def _ndjson_event(event: str, data_json: bytes) -> bytes:
+    """Format one event of the NDJSON stream from its already encoded data."""
+    return b'{"event": "' + event.encode() + b'", "data": ' + data_json + b'}\n'
+
+def _build_basket_payload(
+    price_optimizer: PriceOptimizerService,
+    matrix: PriceMatrix,
+    request: PriceComparisonRequest,
+    incomplete: Dict[str, List[str]]
+) -> Dict[str, Any]:
+    """
+    Optimize the basket and build the response, marking incomplete items and platforms.
+    
+    The response is built as plain dicts in the shape of
+    OptimizedBasketResponse, to be encoded with encode_payload().
+    """
+    optimized_basket = price_optimizer.optimize_basket(
+        matrix,
+        request.items,
+        method=request.optimizer,
+        max_platforms=request.max_platforms
+    )
+    
+    return {
+        "total_price": optimized_basket["total_price"],
+        "savings": optimized_basket["savings"],
+        "items": optimized_basket["items"],
+        "delivery_fee": optimized_basket["delivery_fee"],
+        "delivery_fees": optimized_basket["delivery_fees"],
+        "total_cost": optimized_basket["total_cost"],
+        "optimizer": optimized_basket["optimizer"],
+        "optimal": optimized_basket["optimal"],
+        "complete": not incomplete,
+        "incomplete_items": list(incomplete),
+        "incomplete_platforms": sorted({platform for platforms in incomplete.values() for platform in platforms})
+    }
+
+def _build_batch_result(
+    price_optimizer: PriceOptimizerService,
+    matrix: PriceMatrix,
+    basket: PriceComparisonRequest,
+    incomplete: Dict[str, List[str]],
+    index: int
+) -> Dict[str, Any]:
+    """Optimize one basket of a batch against the shared price matrix, as a BatchBasketResult payload."""
+    names = {item.name for item in basket.items}
+    
+    try:
+        response = _build_basket_payload(
+            price_optimizer,
+            matrix.select(basket.items),
+            basket,
+            {name: platforms for name, platforms in incomplete.items() if name in names}
+        )
+        return {"index": index, "basket": response, "error": None}
+    
+    except OptimizationError as e:
+        logger.error(f"Optimization error in basket {index}: {str(e)}")
+        return {"index": index, "basket": None, "error": f"Error optimizing basket: {str(e)}"}
+    
+    except Exception as e:
+        # One failing basket must not abort the rest of the batch
+        logger.exception(f"Unexpected error in basket {index}")
+        return {"index": index, "basket": None, "error": f"Unexpected error: {str(e)}"}
+
+@router.get("/price_history/{product}/trend", response_model=PriceTrendResponse)
+def get_price_trend(
+    product: str,
+    days: int = Query(30, ge=1, le=3650, description="Number of days, today included"),
+    product_mapping_service: ProductMappingService = Depends()
+):
+    """
+    Get the daily price trend of a product on every platform.
+    
+    Each day reports the lowest, highest, mean and last in-stock final
+    price recorded, read from the precomputed daily aggregates. A plain
+    function, so FastAPI runs the SQLite reads in its threadpool.
+    """
+    generic_name, platforms, store = _resolve_history_product(product, product_mapping_service)
+    since_day = current_day() - days + 1
+    
+    trend = {}
+    for platform, details in platforms.items():
+        trend[platform] = [
+            DailyPrice(
+                date=date.fromordinal(_EPOCH_ORDINAL + day),
+                min_price=to_decimal(min_price),
+                max_price=to_decimal(max_price),
+                avg_price=to_decimal(round(total_price / samples)),
+                last_price=to_decimal(last_price),
+                samples=samples
+            )
+            for day, min_price, max_price, total_price, samples, last_price
+            in store.daily(platform, details["product_id"], since_day)
+        ]
+    
+    return PriceTrendResponse(product=generic_name, days=days, platforms=trend)
+
+@router.get("/price_history/{product}/lowest", response_model=LowestPriceResponse)
+def get_lowest_price(
+    product: str,
+    days: int = Query(30, ge=1, le=3650, description="Number of days, today included"),
+    product_mapping_service: ProductMappingService = Depends()
+):
+    """
+    Get the lowest in-stock price of a product in the last N days, per platform and overall.
+    
+    Also reports the latest recorded price and whether it is the lowest
+    of the period. A plain function, so FastAPI runs the SQLite reads in
+    its threadpool.
+    """
+    generic_name, platforms, store = _resolve_history_product(product, product_mapping_service)
+    since_day = current_day() - days + 1
+    
+    lowest_prices = {}
+    for platform, details in platforms.items():
+        lowest = store.lowest(platform, details["product_id"], since_day)
+        if lowest is None:
+            continue
+        
+        lowest_price, day = lowest
+        latest = store.latest(platform, details["product_id"])
+        current_price = latest[0] if latest is not None and latest[2] else None
+        lowest_prices[platform] = LowestPrice(
+            platform=platform,
+            product_id=details["product_id"],
+            lowest_price=to_decimal(lowest_price),
+            lowest_on=date.fromordinal(_EPOCH_ORDINAL + day),
+            current_price=to_decimal(current_price) if current_price is not None else None,
+            is_lowest=current_price is not None and current_price <= lowest_price
+        )
+    
+    overall = min(lowest_prices.values(), key=lambda price: price.lowest_price, default=None)
+    return LowestPriceResponse(product=generic_name, days=days, lowest=overall, platforms=lowest_prices)
+
+def _resolve_history_product(
+    product: str,
+    product_mapping_service: ProductMappingService
+) -> Tuple[str, Dict[str, Dict[str, Any]], PriceHistoryStore]:
+    """Resolve a product name for the price history endpoints, raising 404/503 when not possible."""
+    recorder = get_price_history()
+    if recorder is None:
+        raise HTTPException(status_code=503, detail="Price history is disabled")
+    
+    match = product_mapping_service.resolve(product)
+    if match is None:
+        raise HTTPException(status_code=404, detail=f"No mapping found for product: {product}")
+    
+    return match.generic_name, product_mapping_service.product_mappings[match.generic_name], recorder.store
+
+@router.get("/scrapers/stats")
+async def get_scraper_stats(registry: ScraperRegistry = Depends(get_scraper_registry)):
+    """
+    Get runtime statistics for the scraping pipeline.
+    
+    Includes shared cache counters and, per platform, request coalescing
+    and rate limiter state (token bucket, adaptive concurrency limit,
+    throttling and Retry-After pauses), plus pre-warming counters when
+    the pre-warming scheduler is running.
+    """
+    stats = registry.get_stats()
+    scheduler = get_prewarm_scheduler()
+    if scheduler is not None:
+        stats["prewarm"] = scheduler.stats()
+    recorder = get_price_history()
+    if recorder is not None:
+        stats["price_history"] = recorder.stats()
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        stats["response_cache"] = response_cache.stats()
+    return stats
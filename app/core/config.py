@@ -1,6 +1,6 @@
 import json
 import os
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Dict, Any, Optional
 from functools import lru_cache
 
@@ -11,35 +11,98 @@ class Settings(BaseSettings):
     # CORS Settings
     ALLOWED_ORIGINS: List[str] = ["*"]
     
+    # Observability
+    METRICS_ENABLED: bool = True  # expose Prometheus metrics at /metrics
+    
     # Scraper settings
     SCRAPER_TIMEOUT: int = 10  # seconds
     MAX_CONCURRENT_REQUESTS: int = 20
-    CACHE_TTL: int = 60  # seconds
+    REQUEST_DEADLINE_MS: int = 5000  # default latency budget for /get_prices
+    BATCH_MAX_BASKETS: int = 5000  # baskets accepted by /get_prices/batch
+    BATCH_STREAM_THRESHOLD: int = 100  # larger batches are streamed as NDJSON
+    CACHE_TTL: int = 60  # seconds, prices are fresh for this long
+    CACHE_HARD_TTL: int = 300  # seconds, stale prices are served (and refreshed) until this age
+    CACHE_BACKEND: str = "memory"  # "memory" (per process) or "sqlite" (shared by workers on a host)
+    CACHE_SQLITE_PATH: str = "data/scraper_cache.sqlite3"
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_BYTES: Optional[int] = 64 * 1024 * 1024
+    CACHE_SWEEP_INTERVAL: int = 30  # seconds
+    RESPONSE_CACHE_ENABLED: bool = True  # cache /get_prices responses per basket while their prices are fresh
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_MAX_BYTES: Optional[int] = 32 * 1024 * 1024
+    RESPONSE_CACHE_INCOMPLETE_TTL: int = 5  # seconds an incomplete response is cached (0 to not cache it)
+    
+    # Rate limiting (process-wide, applied per platform)
+    PLATFORM_RATE_LIMIT: float = 10.0  # requests per second
+    PLATFORM_RATE_LIMITS: Dict[str, float] = {}  # per-platform overrides
+    PLATFORM_RATE_BURST: int = 20
+    PLATFORM_MAX_CONCURRENCY: int = 20
+    PLATFORM_MIN_CONCURRENCY: int = 1
+    
+    # Circuit breaker and hedged requests (per platform)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures
+    CIRCUIT_BREAKER_RESET_TIMEOUT: int = 30  # seconds before a probe request
+    HEDGE_REQUESTS: bool = False
+    HEDGE_QUANTILE: float = 0.95  # hedge once a request is slower than this latency quantile
+    HEDGE_MIN_DELAY: float = 0.05  # seconds
+    
+    # Conditional requests: ETag/Last-Modified validators kept per page URL
+    VALIDATOR_CACHE_TTL: int = 86400  # seconds
+    VALIDATOR_CACHE_MAX_ENTRIES: int = 10000  # per platform
+    
+    # HTML extraction backend: "auto", "selectolax", "lxml", "tagscan" or "beautifulsoup"
+    HTML_EXTRACTOR: str = "auto"
+    PARSE_EXECUTOR: str = "none"  # "none" (on the event loop), "thread" or "process"
+    PARSE_WORKERS: Optional[int] = None  # defaults to the executor's own worker count
+    
+    # Delivery terms per platform, e.g. {"PlatformA": {"fee": 2.99, "free_delivery_threshold": 35, "min_order": 10}}
+    PLATFORM_DELIVERY: Dict[str, Dict[str, float]] = {}
+    EXACT_OPTIMIZER_MAX_PLATFORMS: int = 6  # platforms pricing a basket the exact optimizer accepts
+    
+    # Background pre-warming of popular products
+    PREWARM_ENABLED: bool = True
+    PREWARM_TOP_N: int = 50  # most requested products kept warm
+    PREWARM_INTERVAL: float = 10.0  # seconds between cycles
+    PREWARM_LEAD_TIME: float = 5.0  # seconds before going stale (after the next cycle) to refresh
+    PREWARM_RATE_SHARE: float = 0.2  # share of each platform's rate limit spent on pre-warming
+    PREWARM_HALF_LIFE: float = 3600.0  # seconds after which a request counts half for popularity
+    
+    # Price history (every scraped price, with daily aggregates)
+    PRICE_HISTORY_ENABLED: bool = True
+    PRICE_HISTORY_PATH: str = "data/price_history.sqlite3"
+    PRICE_HISTORY_FLUSH_INTERVAL: float = 1.0  # seconds between batched writes
+    PRICE_HISTORY_BATCH_SIZE: int = 500  # observations per write
+    PRICE_HISTORY_MAX_PENDING: int = 100000  # buffered observations beyond which new ones are dropped
+    
+    # Connection pool settings (applied per platform)
+    SCRAPER_POOL_LIMIT: int = 100
+    SCRAPER_POOL_LIMIT_PER_HOST: int = 20
+    SCRAPER_KEEPALIVE_TIMEOUT: int = 30  # seconds
+    SCRAPER_DNS_CACHE_TTL: int = 300  # seconds
     
     # Platform URLs
     PLATFORM_A_URL: str
     PLATFORM_B_URL: str
+    PLATFORM_C_URL: str
+    PLATFORM_D_URL: str
+    
+    # Declarative scraper definitions (URL template, selectors, patterns) per platform
+    SCRAPER_SPECS_PATH: str = "config/scrapers.json"
     
-    # Path to product mappings
-    PRODUCT_MAPPINGS_PATH: str = "data/product_mappings.json"
+    # Product mappings: the JSON source and the database compiled from it
+    PRODUCT_MAPPINGS_PATH: str = "data/product_mapping.json"
+    PRODUCT_MAPPINGS_DB_PATH: str = "data/product_mapping.sqlite3"
+    PRODUCT_MAPPINGS_CHECK_INTERVAL: float = 5.0  # seconds between checks for a changed file
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Free-text product name matching
+    PRODUCT_MATCH_MIN_CONFIDENCE: float = 0.5  # weaker matches are treated as unmapped
+    PRODUCT_MATCH_MEMO_SIZE: int = 4096  # recent resolutions kept in memory
+    
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance."""
     return Settings()
 
-@lru_cache()
-def get_product_mappings() -> Dict[str, Dict[str, Any]]:
-    """Load product mappings from JSON file."""
-    settings = get_settings()
-    try:
-        with open(settings.PRODUCT_MAPPINGS_PATH, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        raise Exception(f"Error loading product mappings: {str(e)}")
-
 settings = get_settings()
\ No newline at end of file
@@ -24,4 +24,8 @@ class RateLimitExceededError(ScrapingError):
 
 class ProductNotFoundError(ScrapingError):
     """Exception raised when a product is not found on a platform."""
+    pass
+
+class CircuitOpenError(ScrapingError):
+    """Exception raised when a platform is skipped because its circuit breaker is open."""
     pass
\ No newline at end of file
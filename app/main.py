@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints.price_router import router as price_router
+from app.api.endpoints.router import router as price_router
 from app.core.config import settings
+from app.scrapers.registry import start_scraper_registry, stop_scraper_registry
+from app.services.prewarm import start_prewarm_scheduler, stop_prewarm_scheduler
+from app.services.price_history import start_price_history, stop_price_history
+from app.utils.metrics import CONTENT_TYPE, REQUEST_LATENCY, render_metrics
 import logging
 import time
 
@@ -12,11 +17,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared resources on startup and release them on shutdown."""
+    registry = await start_scraper_registry()
+    start_prewarm_scheduler(registry)
+    start_price_history()
+    try:
+        yield
+    finally:
+        await stop_prewarm_scheduler()
+        await stop_price_history()
+        await stop_scraper_registry()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Grocery Price Comparison API",
     description="API for comparing and optimizing grocery prices across multiple platforms",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -35,6 +54,12 @@ async def add_process_time_header(request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    
+    # Label by route template, not by path, so path parameters do not multiply the series
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+        request.method, route.path if route is not None else "unmatched", response.status_code
+    ).observe(process_time)
     logger.info(f"Request processed in {process_time:.4f} seconds")
     return response
 
@@ -49,6 +74,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 # request.py
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Dict, Literal
 
 class GroceryItem(BaseModel):
     name: str
@@ -9,16 +9,34 @@ class GroceryItem(BaseModel):
 
 class PriceComparisonRequest(BaseModel):
     items: List[GroceryItem]
+    # "greedy" picks the cheapest platform per item; "exact" also accounts for
+    # delivery fees, free-delivery thresholds, minimum orders and max_platforms
+    optimizer: Literal["greedy", "exact"] = "greedy"
+    max_platforms: Optional[int] = Field(default=None, ge=1)
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "items": [
-                    {"name": "Milk", "quantity": 1, "unit": "liter"},
-                    {"name": "Bread", "quantity": 2, "unit": "loaf"},
-                    {"name": "Eggs", "quantity": 12, "unit": "piece"}
-                ]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "items": [
+                {"name": "Milk", "quantity": 1, "unit": "liter"},
+                {"name": "Bread", "quantity": 2, "unit": "loaf"},
+                {"name": "Eggs", "quantity": 12, "unit": "piece"}
+            ],
+            "optimizer": "exact",
+            "max_platforms": 2
         }
+    })
+
+class BatchPriceComparisonRequest(BaseModel):
+    """Many baskets optimized against one shared scrape of all their products."""
+    baskets: List[PriceComparisonRequest] = Field(..., min_length=1)
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "baskets": [
+                {"items": [{"name": "Milk", "quantity": 1}, {"name": "Bread", "quantity": 2}]},
+                {"items": [{"name": "Milk", "quantity": 2}, {"name": "Eggs", "quantity": 12}], "optimizer": "exact"}
+            ]
+        }
+    })
 
 # response.py
\ No newline at end of file
@@ -0,0 +1,116 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Optional
+from decimal import Decimal
+from datetime import date
+
+class ItemPrice(BaseModel):
+    name: str
+    platform: str
+    original_price: Decimal
+    discount: Decimal = Decimal('0.0')
+    final_price: Decimal
+    quantity: int
+    unit: Optional[str] = None
+    platform_specific_name: Optional[str] = None
+    product_id: Optional[str] = None
+    url: Optional[str] = None
+    freshness: str = "fresh"  # "fresh" or "stale" (served while being refreshed)
+    price_age_seconds: Optional[float] = None
+    from_cache: bool = False
+
+class PlatformPrice(BaseModel):
+    """Price of one item on one platform, as emitted by the streaming endpoint."""
+    name: str
+    platform: str
+    original_price: Decimal
+    discount: Decimal = Decimal('0.0')
+    final_price: Decimal
+    in_stock: bool = True
+    platform_specific_name: Optional[str] = None
+    product_id: Optional[str] = None
+    url: Optional[str] = None
+    freshness: str = "fresh"
+    price_age_seconds: Optional[float] = None
+    from_cache: bool = False
+
+class OptimizedBasketResponse(BaseModel):
+    total_price: Decimal
+    savings: Decimal
+    items: List[ItemPrice]
+    delivery_fee: Decimal = Decimal('0.0')
+    delivery_fees: Dict[str, Decimal] = {}  # per platform in the basket
+    total_cost: Optional[Decimal] = None  # total_price plus delivery_fee
+    optimizer: str = "greedy"
+    optimal: bool = True  # whether the basket is the cheapest under the order constraints
+    complete: bool = True  # False if some platforms did not respond before the deadline
+    incomplete_items: List[str] = []
+    incomplete_platforms: List[str] = []
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "total_price": 15.67,
+            "savings": 2.30,
+            "items": [
+                {
+                    "name": "Milk",
+                    "platform": "PlatformA",
+                    "original_price": 2.50,
+                    "discount": 0.50,
+                    "final_price": 2.00,
+                    "quantity": 1,
+                    "unit": "liter",
+                    "platform_specific_name": "Whole Milk 1L",
+                    "product_id": "123456",
+                    "url": "https://platform-a.com/products/123456",
+                    "freshness": "fresh",
+                    "price_age_seconds": 12.5,
+                    "from_cache": True
+                }
+            ],
+            "delivery_fee": 2.99,
+            "delivery_fees": {"PlatformA": 2.99},
+            "total_cost": 18.66,
+            "optimizer": "exact",
+            "optimal": True,
+            "complete": False,
+            "incomplete_items": ["Bread"],
+            "incomplete_platforms": ["PlatformC"]
+        }
+    })
+
+class BatchBasketResult(BaseModel):
+    """Result of one basket of a batch, in request order."""
+    index: int
+    basket: Optional[OptimizedBasketResponse] = None
+    error: Optional[str] = None  # set instead of basket if this basket could not be optimized
+
+class BatchBasketResponse(BaseModel):
+    results: List[BatchBasketResult]
+
+class DailyPrice(BaseModel):
+    """In-stock final prices of a product on one platform over one day (UTC)."""
+    date: date
+    min_price: Decimal
+    max_price: Decimal
+    avg_price: Decimal
+    last_price: Decimal
+    samples: int
+
+class PriceTrendResponse(BaseModel):
+    product: str  # generic name the requested product resolved to
+    days: int
+    platforms: Dict[str, List[DailyPrice]]  # oldest day first
+
+class LowestPrice(BaseModel):
+    platform: str
+    product_id: str
+    lowest_price: Decimal
+    lowest_on: date
+    current_price: Optional[Decimal] = None  # latest recorded price, if in stock
+    is_lowest: bool = False  # current price is the lowest of the period
+
+class LowestPriceResponse(BaseModel):
+    product: str
+    days: int
+    lowest: Optional[LowestPrice] = None  # across platforms
+    platforms: Dict[str, LowestPrice]
\ No newline at end of file
@@ -1,24 +1,96 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Set, Callable, Awaitable, Mapping
 import aiohttp
 import asyncio
+import functools
 import logging
-from app.core.exceptions import ScrapingError
-from app.utils.cache import TTLCache
+import time
+from concurrent.futures import Executor
+from app.core.exceptions import ScrapingError, RateLimitExceededError, CircuitOpenError
+from app.utils.cache import CacheBackend, BoundedTTLCache, create_scraper_cache
+from app.utils.async_utils import SingleFlight
+from app.utils.metrics import SCRAPE_LATENCY, SCRAPE_ERRORS, SCRAPER_CACHE_LOOKUPS, UPSTREAM_IN_FLIGHT
+from app.utils.rate_limiter import PlatformRateLimiter, parse_retry_after
+from app.utils.resilience import CircuitBreaker, LatencyTracker, hedged
+from app.scrapers.extraction import HTMLExtractor, extract_with, get_extractor
+
+# aiohttp decodes brotli responses only when a brotli module is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
 from app.core.config import settings
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# Fields of a product snapshot exposed through get_price()
+PRICE_FIELDS = ("platform", "product_id", "product_name", "price", "currency", "in_stock", "url")
+
+# Discount returned when a product has no (recognizable) discount
+NO_DISCOUNT = {"discount": Decimal('0.0'), "discount_type": "none"}
+
 class BaseScraper(ABC):
     """Abstract base class for platform-specific scrapers."""
     
-    def __init__(self):
+    # Maximum number of products per _scrape_many() request; 0 if the platform
+    # has no batch (listing or bulk API) endpoint
+    batch_size: int = 0
+    
+    def __init__(
+        self,
+        cache: Optional[CacheBackend] = None,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        rate_limiter: Optional[PlatformRateLimiter] = None,
+        parse_executor: Optional[Executor] = None
+    ):
+        """
+        Initialize the scraper.
+        
+        Args:
+            cache: Cache shared with other scrapers (a private one is created if omitted)
+            connector: Pooled connector owned by the caller (a private one is created if omitted)
+            rate_limiter: Process-wide limiter for this platform (a private one is created if omitted)
+            parse_executor: Executor owned by the caller to run HTML extraction in (pages are
+                parsed on the event loop if omitted)
+        """
         self.platform_name = self._get_platform_name()
         self.base_url = self._get_base_url()
         self.timeout = settings.SCRAPER_TIMEOUT
-        self.cache = TTLCache(ttl=settings.CACHE_TTL)
+        self.cache = cache if cache is not None else create_scraper_cache()
+        self.connector = connector
+        self.rate_limiter = rate_limiter if rate_limiter is not None else create_rate_limiter(self.platform_name)
         self.session = None
+        self.singleflight = SingleFlight()
+        self.circuit_breaker = CircuitBreaker(
+            self.platform_name,
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+        )
+        self.latency = LatencyTracker()
+        self.hedged_requests = 0
+        self.batch_requests = 0
+        self.not_modified = 0
+        # Validators (ETag/Last-Modified) of pages and the result parsed from them, per URL
+        self.validators = BoundedTTLCache(
+            ttl=settings.VALIDATOR_CACHE_TTL,
+            max_entries=settings.VALIDATOR_CACHE_MAX_ENTRIES
+        )
+        self.extractor: HTMLExtractor = get_extractor(settings.HTML_EXTRACTOR)
+        self.parse_executor = parse_executor
+        # Metrics updated on every request, looked up once
+        self._scrape_latency = SCRAPE_LATENCY.labels(self.platform_name)
+        self._in_flight = UPSTREAM_IN_FLIGHT.labels(self.platform_name)
+        self._cache_hits = SCRAPER_CACHE_LOOKUPS.labels(self.platform_name, "hit")
+        self._cache_stale_hits = SCRAPER_CACHE_LOOKUPS.labels(self.platform_name, "stale_hit")
+        self._cache_misses = SCRAPER_CACHE_LOOKUPS.labels(self.platform_name, "miss")
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._batch_tasks: Set[asyncio.Task] = set()
     
     @abstractmethod
     def _get_platform_name(self) -> str:
@@ -35,7 +107,9 @@ class BaseScraper(ABC):
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession(
                 headers=self._get_headers(),
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=self.connector,
+                connector_owner=self.connector is None
             )
     
     def _get_headers(self) -> Dict[str, str]:
@@ -44,33 +118,446 @@ class BaseScraper(ABC):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
         }
     
-    async def get_price(self, product_id: str, product_name: str) -> Dict[str, Any]:
+    async def _fetch(self, url: str) -> str:
         """
-        Get price for a specific product.
+        Fetch a page from the platform (see _request()).
+        
+        Args:
+            url: URL to fetch
+        
+        Returns:
+            Response body as text
+        """
+        body, _ = await self._request(url)
+        return body
+    
+    async def _fetch_parsed(self, url: str, parse: Callable[[str], Awaitable[Any]]) -> Any:
+        """
+        Fetch and parse a page, skipping both when it has not changed.
+        
+        The ETag and Last-Modified validators of the last response for the
+        URL are sent as If-None-Match and If-Modified-Since. On a 304 Not
+        Modified, the result parsed from that response is returned again,
+        without downloading or parsing the page. A 304 without a result to
+        reuse (answered by a cache in between) is followed by a full GET.
+        
+        Args:
+            url: URL to fetch
+            parse: Coroutine function parsing the response body
+        
+        Returns:
+            The parsed result, reused from the previous response if the page is unchanged
+        """
+        cached = self.validators.get(url)
+        body, validators = await self._request(url, cached[0] if cached is not None else None)
+        
+        if body is None and cached is None:
+            logger.warning(f"{self.platform_name} answered 304 Not Modified to an unconditional request for {url}, fetching it again")
+            body, validators = await self._request(url, {"Cache-Control": "no-cache"})
+            if body is None:
+                raise ScrapingError(f"{self.platform_name} answered 304 Not Modified to an unconditional request for {url}")
+        elif body is None:
+            self.not_modified += 1
+            return cached[1]
+        
+        result = await parse(body)
+        if validators:
+            self.validators.set(url, (validators, result))
+        elif cached is not None:
+            self.validators.delete(url)
+        return result
+    
+    async def _request(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Fetch a page from the platform within its rate and concurrency limits.
+        
+        Requests are rejected immediately while the platform's circuit
+        breaker is open. With hedging enabled, a second attempt is sent
+        once the first has taken longer than the configured latency
+        quantile, and whichever succeeds first is used.
+        
+        Args:
+            url: URL to fetch
+            headers: Extra request headers, such as conditional request validators
+        
+        Returns:
+            Tuple of the response body as text (None on 304 Not Modified) and
+            the conditional request headers for the page's validators
+        
+        Raises:
+            CircuitOpenError: If the platform is currently failing
+            RateLimitExceededError: If the platform throttled us or is paused
+        """
+        if not self.circuit_breaker.allow_request():
+            SCRAPE_ERRORS.labels(self.platform_name, "circuit_open").inc()
+            raise CircuitOpenError(f"Circuit for {self.platform_name} is open, skipping request")
+        
+        hedge_delay = self._get_hedge_delay()
+        if hedge_delay is None:
+            return await self._fetch_once(url, headers)
+        
+        return await hedged(lambda: self._fetch_once(url, headers), hedge_delay, should_hedge=self._should_hedge)
+    
+    def _should_hedge(self) -> bool:
+        """Send a hedged attempt only if the platform has spare rate and concurrency."""
+        if not self.rate_limiter.has_capacity():
+            return False
+        self.hedged_requests += 1
+        return True
+    
+    def _get_hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging a request, or None to not hedge."""
+        if not settings.HEDGE_REQUESTS:
+            return None
+        
+        threshold = self.latency.quantile(settings.HEDGE_QUANTILE)
+        if threshold is None:
+            return None
+        return max(threshold, settings.HEDGE_MIN_DELAY)
+    
+    async def _fetch_once(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Send a single request for a page.
+        
+        Throttling responses (429/5xx) and timeouts make the platform's
+        limiter back off and count as circuit breaker failures; a
+        Retry-After header pauses the platform. Every attempt settles the
+        circuit breaker, including a half-open probe: an answer records a
+        success or failure, and a request that ends without one (cancelled
+        or rejected by our own rate limiter before being sent) releases the
+        probe.
+        """
+        start_time = time.monotonic()
+        # Whether the platform answered healthily; None while there is no outcome
+        healthy: Optional[bool] = None
+        try:
+            async with self.rate_limiter.slot():
+                sent_at = time.monotonic()
+                self._in_flight.inc()
+                try:
+                    async with self.session.get(url, headers=headers) as response:
+                        healthy = not (response.status == 429 or response.status >= 500)
+                        if not healthy:
+                            self.rate_limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                            if response.status == 429:
+                                raise RateLimitExceededError(f"{self.platform_name} rate limited the request for {url}")
+                        
+                        response.raise_for_status()
+                        html = await response.text() if response.status != 304 else None
+                        validators = conditional_headers(response.headers)
+                finally:
+                    self._in_flight.dec()
+                    self._scrape_latency.observe(time.monotonic() - sent_at)
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+            SCRAPE_ERRORS.labels(
+                self.platform_name, "timeout" if isinstance(e, asyncio.TimeoutError) else "connection"
+            ).inc()
+            self.rate_limiter.on_throttle()
+            healthy = False
+            raise
+        except RateLimitExceededError:
+            # Throttled by the platform, or rejected by our own limiter before sending (no outcome)
+            if healthy is False:
+                SCRAPE_ERRORS.labels(self.platform_name, "throttled").inc()
+            raise
+        except aiohttp.ClientResponseError:
+            SCRAPE_ERRORS.labels(self.platform_name, "http").inc()
+            raise
+        except asyncio.CancelledError:
+            healthy = None
+            raise
+        except Exception:
+            # Such as a truncated body (aiohttp.ClientPayloadError)
+            SCRAPE_ERRORS.labels(self.platform_name, "other").inc()
+            healthy = False
+            raise
+        finally:
+            if healthy is None:
+                self.circuit_breaker.release_probe()
+            elif healthy:
+                self.circuit_breaker.record_success()
+            else:
+                self.circuit_breaker.record_failure()
+        
+        self.rate_limiter.on_success()
+        self.latency.record(time.monotonic() - start_time)
+        return html, validators
+    
+    async def get_snapshot(self, product_id: str, product_name: str) -> Dict[str, Any]:
+        """
+        Get a snapshot of price, stock and discount for a specific product.
+        
+        The product page is downloaded and parsed once per snapshot, and the
+        snapshot is cached. get_price() and get_discount() are views over it.
+        Concurrent requests for the same product share a single scrape.
+        
+        Snapshots past their soft TTL are returned immediately while a single
+        background task refreshes them (stale-while-revalidate), until they
+        reach the hard TTL.
         
         Args:
             product_id: Platform-specific product ID
             product_name: Platform-specific product name
-            
+        
         Returns:
-            Dict containing price information
+            Dict containing price, stock and discount information
         """
-        cache_key = f"price:{self.platform_name}:{product_id}"
-        cached = self.cache.get(cache_key)
-        if cached:
+        cache_key = self._cache_key(product_id)
+        entry = self.cache.get_entry(cache_key)
+        if entry is not None:
             logger.debug(f"Cache hit for {cache_key}")
-            return cached
+            if entry.is_stale():
+                self._cache_stale_hits.inc()
+                self._schedule_refresh(cache_key, product_id, product_name)
+            else:
+                self._cache_hits.inc()
+            return entry.value
         
+        self._cache_misses.inc()
+        return await self.singleflight.do(
+            (self.platform_name, product_id),
+            lambda: self._fetch_snapshot(cache_key, product_id, product_name)
+        )
+    
+    def peek_snapshot(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached snapshot for a product, fresh or stale, without scraping.
+        
+        Args:
+            product_id: Platform-specific product ID
+        
+        Returns:
+            The cached snapshot, or None if nothing unexpired is cached
+        """
+        return self.cache.get(self._cache_key(product_id))
+    
+    def snapshot_stale_in(self, product_id: str) -> Optional[float]:
+        """
+        Return the seconds until the cached snapshot of a product turns stale.
+        
+        Returns:
+            Seconds (negative if already stale), or None if nothing unexpired is cached
+        """
+        entry = self.cache.get_entry(self._cache_key(product_id))
+        if entry is None:
+            return None
+        return entry.stale_at - time.time()
+    
+    def _cache_key(self, product_id: str) -> str:
+        return f"snapshot:{self.platform_name}:{product_id}"
+    
+    def _schedule_refresh(self, cache_key: str, product_id: str, product_name: str) -> None:
+        """Refresh a stale snapshot in the background, unless a scrape is already in flight."""
+        key = (self.platform_name, product_id)
+        if self.singleflight.is_in_flight(key):
+            return
+        
+        task = self.singleflight.start(
+            key,
+            lambda: self._fetch_snapshot(cache_key, product_id, product_name)
+        )
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _fetch_snapshot(self, cache_key: str, product_id: str, product_name: str) -> Dict[str, Any]:
+        """Scrape a snapshot and store it in the cache."""
         try:
             await self._ensure_session()
-            data = await self._scrape_price(product_id, product_name)
+            data = await self._scrape_snapshot(product_id, product_name)
+            data["scraped_at"] = time.time()
             self.cache.set(cache_key, data)
             return data
         except Exception as e:
-            logger.error(f"Error scraping price for {product_name} from {self.platform_name}: {str(e)}")
-            raise ScrapingError(f"Failed to scrape price for {product_name} from {self.platform_name}: {str(e)}")
+            logger.error(f"Error scraping {product_name} from {self.platform_name}: {str(e)}")
+            raise ScrapingError(f"Failed to scrape {product_name} from {self.platform_name}: {str(e)}")
+    
+    @property
+    def supports_batch(self) -> bool:
+        """Return True if the platform can scrape many products in one request."""
+        return self.batch_size > 0
+    
+    async def fetch_many(self, products: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get snapshots for many products with as few upstream requests as possible.
+        
+        Cached snapshots are used (and refreshed when stale) as in
+        get_snapshot(), and products already being scraped are joined. The
+        rest are scraped in batches of batch_size if the platform supports
+        it, and one request per product otherwise.
+        
+        Args:
+            products: Mapping of platform-specific product ID to product name
+        
+        Returns:
+            Mapping of product ID to snapshot; products that could not be scraped are left out
+        """
+        results = {}
+        stale = {}
+        to_scrape = {}
+        pending: Dict[str, asyncio.Task] = {}
+        
+        for product_id, product_name in products.items():
+            entry = self.cache.get_entry(self._cache_key(product_id))
+            if entry is not None:
+                results[product_id] = entry.value
+                if entry.is_stale():
+                    self._cache_stale_hits.inc()
+                    stale[product_id] = product_name
+                else:
+                    self._cache_hits.inc()
+                continue
+            
+            self._cache_misses.inc()
+            key = (self.platform_name, product_id)
+            if self.singleflight.is_in_flight(key) or not self.supports_batch:
+                pending[product_id] = self.singleflight.start(
+                    key,
+                    functools.partial(self._fetch_snapshot, self._cache_key(product_id), product_id, product_name)
+                )
+            else:
+                to_scrape[product_id] = product_name
+        
+        if to_scrape:
+            pending.update(self._start_batches(to_scrape))
+        self._schedule_refresh_many(stale)
+        
+        outcomes = await asyncio.gather(
+            *(asyncio.shield(task) for task in pending.values()),
+            return_exceptions=True
+        )
+        for product_id, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.debug(f"No snapshot for {product_id} from {self.platform_name}: {str(outcome)}")
+                continue
+            results[product_id] = outcome
+        
+        return results
+    
+    async def refresh_many(self, products: Dict[str, str]) -> int:
+        """
+        Re-scrape products now, whether or not their cached snapshots are fresh.
+        
+        Used to refresh snapshots before they expire. Products already being
+        scraped are skipped; the rest are batched if the platform supports it.
+        
+        Args:
+            products: Mapping of platform-specific product ID to product name
+        
+        Returns:
+            Number of products refreshed successfully
+        """
+        products = {
+            product_id: product_name
+            for product_id, product_name in products.items()
+            if not self.singleflight.is_in_flight((self.platform_name, product_id))
+        }
+        
+        if self.supports_batch:
+            tasks = self._start_batches(products)
+        else:
+            tasks = {
+                product_id: self.singleflight.start(
+                    (self.platform_name, product_id),
+                    functools.partial(self._fetch_snapshot, self._cache_key(product_id), product_id, product_name)
+                )
+                for product_id, product_name in products.items()
+            }
+        
+        outcomes = await asyncio.gather(
+            *(asyncio.shield(task) for task in tasks.values()),
+            return_exceptions=True
+        )
+        return sum(1 for outcome in outcomes if not isinstance(outcome, BaseException))
+    
+    def _start_batches(self, products: Dict[str, str]) -> Dict[str, asyncio.Task]:
+        """
+        Start batch scrapes for products, batch_size products per request.
+        
+        Each product gets its own single-flight task taking its snapshot from
+        the batch, so get_snapshot() calls for it join the batch.
+        
+        Returns:
+            Mapping of product ID to the task resolving to its snapshot
+        """
+        tasks = {}
+        product_ids = list(products)
+        
+        for start in range(0, len(product_ids), self.batch_size):
+            chunk = {product_id: products[product_id] for product_id in product_ids[start:start + self.batch_size]}
+            batch = asyncio.ensure_future(self._fetch_snapshots(chunk))
+            self._batch_tasks.add(batch)
+            batch.add_done_callback(self._forget_batch)
+            
+            for product_id in chunk:
+                tasks[product_id] = self.singleflight.start(
+                    (self.platform_name, product_id),
+                    functools.partial(self._take_from_batch, batch, product_id)
+                )
+        
+        return tasks
+    
+    def _forget_batch(self, batch: asyncio.Task) -> None:
+        """Drop a finished batch and mark its exception as retrieved."""
+        self._batch_tasks.discard(batch)
+        if not batch.cancelled():
+            batch.exception()
+    
+    async def _take_from_batch(self, batch: asyncio.Task, product_id: str) -> Dict[str, Any]:
+        """Wait for a batch scrape and return the snapshot of one of its products."""
+        snapshots = await asyncio.shield(batch)
+        if product_id not in snapshots:
+            raise ScrapingError(f"Product {product_id} missing from {self.platform_name} batch response")
+        return snapshots[product_id]
+    
+    def _schedule_refresh_many(self, products: Dict[str, str]) -> None:
+        """Refresh stale snapshots in the background, batched if the platform supports it."""
+        if not self.supports_batch:
+            for product_id, product_name in products.items():
+                self._schedule_refresh(self._cache_key(product_id), product_id, product_name)
+            return
+        
+        products = {
+            product_id: product_name
+            for product_id, product_name in products.items()
+            if not self.singleflight.is_in_flight((self.platform_name, product_id))
+        }
+        for task in self._start_batches(products).values():
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _fetch_snapshots(self, products: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Scrape snapshots for a batch of products and store them in the cache."""
+        self.batch_requests += 1
+        try:
+            await self._ensure_session()
+            snapshots = await self._scrape_many(products)
+        except Exception as e:
+            logger.error(f"Error batch scraping {len(products)} products from {self.platform_name}: {str(e)}")
+            raise ScrapingError(f"Failed to batch scrape {len(products)} products from {self.platform_name}: {str(e)}")
+        
+        scraped_at = time.time()
+        for product_id, data in snapshots.items():
+            data["scraped_at"] = scraped_at
+            self.cache.set(self._cache_key(product_id), data)
+        return snapshots
+    
+    async def get_price(self, product_id: str, product_name: str) -> Dict[str, Any]:
+        """
+        Get price for a specific product.
+        
+        Args:
+            product_id: Platform-specific product ID
+            product_name: Platform-specific product name
+        
+        Returns:
+            Dict containing price information
+        """
+        snapshot = await self.get_snapshot(product_id, product_name)
+        return {key: snapshot[key] for key in PRICE_FIELDS if key in snapshot}
     
     async def get_discount(self, product_id: str, product_name: str) -> Dict[str, Any]:
         """
@@ -79,43 +566,122 @@ class BaseScraper(ABC):
         Args:
             product_id: Platform-specific product ID
             product_name: Platform-specific product name
-            
+        
         Returns:
             Dict containing discount information
         """
-        cache_key = f"discount:{self.platform_name}:{product_id}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            logger.debug(f"Cache hit for {cache_key}")
-            return cached
-        
         try:
-            await self._ensure_session()
-            data = await self._scrape_discount(product_id, product_name)
-            self.cache.set(cache_key, data)
-            return data
-        except Exception as e:
-            logger.error(f"Error scraping discount for {product_name} from {self.platform_name}: {str(e)}")
+            snapshot = await self.get_snapshot(product_id, product_name)
+        except ScrapingError:
             # Return zero discount instead of failing
-            return {"discount": Decimal('0.0'), "discount_type": "none"}
+            return dict(NO_DISCOUNT)
+        
+        return {
+            "discount": snapshot.get("discount", NO_DISCOUNT["discount"]),
+            "discount_type": snapshot.get("discount_type", NO_DISCOUNT["discount_type"])
+        }
     
     @abstractmethod
-    async def _scrape_price(self, product_id: str, product_name: str) -> Dict[str, Any]:
+    async def _scrape_snapshot(self, product_id: str, product_name: str) -> Dict[str, Any]:
         """
-        Platform-specific implementation to scrape product price.
-        Must be implemented by subclasses.
+        Platform-specific implementation to scrape a product snapshot.
+        
+        Must be implemented by subclasses. Implementations should download
+        the product page once and return the fields of PRICE_FIELDS together
+        with "discount" and "discount_type" (see NO_DISCOUNT).
         """
         pass
     
-    @abstractmethod
-    async def _scrape_discount(self, product_id: str, product_name: str) -> Dict[str, Any]:
+    async def _scrape_many(self, products: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
         """
-        Platform-specific implementation to scrape product discounts.
-        Must be implemented by subclasses.
+        Platform-specific implementation to scrape snapshots of many products at once.
+        
+        Only called on scrapers with a non-zero batch_size, with at most
+        batch_size products.
+        
+        Args:
+            products: Mapping of platform-specific product ID to product name
+        
+        Returns:
+            Mapping of product ID to snapshot (as returned by _scrape_snapshot());
+            products missing from the platform's response are left out
         """
-        pass
+        raise NotImplementedError(f"{self.platform_name} does not support batch scraping")
+    
+    async def _extract(self, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """
+        Extract the text of the first element matching each CSS selector.
+        
+        Extraction runs in the parse executor if one is configured, so large
+        pages do not block the event loop.
+        
+        Args:
+            html: Product page HTML
+            selectors: Mapping of field name to CSS selector
+        
+        Returns:
+            Mapping of field name to stripped element text, or None if not found
+        """
+        if self.parse_executor is None:
+            return self.extractor.extract(html, selectors)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.parse_executor, extract_with, self.extractor.name, html, selectors
+        )
+    
+    def get_freshness(self, snapshot: Dict[str, Any]) -> Tuple[str, Optional[float]]:
+        """
+        Classify a snapshot as "fresh" or "stale" based on its age.
+        
+        Returns:
+            Tuple of (freshness, age in seconds)
+        """
+        scraped_at = snapshot.get("scraped_at")
+        if scraped_at is None:
+            return "fresh", None
+        
+        age = max(0.0, time.time() - scraped_at)
+        return ("stale" if age >= self.cache.default_ttl else "fresh"), age
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return runtime statistics for this scraper."""
+        return {
+            "singleflight": self.singleflight.stats(),
+            "background_refreshes": len(self._refresh_tasks),
+            "rate_limiter": self.rate_limiter.stats(),
+            "circuit_breaker": self.circuit_breaker.stats(),
+            "latency_p95": self.latency.quantile(0.95),
+            "hedged_requests": self.hedged_requests,
+            "batch_requests": self.batch_requests,
+            "not_modified": self.not_modified,
+            "validators": len(self.validators),
+        }
     
     async def close(self) -> None:
-        """Close the aiohttp session."""
+        """Cancel scrapes still in flight and close the aiohttp session."""
+        self.singleflight.cancel_all()
+        for batch in list(self._batch_tasks):
+            batch.cancel()
         if self.session and not self.session.closed:
-            await self.session.close()
\ No newline at end of file
+            await self.session.close()
+
+def conditional_headers(response_headers: Mapping[str, str]) -> Dict[str, str]:
+    """Return the conditional request headers revalidating a response (empty if it has no validators)."""
+    headers = {}
+    if "ETag" in response_headers:
+        headers["If-None-Match"] = response_headers["ETag"]
+    if "Last-Modified" in response_headers:
+        headers["If-Modified-Since"] = response_headers["Last-Modified"]
+    return headers
+
+def create_rate_limiter(platform: str) -> PlatformRateLimiter:
+    """Create a rate limiter for a platform configured from application settings."""
+    return PlatformRateLimiter(
+        platform,
+        rate=settings.PLATFORM_RATE_LIMITS.get(platform, settings.PLATFORM_RATE_LIMIT),
+        burst=settings.PLATFORM_RATE_BURST,
+        max_concurrency=settings.PLATFORM_MAX_CONCURRENCY,
+        min_concurrency=settings.PLATFORM_MIN_CONCURRENCY,
+        max_wait=settings.SCRAPER_TIMEOUT
+    )
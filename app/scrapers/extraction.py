@@ -0,0 +1,372 @@
+import logging
+import multiprocessing
+import re
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+from bs4 import BeautifulSoup
+from app.core.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:  # pragma: no cover - optional dependency
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:  # pragma: no cover - optional dependency
+    CSSSelector = None
+
+class HTMLExtractor(ABC):
+    """
+    Extracts the text of a few elements from an HTML page.
+    
+    Scrapers only need a handful of values from each product page, so
+    extractors are given the CSS selectors up front and may skip building
+    a full document tree.
+    """
+    
+    name: str = "base"
+    
+    def prepare(self, selectors: Iterable[str]) -> None:
+        """Precompile selectors that will be used repeatedly (optional)."""
+        pass
+    
+    @abstractmethod
+    def extract(self, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """
+        Extract the text of the first element matching each selector.
+        
+        Args:
+            html: HTML document
+            selectors: Mapping of field name to CSS selector
+        
+        Returns:
+            Mapping of field name to stripped element text, or None if no element matched
+        """
+        pass
+
+class BeautifulSoupExtractor(HTMLExtractor):
+    """Extractor building a full BeautifulSoup tree; supports any CSS selector."""
+    
+    name = "beautifulsoup"
+    
+    def extract(self, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+        soup = BeautifulSoup(html, 'html.parser')
+        results = {}
+        for field, selector in selectors.items():
+            element = soup.select_one(selector)
+            results[field] = element.text.strip() if element else None
+        return results
+
+class LxmlExtractor(HTMLExtractor):
+    """Extractor using lxml's C parser and compiled CSS selectors."""
+    
+    name = "lxml"
+    
+    def __init__(self):
+        if CSSSelector is None:
+            raise ConfigurationError("The lxml extractor requires the lxml and cssselect packages")
+        self._compiled: Dict[str, CSSSelector] = {}
+    
+    def _compile(self, selector: str) -> "CSSSelector":
+        compiled = self._compiled.get(selector)
+        if compiled is None:
+            compiled = self._compiled[selector] = CSSSelector(selector)
+        return compiled
+    
+    def prepare(self, selectors: Iterable[str]) -> None:
+        for selector in selectors:
+            self._compile(selector)
+    
+    def extract(self, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+        document = lxml.html.fromstring(html)
+        results = {}
+        for field, selector in selectors.items():
+            elements = self._compile(selector)(document)
+            results[field] = elements[0].text_content().strip() if elements else None
+        return results
+
+class SelectolaxExtractor(HTMLExtractor):
+    """Extractor using selectolax's Lexbor-based C parser."""
+    
+    name = "selectolax"
+    
+    def __init__(self):
+        if SelectolaxParser is None:
+            raise ConfigurationError("The selectolax extractor requires the selectolax package")
+    
+    def extract(self, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+        tree = SelectolaxParser(html)
+        results = {}
+        for field, selector in selectors.items():
+            node = tree.css_first(selector)
+            results[field] = node.text().strip() if node is not None else None
+        return results
+
+# tag, tag.class, .class, #id, tag#id.class, ...
+_SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][a-zA-Z0-9-]*)?((?:[.#][a-zA-Z0-9_-]+)*)$')
+
+class SimpleSelector:
+    """A compound CSS selector made of an optional tag, an optional id and classes."""
+    
+    __slots__ = ("tag", "id", "classes")
+    
+    def __init__(self, tag: Optional[str], element_id: Optional[str], classes: Tuple[str, ...]):
+        self.tag = tag
+        self.id = element_id
+        self.classes = classes
+    
+    @classmethod
+    def parse(cls, selector: str) -> Optional["SimpleSelector"]:
+        """Parse a selector, returning None if it is not a simple compound selector."""
+        match = _SIMPLE_SELECTOR.match(selector.strip())
+        if not match or not selector.strip():
+            return None
+        
+        tag, qualifiers = match.groups()
+        element_id = None
+        classes = []
+        for part in re.findall(r'[.#][a-zA-Z0-9_-]+', qualifiers):
+            if part[0] == '#':
+                element_id = part[1:]
+            else:
+                classes.append(part[1:])
+        return cls(tag.lower() if tag else None, element_id, tuple(classes))
+    
+    def anchor(self) -> Optional[str]:
+        """Return a string that must occur in the page for the selector to match."""
+        if self.id:
+            return self.id
+        if self.classes:
+            return self.classes[0]
+        return None
+    
+    def matches(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> bool:
+        if self.tag and tag != self.tag:
+            return False
+        if self.id is None and not self.classes:
+            return True
+        
+        attributes = dict(attrs)
+        if self.id is not None and attributes.get("id") != self.id:
+            return False
+        if self.classes:
+            element_classes = (attributes.get("class") or "").split()
+            return all(name in element_classes for name in self.classes)
+        return True
+
+# Parts of a page that are not markup, as the standard library parser reads them:
+# tags inside comments, CDATA sections, scripts and styles never match a selector
+_NOT_MARKUP = re.compile(
+    r'<!--.*?(?:-->|\Z)|<!\[CDATA\[.*?(?:\]\]>|\Z)|<(script|style)\b.*?(?:</\1\s*>|\Z)',
+    re.DOTALL | re.IGNORECASE
+)
+
+# Elements whose content is raw text rather than element text
+_RAW_TEXT_TAGS = ("script", "style")
+
+def _find_in_markup(html: str, anchor: str) -> int:
+    """Return the first position of anchor outside comments, CDATA sections, scripts and styles, or -1."""
+    position = html.find(anchor)
+    for region in _NOT_MARKUP.finditer(html):
+        if position < 0 or region.start() > position:
+            break
+        if position < region.end():
+            position = html.find(anchor, region.end())
+    return position
+
+class _AllFound(Exception):
+    """Raised inside the scanner to stop parsing once every selector has matched."""
+
+class _TagScanner(HTMLParser):
+    """Streaming HTML scanner collecting the text of the first match of each selector."""
+    
+    def __init__(self, selectors: Dict[str, SimpleSelector]):
+        super().__init__(convert_charrefs=True)
+        self.selectors = selectors
+        self.results: Dict[str, Optional[str]] = {field: None for field in selectors}
+        # field -> (tag name, nesting depth of that tag, collected text)
+        self.open: Dict[str, Tuple[str, int, List[str]]] = {}
+        # Script or style element being read, whose text is not element text
+        self.raw_text_tag: Optional[str] = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in _RAW_TEXT_TAGS:
+            self.raw_text_tag = tag
+        
+        for field, (open_tag, depth, text) in list(self.open.items()):
+            if tag == open_tag:
+                self.open[field] = (open_tag, depth + 1, text)
+        
+        for field, selector in self.selectors.items():
+            if self.results[field] is None and field not in self.open and selector.matches(tag, attrs):
+                self.open[field] = (tag, 1, [])
+    
+    def handle_startendtag(self, tag, attrs):
+        for field, selector in self.selectors.items():
+            if self.results[field] is None and field not in self.open and selector.matches(tag, attrs):
+                self.results[field] = ""
+        self._check_done()
+    
+    def handle_endtag(self, tag):
+        if tag == self.raw_text_tag:
+            self.raw_text_tag = None
+        
+        for field, (open_tag, depth, text) in list(self.open.items()):
+            if tag != open_tag:
+                continue
+            if depth > 1:
+                self.open[field] = (open_tag, depth - 1, text)
+            else:
+                del self.open[field]
+                self.results[field] = "".join(text).strip()
+        self._check_done()
+    
+    def handle_data(self, data):
+        if self.raw_text_tag is not None:
+            return
+        for _, _, text in self.open.values():
+            text.append(data)
+    
+    def _check_done(self):
+        if not self.open and all(value is not None for value in self.results.values()):
+            raise _AllFound()
+
+class TagScanExtractor(HTMLExtractor):
+    """
+    Streaming extractor for simple selectors, built on the standard library parser.
+    
+    Parsing starts at the tag holding the first occurrence of any
+    selector's class or id in the markup of the raw page (occurrences in
+    comments, CDATA sections, scripts and styles are skipped) and stops as
+    soon as every selector has matched, so most of a large page is never
+    parsed. Text inside scripts and styles is not collected, as with
+    BeautifulSoup. Selectors that are not simple
+    compound selectors (tag, .class, #id combinations) are delegated to
+    BeautifulSoup.
+    """
+    
+    name = "tagscan"
+    
+    def __init__(self):
+        self.fallback = BeautifulSoupExtractor()
+        self._parsed: Dict[str, Optional[SimpleSelector]] = {}
+    
+    def _parse(self, selector: str) -> Optional[SimpleSelector]:
+        if selector not in self._parsed:
+            self._parsed[selector] = SimpleSelector.parse(selector)
+        return self._parsed[selector]
+    
+    def prepare(self, selectors: Iterable[str]) -> None:
+        for selector in selectors:
+            self._parse(selector)
+    
+    def extract(self, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+        simple = {}
+        complex_selectors = {}
+        for field, selector in selectors.items():
+            parsed = self._parse(selector)
+            if parsed is None:
+                complex_selectors[field] = selector
+            else:
+                simple[field] = parsed
+        
+        results = {field: None for field in simple}
+        
+        # Skip straight to the first place any selector could match; selectors
+        # whose class or id never occurs in the markup cannot match at all
+        start = len(html)
+        candidates = {}
+        for field, selector in simple.items():
+            anchor = selector.anchor()
+            position = _find_in_markup(html, anchor) if anchor else 0
+            if position >= 0:
+                candidates[field] = selector
+                start = min(start, position)
+        
+        if candidates:
+            start = html.rfind("<", 0, start + 1)
+            scanner = _TagScanner(candidates)
+            try:
+                scanner.feed(html[max(start, 0):])
+                scanner.close()
+            except _AllFound:
+                pass
+            results.update(scanner.results)
+        
+        if complex_selectors:
+            results.update(self.fallback.extract(html, complex_selectors))
+        return results
+
+EXTRACTORS = {
+    SelectolaxExtractor.name: SelectolaxExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+    TagScanExtractor.name: TagScanExtractor,
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+}
+
+def get_extractor(name: str = "auto") -> HTMLExtractor:
+    """
+    Create an HTML extractor by name.
+    
+    "auto" picks the fastest backend available: selectolax, then lxml, then
+    the streaming tag scanner (which needs no extra dependencies).
+    
+    Raises:
+        ConfigurationError: If the extractor is unknown or its dependencies are missing
+    """
+    if name == "auto":
+        if SelectolaxParser is not None:
+            return SelectolaxExtractor()
+        if CSSSelector is not None:
+            return LxmlExtractor()
+        return TagScanExtractor()
+    
+    extractor_cls = EXTRACTORS.get(name)
+    if extractor_cls is None:
+        raise ConfigurationError(f"Unknown HTML extractor: {name}")
+    return extractor_cls()
+
+# Extractors used by extract_with(), created lazily in each worker
+_worker_extractors: Dict[str, HTMLExtractor] = {}
+
+def extract_with(extractor_name: str, html: str, selectors: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """
+    Extract fields with the named extractor.
+    
+    This is the entry point submitted to parse executors: it only takes
+    picklable arguments, so it can run in a thread or a worker process.
+    """
+    extractor = _worker_extractors.get(extractor_name)
+    if extractor is None:
+        extractor = _worker_extractors[extractor_name] = get_extractor(extractor_name)
+    return extractor.extract(html, selectors)
+
+def create_parse_executor(kind: str = "none", workers: Optional[int] = None) -> Optional[Executor]:
+    """
+    Create the executor HTML extraction is offloaded to.
+    
+    Args:
+        kind: "none" (parse on the event loop), "thread" or "process"
+        workers: Number of workers (None for the executor's default)
+    
+    Returns:
+        The executor, or None to parse inline
+    
+    Raises:
+        ConfigurationError: If the executor kind is unknown
+    """
+    if kind == "none":
+        return None
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="html-parse")
+    if kind == "process":
+        # Workers are spawned rather than forked so they do not inherit the
+        # event loop and the threads of the server process
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    raise ConfigurationError(f"Unknown parse executor: {kind}")
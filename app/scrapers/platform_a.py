@@ -1,120 +0,0 @@
-import logging
-import re
-import json
-from typing import Dict, Any
-from decimal import Decimal
-from bs4 import BeautifulSoup
-from app.scrapers.base_scraper import BaseScraper
-from app.core.config import settings
-
-logger = logging.getLogger(__name__)
-
-class PlatformAScraper(BaseScraper):
-    """Scraper implementation for Platform A."""
-    
-    def _get_platform_name(self) -> str:
-        return "PlatformA"
-    
-    def _get_base_url(self) -> str:
-        return settings.PLATFORM_A_URL
-    
-    async def _scrape_price(self, product_id: str, product_name: str) -> Dict[str, Any]:
-        """
-        Scrape price for a product from Platform A.
-        
-        This is a sample implementation - you'll need to adapt it to the
-        actual structure of Platform A's website.
-        """
-        url = f"{self.base_url}/products/{product_id}"
-        
-        try:
-            async with self.session.get(url) as response:
-                response.raise_for_status()
-                html = await response.text()
-                
-                # Parse the HTML with BeautifulSoup
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Find price information - these selectors need to be customized
-                price_element = soup.select_one('span.product-price')
-                if not price_element:
-                    raise ValueError("Price element not found")
-                
-                # Extract the price
-                price_text = price_element.text.strip()
-                price_match = re.search(r'(\d+\.\d+)', price_text)
-                if not price_match:
-                    raise ValueError(f"Could not extract price from: {price_text}")
-                
-                price = Decimal(price_match.group(1))
-                
-                # Extract additional information if available
-                stock_element = soup.select_one('span.stock-status')
-                in_stock = stock_element and "in stock" in stock_element.text.lower() if stock_element else True
-                
-                return {
-                    "platform": self._get_platform_name(),
-                    "product_id": product_id,
-                    "product_name": product_name,
-                    "price": price,
-                    "currency": "USD",  # Adjust as needed
-                    "in_stock": in_stock,
-                    "url": url
-                }
-                
-        except Exception as e:
-            logger.error(f"Error scraping price from Platform A for {product_name}: {str(e)}")
-            raise
-    
-    async def _scrape_discount(self, product_id: str, product_name: str) -> Dict[str, Any]:
-        """
-        Scrape discount information for a product from Platform A.
-        
-        This is a sample implementation - you'll need to adapt it to the
-        actual structure of Platform A's website.
-        """
-        url = f"{self.base_url}/products/{product_id}"
-        
-        try:
-            async with self.session.get(url) as response:
-                response.raise_for_status()
-                html = await response.text()
-                
-                # Parse the HTML with BeautifulSoup
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Find discount information - these selectors need to be customized
-                discount_element = soup.select_one('span.product-discount')
-                
-                if not discount_element:
-                    # No discount found
-                    return {"discount": Decimal('0.0'), "discount_type": "none"}
-                
-                # Extract the discount amount
-                discount_text = discount_element.text.strip()
-                discount_match = re.search(r'(\d+(?:\.\d+)?)%', discount_text)
-                
-                if discount_match:
-                    # Percentage discount
-                    discount_percentage = Decimal(discount_match.group(1))
-                    return {
-                        "discount": discount_percentage,
-                        "discount_type": "percentage"
-                    }
-                
-                # Try to find absolute discount
-                discount_match = re.search(r'\$(\d+\.\d+)', discount_text)
-                if discount_match:
-                    discount_amount = Decimal(discount_match.group(1))
-                    return {
-                        "discount": discount_amount,
-                        "discount_type": "absolute"
-                    }
-                
-                # No recognizable discount format
-                return {"discount": Decimal('0.0'), "discount_type": "none"}
-                
-        except Exception as e:
-            logger.error(f"Error scraping discount from Platform A for {product_name}: {str(e)}")
-            # Return zero discount instead of failing
-            return {"discount": Decimal('0.0'), "discount_type": "none"}
\ No newline at end of file
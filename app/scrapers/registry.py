@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Dict, Optional, Any
+import aiohttp
+from app.scrapers.base_scraper import BaseScraper, create_rate_limiter
+from app.scrapers.extraction import create_parse_executor
+from app.scrapers.spec import CompiledScraperSpec, DeclarativeScraper, load_scraper_specs
+from app.core.config import settings
+from app.core.exceptions import ConfigurationError
+from app.utils.cache import create_scraper_cache
+
+logger = logging.getLogger(__name__)
+
+class ScraperRegistry:
+    """
+    Process-wide registry of platform scrapers.
+    
+    The registry is created once in the application lifespan. It owns a
+    pooled keep-alive connector and a rate limiter per platform, and a single
+    cache shared by all scrapers, so connections, cached results and rate
+    limits apply across API requests instead of being rebuilt for each one.
+    HTML extraction for all platforms runs in one shared parse executor.
+    
+    Platforms are defined declaratively in the scraper specs file
+    (SCRAPER_SPECS_PATH); each spec is compiled once when the registry is
+    created.
+    """
+    
+    def __init__(self, specs: Optional[Dict[str, CompiledScraperSpec]] = None):
+        self.specs = specs if specs is not None else load_scraper_specs()
+        self.cache = create_scraper_cache()
+        self.connectors: Dict[str, aiohttp.TCPConnector] = {}
+        self.scrapers: Dict[str, BaseScraper] = {}
+        self.parse_executor: Optional[Executor] = None
+    
+    def _create_connector(self) -> aiohttp.TCPConnector:
+        """Create a pooled keep-alive connector using the configured limits."""
+        return aiohttp.TCPConnector(
+            limit=settings.SCRAPER_POOL_LIMIT,
+            limit_per_host=settings.SCRAPER_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.SCRAPER_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.SCRAPER_DNS_CACHE_TTL,
+        )
+    
+    async def startup(self) -> None:
+        """Create the connector and scraper for every registered platform."""
+        self.cache.start_sweeper(settings.CACHE_SWEEP_INTERVAL)
+        self.parse_executor = create_parse_executor(settings.PARSE_EXECUTOR, settings.PARSE_WORKERS)
+        
+        for platform, spec in self.specs.items():
+            connector = self._create_connector()
+            self.connectors[platform] = connector
+            self.scrapers[platform] = DeclarativeScraper(
+                spec,
+                cache=self.cache,
+                connector=connector,
+                rate_limiter=create_rate_limiter(platform),
+                parse_executor=self.parse_executor
+            )
+        
+        logger.info(f"Scraper registry started with platforms: {', '.join(self.scrapers)}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return runtime statistics for the shared cache and every platform scraper."""
+        return {
+            "cache": self.cache.stats(),
+            "platforms": {
+                platform: scraper.get_stats()
+                for platform, scraper in self.scrapers.items()
+            },
+        }
+    
+    async def shutdown(self) -> None:
+        """Close all scraper sessions, their connectors and the parse executor."""
+        await self.cache.stop_sweeper()
+        await asyncio.gather(
+            *(scraper.close() for scraper in self.scrapers.values()),
+            return_exceptions=True
+        )
+        await asyncio.gather(
+            *(connector.close() for connector in self.connectors.values()),
+            return_exceptions=True
+        )
+        
+        self.scrapers.clear()
+        self.connectors.clear()
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+            self.parse_executor = None
+        self.cache.close()
+        logger.info("Scraper registry stopped")
+
+_registry: Optional[ScraperRegistry] = None
+
+async def start_scraper_registry() -> ScraperRegistry:
+    """Create and start the process-wide scraper registry."""
+    global _registry
+    if _registry is None:
+        registry = ScraperRegistry()
+        await registry.startup()
+        _registry = registry
+    return _registry
+
+async def stop_scraper_registry() -> None:
+    """Shut down the process-wide scraper registry, if it was started."""
+    global _registry
+    if _registry is not None:
+        registry, _registry = _registry, None
+        await registry.shutdown()
+
+def get_scraper_registry() -> ScraperRegistry:
+    """Return the process-wide scraper registry."""
+    if _registry is None:
+        raise ConfigurationError("Scraper registry has not been started")
+    return _registry
@@ -0,0 +1,320 @@
+import json
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, List, Optional
+from urllib.parse import quote
+from pydantic import BaseModel, ValidationError
+from app.scrapers.base_scraper import BaseScraper, NO_DISCOUNT
+from app.core.config import settings
+from app.core.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+class SelectorSpec(BaseModel):
+    """CSS selectors of the product page elements a scraper reads."""
+    
+    price: str
+    stock: Optional[str] = None
+    discount: Optional[str] = None
+
+class BatchSpec(BaseModel):
+    """
+    Bulk JSON endpoint returning many products per request.
+    
+    Field names are dotted paths into each item of the response; numeric
+    prices and booleans are used as is, strings are parsed with the spec's
+    patterns like element texts.
+    """
+    
+    url_template: str  # may use {base_url} and {product_ids}
+    max_size: int = 50
+    id_separator: str = ","
+    items_path: str = ""  # dotted path to the list of items ("" if the response is the list)
+    id_field: str = "id"
+    price_field: str = "price"
+    stock_field: Optional[str] = None
+    discount_field: Optional[str] = None
+    numeric_discount_type: str = "percentage"  # how a numeric discount value is interpreted
+
+class ScraperSpec(BaseModel):
+    """Declarative definition of a platform scraper, as loaded from config/scrapers.json."""
+    
+    base_url_setting: str
+    enabled: bool = True  # disabled specs are not loaded (e.g. until their selectors are verified)
+    url_template: str = "{base_url}/products/{product_id}"
+    currency: str = "USD"
+    selectors: SelectorSpec
+    price_pattern: str = r"(\d+(?:\.\d+)?)"
+    discount_percentage_pattern: Optional[str] = r"(\d+(?:\.\d+)?)%"
+    discount_absolute_pattern: Optional[str] = r"\$(\d+(?:\.\d+)?)"
+    in_stock_text: str = "in stock"
+    batch: Optional[BatchSpec] = None
+
+def _lookup(item: Any, path: str) -> Any:
+    """Follow a dotted path into nested JSON objects, returning None if it is missing."""
+    for part in path.split(".") if path else ():
+        if not isinstance(item, dict):
+            return None
+        item = item.get(part)
+    return item
+
+class CompiledScraperSpec:
+    """
+    A scraper spec compiled once for repeated use.
+    
+    Regexes are compiled and the URL base and selectors resolved up front,
+    so scraping a product only formats a URL, runs the extractor and
+    applies the precompiled patterns.
+    """
+    
+    def __init__(self, platform: str, spec: ScraperSpec, base_url: str):
+        self.platform = platform
+        self.base_url = base_url.rstrip("/")
+        self.url_template = spec.url_template
+        self.currency = spec.currency
+        self.in_stock_text = spec.in_stock_text.lower()
+        self.batch = spec.batch
+        self.batch_size = max(0, spec.batch.max_size) if spec.batch else 0
+        if self.batch and self.batch.numeric_discount_type not in ("percentage", "absolute"):
+            raise ConfigurationError(
+                f"Invalid numeric_discount_type in scraper spec for {platform}: {self.batch.numeric_discount_type}"
+            )
+        self.selectors = {
+            field: selector
+            for field, selector in (
+                ("price", spec.selectors.price),
+                ("stock", spec.selectors.stock),
+                ("discount", spec.selectors.discount),
+            )
+            if selector
+        }
+        
+        try:
+            self.price_pattern = re.compile(spec.price_pattern)
+            self.discount_patterns = [
+                (discount_type, re.compile(pattern))
+                for discount_type, pattern in (
+                    ("percentage", spec.discount_percentage_pattern),
+                    ("absolute", spec.discount_absolute_pattern),
+                )
+                if pattern
+            ]
+        except re.error as e:
+            raise ConfigurationError(f"Invalid pattern in scraper spec for {platform}: {str(e)}")
+        
+        try:
+            self.build_url("id", "name")
+            if self.batch:
+                self.build_batch_url(["id"])
+        except (KeyError, IndexError, ValueError) as e:
+            raise ConfigurationError(f"Invalid URL template in scraper spec for {platform}: {str(e)}")
+    
+    def build_url(self, product_id: str, product_name: str) -> str:
+        """Build the product page URL."""
+        return self.url_template.format(
+            base_url=self.base_url,
+            product_id=quote(str(product_id), safe=""),
+            product_name=quote(product_name, safe="")
+        )
+    
+    def build_batch_url(self, product_ids: List[str]) -> str:
+        """Build the URL of the batch endpoint for some products."""
+        return self.batch.url_template.format(
+            base_url=self.base_url,
+            product_ids=self.batch.id_separator.join(quote(str(product_id), safe="") for product_id in product_ids)
+        )
+    
+    def parse_batch(self, body: str, products: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Parse a batch endpoint response into snapshots of the requested products.
+        
+        Items that are not requested, or whose price cannot be parsed, are
+        left out.
+        
+        Raises:
+            ValueError: If the response is not JSON or has no item list
+        """
+        items = _lookup(json.loads(body), self.batch.items_path)
+        if not isinstance(items, list):
+            raise ValueError(f"No item list at '{self.batch.items_path}' in batch response")
+        
+        snapshots = {}
+        for item in items:
+            product_id = _lookup(item, self.batch.id_field)
+            if product_id is None or str(product_id) not in products:
+                continue
+            product_id = str(product_id)
+            
+            fields = {
+                "price": _lookup(item, self.batch.price_field),
+                "stock": _lookup(item, self.batch.stock_field) if self.batch.stock_field else None,
+                "discount": _lookup(item, self.batch.discount_field) if self.batch.discount_field else None,
+            }
+            try:
+                snapshots[product_id] = {
+                    "platform": self.platform,
+                    "product_id": product_id,
+                    "product_name": products[product_id],
+                    **self._parse_batch_price(fields),
+                    "url": self.build_url(product_id, products[product_id]),
+                    **self._parse_batch_discount(fields["discount"])
+                }
+            except (ValueError, InvalidOperation) as e:
+                logger.warning(f"Skipping {product_id} in {self.platform} batch response: {str(e)}")
+        
+        return snapshots
+    
+    def _parse_batch_price(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        price, stock = fields["price"], fields["stock"]
+        if isinstance(price, (int, float)) and not isinstance(price, bool):
+            parsed = {"price": Decimal(str(price)), "currency": self.currency, "in_stock": True}
+        else:
+            parsed = self.parse_price({"price": None if price is None else str(price)})
+        
+        if isinstance(stock, bool):
+            parsed["in_stock"] = stock
+        elif stock is not None:
+            parsed["in_stock"] = self.in_stock_text in str(stock).lower()
+        return parsed
+    
+    def _parse_batch_discount(self, discount: Any) -> Dict[str, Any]:
+        if isinstance(discount, (int, float)) and not isinstance(discount, bool):
+            if not discount:
+                return dict(NO_DISCOUNT)
+            return {"discount": Decimal(str(discount)), "discount_type": self.batch.numeric_discount_type}
+        return self.parse_discount({"discount": None if discount is None else str(discount)})
+    
+    def parse_price(self, fields: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Parse price and stock from extracted element texts.
+        
+        Raises:
+            ValueError: If the price is missing or cannot be parsed
+        """
+        price_text = fields.get("price")
+        if price_text is None:
+            raise ValueError("Price element not found")
+        
+        price_match = self.price_pattern.search(price_text.replace(",", ""))
+        if not price_match:
+            raise ValueError(f"Could not extract price from: {price_text}")
+        
+        stock_text = fields.get("stock")
+        return {
+            "price": Decimal(price_match.group(1)),
+            "currency": self.currency,
+            "in_stock": self.in_stock_text in stock_text.lower() if stock_text is not None else True,
+        }
+    
+    def parse_discount(self, fields: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Parse the discount from extracted element texts.
+        
+        A missing or unrecognizable discount is reported as no discount.
+        """
+        discount_text = fields.get("discount")
+        if discount_text is None:
+            return dict(NO_DISCOUNT)
+        
+        for discount_type, pattern in self.discount_patterns:
+            discount_match = pattern.search(discount_text)
+            if discount_match:
+                try:
+                    return {
+                        "discount": Decimal(discount_match.group(1)),
+                        "discount_type": discount_type
+                    }
+                except InvalidOperation:
+                    break
+        
+        return dict(NO_DISCOUNT)
+
+class DeclarativeScraper(BaseScraper):
+    """Scraper driven entirely by a compiled scraper spec."""
+    
+    def __init__(self, spec: CompiledScraperSpec, **kwargs):
+        """
+        Initialize the scraper.
+        
+        Args:
+            spec: Compiled spec of the platform
+            **kwargs: Shared resources passed on to BaseScraper
+        """
+        self.spec = spec
+        self.batch_size = spec.batch_size
+        super().__init__(**kwargs)
+        self.extractor.prepare(spec.selectors.values())
+    
+    def _get_platform_name(self) -> str:
+        return self.spec.platform
+    
+    def _get_base_url(self) -> str:
+        return self.spec.base_url
+    
+    async def _scrape_snapshot(self, product_id: str, product_name: str) -> Dict[str, Any]:
+        """Fetch the product page once and parse price, stock and discount from it."""
+        url = self.spec.build_url(product_id, product_name)
+        
+        try:
+            fields = await self._fetch_parsed(url, lambda html: self._extract(html, self.spec.selectors))
+            
+            return {
+                "platform": self.platform_name,
+                "product_id": product_id,
+                "product_name": product_name,
+                **self.spec.parse_price(fields),
+                "url": url,
+                **self.spec.parse_discount(fields)
+            }
+        
+        except Exception as e:
+            logger.error(f"Error scraping {self.platform_name} for {product_name}: {str(e)}")
+            raise
+    
+    async def _scrape_many(self, products: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch the platform's batch endpoint once for all products and parse their snapshots."""
+        async def parse(body: str) -> Dict[str, Dict[str, Any]]:
+            return self.spec.parse_batch(body, products)
+        
+        snapshots = await self._fetch_parsed(self.spec.build_batch_url(list(products)), parse)
+        # Snapshots are stamped when cached, so a reused result is copied
+        return {product_id: dict(snapshot) for product_id, snapshot in snapshots.items()}
+
+def load_scraper_specs(path: Optional[str] = None) -> Dict[str, CompiledScraperSpec]:
+    """
+    Load and compile the scraper specs of all platforms.
+    
+    Args:
+        path: Path to the specs JSON file (defaults to SCRAPER_SPECS_PATH)
+    
+    Returns:
+        Mapping of platform name to compiled spec, for enabled specs only
+    
+    Raises:
+        ConfigurationError: If the file or a spec is invalid, or a base URL setting is missing
+    """
+    path = path or settings.SCRAPER_SPECS_PATH
+    try:
+        with open(path, "r") as f:
+            raw_specs = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        raise ConfigurationError(f"Error loading scraper specs from {path}: {str(e)}")
+    
+    specs = {}
+    for platform, raw_spec in raw_specs.items():
+        try:
+            spec = ScraperSpec(**raw_spec)
+        except (TypeError, ValidationError) as e:
+            raise ConfigurationError(f"Invalid scraper spec for {platform}: {str(e)}")
+        if not spec.enabled:
+            logger.info(f"Scraper spec for {platform} is disabled")
+            continue
+        
+        base_url = getattr(settings, spec.base_url_setting, None)
+        if not base_url:
+            raise ConfigurationError(f"Setting {spec.base_url_setting} for {platform} is not configured")
+        
+        specs[platform] = CompiledScraperSpec(platform, spec, base_url)
+    
+    return specs
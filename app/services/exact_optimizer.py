@@ -0,0 +1,375 @@
+import logging
+import math
+from decimal import Decimal
+from typing import List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.price_matrix import to_minor_units
+
+logger = logging.getLogger(__name__)
+
+# Subgradient steps tuning the Lagrangian multipliers of a search
+LAGRANGIAN_ITERATIONS = 30
+
+class DeliveryTerms:
+    """Delivery fee, free-delivery threshold and minimum order value of a platform, in minor units."""
+    
+    __slots__ = ("fee", "free_delivery_threshold", "min_order")
+    
+    def __init__(self, fee: int = 0, free_delivery_threshold: Optional[int] = None, min_order: int = 0):
+        self.fee = fee
+        self.free_delivery_threshold = free_delivery_threshold
+        self.min_order = min_order
+    
+    def fee_for(self, subtotal: int) -> int:
+        """Return the delivery fee charged for an order of the given subtotal."""
+        if self.free_delivery_threshold is not None and subtotal >= self.free_delivery_threshold:
+            return 0
+        return self.fee
+
+def get_delivery_terms(platform: str) -> DeliveryTerms:
+    """Return the delivery terms configured for a platform (PLATFORM_DELIVERY), in minor units."""
+    terms = settings.PLATFORM_DELIVERY.get(platform, {})
+    threshold = terms.get("free_delivery_threshold")
+    return DeliveryTerms(
+        fee=to_minor_units(Decimal(str(terms.get("fee", 0)))),
+        free_delivery_threshold=to_minor_units(Decimal(str(threshold))) if threshold is not None else None,
+        min_order=to_minor_units(Decimal(str(terms.get("min_order", 0))))
+    )
+
+class ExactBasketSolver:
+    """
+    Exact basket optimization with delivery fees, minimum orders and a platform limit.
+    
+    Amounts are integer minor units, so totals are compared exactly. Every
+    platform of a basket either reaches its free-delivery threshold or pays
+    its fee, and must reach its minimum order value. The solver enumerates
+    the platform subsets a basket may use (at most `max_platforms` of
+    them), each with the platforms that get free delivery. Putting each
+    item on its cheapest platform of the subset is a lower bound for such a
+    combination, and its answer when it meets the subtotal requirements;
+    the others are solved, in order of their bound and only while the bound
+    can beat the best basket found, by an iterative branch-and-bound over
+    the items. As the combinations grow as 3^platforms, the number of
+    platforms pricing the basket is capped.
+    """
+    
+    def __init__(self, platform_limit: int = 6):
+        """
+        Initialize the solver.
+        
+        Args:
+            platform_limit: Maximum number of platforms pricing a basket
+        """
+        self.platform_limit = platform_limit
+    
+    def solve(
+        self,
+        costs: np.ndarray,
+        available: np.ndarray,
+        terms: List[DeliveryTerms],
+        max_platforms: Optional[int] = None
+    ) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Find the cheapest feasible basket.
+        
+        Args:
+            costs: Integer array of shape (items, platforms) with the cost of each
+                item (price times quantity) on each platform, in minor units
+            available: Boolean array of the same shape, where an item can be bought
+            terms: Delivery terms of each platform (column)
+            max_platforms: Maximum number of platforms in the basket (None for no limit)
+        
+        Returns:
+            Tuple of (platform index per item, total cost including delivery),
+            or None if no basket satisfies the constraints
+        
+        Raises:
+            ValueError: If more than `platform_limit` platforms price the basket
+        """
+        n_items = costs.shape[0]
+        if n_items == 0:
+            return np.zeros(0, dtype=np.int64), 0
+        if not available.any(axis=1).all():
+            return None
+        
+        # Platforms pricing none of the items never take part
+        columns = np.flatnonzero(available.any(axis=0))
+        if len(columns) > self.platform_limit:
+            raise ValueError(
+                f"The exact optimizer supports at most {self.platform_limit} platforms per basket, got {len(columns)}"
+            )
+        costs = np.asarray(costs, dtype=np.int64)[:, columns]
+        available = available[:, columns]
+        terms = [terms[column] for column in columns.tolist()]
+        n_platforms = len(columns)
+        
+        fees = np.array([t.fee for t in terms], dtype=np.int64)
+        min_order = np.array([t.min_order for t in terms], dtype=np.int64)
+        # Requirement of a platform with free delivery; only platforms with a
+        # fee to waive have a free-delivery mode
+        free_requirement = np.array([
+            max(t.free_delivery_threshold, t.min_order) if t.free_delivery_threshold is not None else 0
+            for t in terms
+        ], dtype=np.int64)
+        has_free_mode = (fees > 0) & np.array([t.free_delivery_threshold is not None for t in terms])
+        
+        # Platform subsets covering every item, as boolean masks of shape (subsets, platforms)
+        subset_ids = np.arange(1, 1 << n_platforms)
+        masks = ((subset_ids[:, None] >> np.arange(n_platforms)) & 1).astype(bool)
+        if max_platforms is not None:
+            keep = masks.sum(axis=1) <= max_platforms
+            subset_ids, masks = subset_ids[keep], masks[keep]
+        keep = (available.astype(np.int64) @ masks.T.astype(np.int64) > 0).all(axis=0)
+        subset_ids, masks = subset_ids[keep], masks[keep]
+        if len(masks) == 0:
+            return None
+        
+        # Each item on its cheapest platform of the subset
+        unavailable_cost = np.iinfo(np.int64).max
+        greedy = np.where(masks[:, None, :] & available[None, :, :], costs[None, :, :], unavailable_cost).argmin(axis=2)
+        greedy_costs = costs[np.arange(n_items)[None, :], greedy]
+        greedy_totals = greedy_costs.sum(axis=1)
+        cells = (np.repeat(np.arange(len(masks)), n_items), greedy.ravel())
+        greedy_subtotals = np.zeros((len(masks), n_platforms), dtype=np.int64)
+        np.add.at(greedy_subtotals, cells, greedy_costs.ravel())
+        greedy_counts = np.zeros((len(masks), n_platforms), dtype=np.int64)
+        np.add.at(greedy_counts, cells, 1)
+        
+        # A platform that no item is cheapest on in the subset only adds cost:
+        # moving its items to their cheapest platform keeps every requirement met
+        keep = ((greedy_counts > 0) | ~masks).all(axis=1)
+        subset_ids, masks = subset_ids[keep], masks[keep]
+        greedy, greedy_totals, greedy_subtotals = greedy[keep], greedy_totals[keep], greedy_subtotals[keep]
+        
+        # Combinations of a subset and the platforms of it with free delivery
+        free_ids = np.arange(1 << n_platforms)
+        eligible = int((has_free_mode.astype(np.int64) << np.arange(n_platforms)).sum())
+        subset_index, free_ids = np.nonzero(
+            ((free_ids[None, :] & ~subset_ids[:, None]) == 0) & ((free_ids[None, :] & ~eligible) == 0)
+        )
+        free = ((free_ids[:, None] >> np.arange(n_platforms)) & 1).astype(bool)
+        used = masks[subset_index]
+        requirements = np.where(used, np.where(free, free_requirement, min_order), 0)
+        bounds = greedy_totals[subset_index] + np.where(used & ~free, fees, 0).sum(axis=1)
+        
+        # Requirements no assignment can meet rule a combination out
+        capacity = np.where(available, costs, 0).sum(axis=0)
+        possible = (requirements <= capacity).all(axis=1)
+        met = (greedy_subtotals[subset_index] >= requirements).all(axis=1)
+        
+        best: Optional[Tuple[np.ndarray, int]] = None
+        if (possible & met).any():
+            index = np.flatnonzero(possible & met)[bounds[possible & met].argmin()]
+            best = (greedy[subset_index[index]], int(bounds[index]))
+        
+        for index in np.flatnonzero(possible & ~met)[np.argsort(bounds[possible & ~met], kind="stable")].tolist():
+            fee_total = int(bounds[index] - greedy_totals[subset_index[index]])
+            if best is not None and bounds[index] >= best[1]:
+                break
+            platforms = np.flatnonzero(used[index])
+            result = _search_assignment(
+                costs[:, platforms],
+                available[:, platforms],
+                requirements[index][platforms],
+                (best[1] if best is not None else unavailable_cost) - fee_total
+            )
+            if result is not None:
+                best = (platforms[result[0]], result[1] + fee_total)
+        
+        if best is None:
+            return None
+        return columns[best[0]], best[1]
+
+def _search_assignment(
+    costs: np.ndarray,
+    available: np.ndarray,
+    requirements: np.ndarray,
+    limit: int
+) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Find the cheapest assignment of items to platforms meeting a minimum subtotal on each.
+    
+    An iterative depth-first branch-and-bound: items are decided one at a
+    time, and a branch is cut once a lower bound on its cost reaches
+    `limit` or the best assignment found. Two bounds are combined: the
+    Lagrangian relaxation of the requirements (see _multipliers()), and
+    the undecided items at their cheapest platform plus, for each platform
+    short of its requirement, the cheapest fractional selection of
+    undecided items covering the shortfall. Platforms are tried in order
+    of their Lagrangian cost, so the first assignments reached are close
+    to the relaxation's.
+    
+    Args:
+        costs: Cost of each item on each platform, in minor units
+        available: Where an item can be bought
+        requirements: Minimum subtotal of each platform
+        limit: Cost the assignment must beat
+    
+    Returns:
+        Tuple of (platform index per item, item cost), or None if no
+        assignment meeting the requirements beats the limit
+    """
+    n_items, n_platforms = costs.shape
+    masked = np.where(available, costs, np.iinfo(np.int64).max)
+    assignment = masked.argmin(axis=1)
+    cheapest = masked.min(axis=1)
+    
+    multipliers, incumbent = _multipliers(costs, available, requirements, limit)
+    best_cost = limit
+    best_assignment: Optional[np.ndarray] = None
+    if incumbent is not None and incumbent[1] < best_cost:
+        best_assignment, best_cost = incumbent
+    
+    # Items with a single platform are decided up front; the others are
+    # branched on, most expensive first, their platforms by Lagrangian cost
+    branched = np.flatnonzero(available.sum(axis=1) > 1)
+    fixed = np.ones(n_items, dtype=bool)
+    fixed[branched] = False
+    subtotals = np.bincount(assignment[fixed], weights=cheapest[fixed], minlength=n_platforms).astype(np.int64).tolist()
+    cost = int(cheapest[fixed].sum())
+    branched = branched[np.argsort(-cheapest[branched], kind="stable")].tolist()
+    
+    options = []
+    for item in branched:
+        item_options = [(int(costs[item, p]), p) for p in np.flatnonzero(available[item]).tolist()]
+        item_options.sort(key=lambda option: option[0] * (1.0 - multipliers[option[1]]))
+        options.append(item_options)
+    
+    depth_count = len(branched)
+    suffix_cheapest = [0] * (depth_count + 1)
+    suffix_reduced = [0.0] * (depth_count + 1)
+    for depth in range(depth_count - 1, -1, -1):
+        suffix_cheapest[depth] = suffix_cheapest[depth + 1] + min(item_cost for item_cost, _ in options[depth])
+        suffix_reduced[depth] = suffix_reduced[depth + 1] + min(
+            item_cost * (1.0 - multipliers[platform]) for item_cost, platform in options[depth]
+        )
+    
+    # Per platform, the branched items by extra cost per unit of subtotal:
+    # (extra cost * 2^32 // cost for sorting, depth, cost, extra cost)
+    cover_order = [[] for _ in range(n_platforms)]
+    for depth, item_options in enumerate(options):
+        low = min(item_cost for item_cost, _ in item_options)
+        for item_cost, platform in item_options:
+            if item_cost > 0:
+                cover_order[platform].append(((item_cost - low) * (1 << 32) // item_cost, depth, item_cost, item_cost - low))
+    for entries in cover_order:
+        entries.sort()
+    requirements = [int(r) for r in requirements.tolist()]
+    priced = [p for p in range(n_platforms) if requirements[p] > 0 and multipliers[p] > 0]
+    
+    def bound(depth: int) -> Optional[int]:
+        """Lower bound on the item cost of completing the assignment from a depth, None if it cannot meet the requirements."""
+        relaxed = cost + suffix_reduced[depth]
+        for platform in priced:
+            relaxed += multipliers[platform] * (requirements[platform] - subtotals[platform])
+        total = cost + suffix_cheapest[depth]
+        for platform in range(n_platforms):
+            shortfall = requirements[platform] - subtotals[platform]
+            if shortfall <= 0:
+                continue
+            for _, entry_depth, item_cost, extra in cover_order[platform]:
+                if entry_depth < depth:
+                    continue
+                if item_cost >= shortfall:
+                    total += extra * shortfall // item_cost
+                    shortfall = 0
+                    break
+                total += extra
+                shortfall -= item_cost
+            if shortfall > 0:
+                return None
+        # Costs are whole minor units, so a fractional bound rounds up
+        return max(total, math.ceil(relaxed - 1e-6))
+    
+    root = bound(0)
+    if root is None or root >= best_cost:
+        return (best_assignment, best_cost) if best_assignment is not None else None
+    
+    # choice[depth] is the option taken at each depth, -1 before the first;
+    # a depth's option is added to the subtotals while it is taken
+    best_choice: Optional[List[int]] = None
+    choice = [-1] * depth_count
+    depth = 0
+    while 0 <= depth < depth_count:
+        item_options = options[depth]
+        if choice[depth] >= 0:
+            item_cost, platform = item_options[choice[depth]]
+            subtotals[platform] -= item_cost
+            cost -= item_cost
+        choice[depth] += 1
+        if choice[depth] == len(item_options):
+            choice[depth] = -1
+            depth -= 1
+            continue
+        
+        item_cost, platform = item_options[choice[depth]]
+        subtotals[platform] += item_cost
+        cost += item_cost
+        
+        lower = bound(depth + 1)
+        if lower is None or lower >= best_cost:
+            continue
+        if depth + 1 == depth_count:
+            best_cost, best_choice = cost, list(choice)
+            continue
+        depth += 1
+    
+    if best_choice is None:
+        return (best_assignment, best_cost) if best_assignment is not None else None
+    for depth, item in enumerate(branched):
+        assignment[item] = options[depth][best_choice[depth]][1]
+    return assignment, best_cost
+
+def _multipliers(
+    costs: np.ndarray,
+    available: np.ndarray,
+    requirements: np.ndarray,
+    limit: int
+) -> Tuple[List[float], Optional[Tuple[np.ndarray, int]]]:
+    """
+    Tune the Lagrangian multipliers of the subtotal requirements by subgradient steps.
+    
+    With each platform's requirement priced at a multiplier lambda in [0, 1],
+    items are chosen independently by cost * (1 - lambda), and
+    sum(min cost * (1 - lambda)) + sum(lambda * requirement) is a lower bound
+    on any assignment meeting the requirements. Choices met along the way
+    that meet the requirements are candidate assignments.
+    
+    Returns:
+        Tuple of (multiplier per platform, the cheapest assignment seen that
+        meets the requirements as (platform index per item, item cost), or None)
+    """
+    n_items, n_platforms = costs.shape
+    rows = np.arange(n_items)
+    costs = np.where(available, costs, np.iinfo(np.int64).max).astype(np.float64)
+    float_requirements = requirements.astype(np.float64)
+    multipliers = np.zeros(n_platforms)
+    best_multipliers, best_bound = multipliers, -np.inf
+    incumbent: Optional[Tuple[np.ndarray, int]] = None
+    scale = 2.0
+    
+    for _ in range(LAGRANGIAN_ITERATIONS):
+        choice = (costs * (1.0 - multipliers)).argmin(axis=1)
+        chosen = costs[rows, choice]
+        subtotals = np.bincount(choice, weights=chosen, minlength=n_platforms)
+        bound = (chosen * (1.0 - multipliers[choice])).sum() + multipliers @ float_requirements
+        if bound > best_bound:
+            best_multipliers, best_bound = multipliers, bound
+        else:
+            scale /= 2
+        
+        if (subtotals >= float_requirements).all():
+            total = int(chosen.sum())
+            if total < limit and (incumbent is None or total < incumbent[1]):
+                incumbent = (choice, total)
+        
+        # Subgradient: how far each subtotal falls short of its requirement
+        gradient = float_requirements - subtotals
+        norm = float(gradient @ gradient)
+        target = incumbent[1] if incumbent is not None else min(float(limit), bound * 1.05 + 1)
+        if norm == 0 or bound >= target - 1 or scale < 0.01:
+            break
+        multipliers = np.clip(multipliers + scale * (target - bound) / norm * gradient, 0.0, 1.0)
+    
+    return best_multipliers.tolist(), incumbent
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import MappingError
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the compiled database read through a memory map
+MMAP_SIZE = 256 * 1024 * 1024
+
+class ProductMappings(Mapping):
+    """
+    Read-only view of one compiled version of the product mappings.
+    
+    Behaves like the dictionary loaded from JSON (generic name -> platform
+    -> details), but reads entries from the compiled database on demand
+    instead of holding them all as Python objects. The database file is
+    never modified in place, so it is opened immutable and memory-mapped:
+    its pages live in the OS page cache, shared by every worker on the host.
+    Each thread reads through its own connection.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a compiled mappings database.
+        
+        Args:
+            path: Path of the database built by MappingStore.compile()
+        
+        Raises:
+            sqlite3.Error: If the file is not a readable mappings database
+        """
+        self.path = path
+        self._local = threading.local()
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.source_signature = meta.get("source_signature")
+        self.version = meta.get("built_at", "unknown")
+        self._len = self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of the calling thread, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+    
+    def __getitem__(self, generic_name: str) -> Dict[str, Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT platforms FROM products WHERE generic_name = ?", (generic_name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(generic_name)
+        return json.loads(row[0])
+    
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self.conn.execute("SELECT generic_name FROM products"))
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Dict[str, Any]]]]:
+        """Iterate over all entries in a single scan."""
+        return (
+            (generic_name, json.loads(platforms))
+            for generic_name, platforms in self.conn.execute("SELECT generic_name, platforms FROM products")
+        )
+
+class MappingStore:
+    """
+    Product mappings compiled from the JSON file into an SQLite database.
+    
+    The JSON file stays the source of truth. When it changes (by
+    modification time and size), it is compiled into a temporary database
+    that atomically replaces the previous one, and every worker switches
+    to the new version on its next check. Requests already holding the
+    previous version keep reading it until they finish. Checks are
+    throttled to one every `check_interval` seconds per process.
+    """
+    
+    def __init__(self, source_path: str, db_path: str, check_interval: float = 5.0):
+        """
+        Initialize the mapping store.
+        
+        Args:
+            source_path: Path of the product mappings JSON file
+            db_path: Path of the compiled database (created if missing)
+            check_interval: Seconds between checks for a changed source or database
+        """
+        self.source_path = source_path
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.reloads = 0
+        
+        self._current: Optional[ProductMappings] = None
+        self._db_stat: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+    
+    def current(self) -> ProductMappings:
+        """
+        Return the current version of the mappings, reloading it if the source changed.
+        
+        Raises:
+            MappingError: If no version of the mappings could be loaded
+        """
+        if self._current is None or time.monotonic() - self._checked >= self.check_interval:
+            with self._lock:
+                if self._current is None or time.monotonic() - self._checked >= self.check_interval:
+                    self._refresh()
+                    self._checked = time.monotonic()
+        return self._current
+    
+    def _refresh(self) -> None:
+        try:
+            # Pick up a database compiled by another worker
+            unreadable = False
+            if self._stat_db() != self._db_stat and os.path.exists(self.db_path):
+                try:
+                    self._swap()
+                except sqlite3.Error as e:
+                    # An older schema, a truncated or a foreign file: rebuild it from the source
+                    logger.warning(f"Compiled product mappings at {self.db_path} are unreadable, recompiling: {str(e)}")
+                    unreadable = True
+            
+            try:
+                source = os.stat(self.source_path)
+            except FileNotFoundError:
+                if self._current is None:
+                    raise
+                return
+            
+            signature = f"{source.st_mtime_ns}:{source.st_size}"
+            if unreadable or self._current is None or self._current.source_signature != signature:
+                self.compile(signature)
+                self._swap()
+        except (OSError, ValueError, sqlite3.Error) as e:
+            if self._current is None:
+                raise MappingError(f"Error loading product mappings: {str(e)}")
+            logger.error(f"Error reloading product mappings, keeping version {self._current.version}: {str(e)}")
+    
+    def _stat_db(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _swap(self) -> None:
+        db_stat = self._stat_db()
+        mappings = ProductMappings(self.db_path)
+        self._current, self._db_stat = mappings, db_stat
+        self.reloads += 1
+        logger.info(f"Loaded product mappings version {mappings.version} with {len(mappings)} products")
+    
+    def compile(self, signature: str) -> None:
+        """
+        Compile the JSON source into a new database and atomically replace the current one.
+        
+        Args:
+            signature: Modification time and size of the source, stored to detect later changes
+        """
+        with open(self.source_path, "r") as f:
+            mappings = json.load(f)
+        if not isinstance(mappings, dict) or not all(isinstance(platforms, dict) for platforms in mappings.values()):
+            raise ValueError("product mappings must map generic names to platform details")
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        temp_path = f"{self.db_path}.{os.getpid()}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        
+        conn = sqlite3.connect(temp_path)
+        try:
+            conn.execute("CREATE TABLE products (generic_name TEXT PRIMARY KEY, platforms TEXT NOT NULL) WITHOUT ROWID")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+            conn.executemany(
+                "INSERT INTO products (generic_name, platforms) VALUES (?, ?)",
+                ((generic_name, json.dumps(platforms, separators=(",", ":"))) for generic_name, platforms in mappings.items())
+            )
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [("source_signature", signature), ("built_at", time.strftime("%Y%m%dT%H%M%S"))]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        
+        os.replace(temp_path, self.db_path)
+        logger.info(f"Compiled {len(mappings)} product mappings from {self.source_path} into {self.db_path}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the loaded version and reload count."""
+        return {
+            "version": self._current.version if self._current is not None else None,
+            "products": len(self._current) if self._current is not None else 0,
+            "reloads": self.reloads,
+        }
+
+# One store per process; workers share the compiled database file
+_mapping_store = MappingStore(
+    settings.PRODUCT_MAPPINGS_PATH,
+    settings.PRODUCT_MAPPINGS_DB_PATH,
+    check_interval=settings.PRODUCT_MAPPINGS_CHECK_INTERVAL
+)
+
+def get_mapping_store() -> MappingStore:
+    """Return the process-wide product mapping store."""
+    return _mapping_store
+
+def get_product_mappings() -> ProductMappings:
+    """Return the current product mappings, reloaded when the JSON file changes."""
+    return _mapping_store.current()
@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import logging
+import time
+from itertools import islice
+from typing import Dict, Any, Iterable, List, Optional
+from app.core.config import settings
+from app.services.mapping_store import get_product_mappings
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.registry import ScraperRegistry
+from app.utils.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+class PopularityTracker:
+    """
+    Exponentially decayed request counts per generic product.
+    
+    Instead of decaying every score over time, each new request is weighted
+    up by 2^(elapsed / half_life); scores are renormalized once the weights
+    grow large. A request made one half-life ago counts half as much as
+    one made now.
+    """
+    
+    # Renormalize scores once request weights exceed this factor
+    _RENORMALIZE_AT = 2.0 ** 20
+    
+    def __init__(self, half_life: float = 3600.0, max_products: int = 10000):
+        """
+        Initialize the tracker.
+        
+        Args:
+            half_life: Seconds after which a request counts half
+            max_products: Number of products tracked; the least popular are dropped beyond it
+        """
+        self.half_life = half_life
+        self.max_products = max_products
+        self.scores: Dict[str, float] = {}
+        self._epoch = time.monotonic()
+    
+    def _weight(self) -> float:
+        weight = 2.0 ** ((time.monotonic() - self._epoch) / self.half_life)
+        if weight >= self._RENORMALIZE_AT:
+            self.scores = {name: score / weight for name, score in self.scores.items()}
+            self._epoch = time.monotonic()
+            weight = 1.0
+        return weight
+    
+    def record(self, generic_names: Iterable[str]) -> None:
+        """Record one request for each of the given generic product names."""
+        weight = self._weight()
+        for name in generic_names:
+            self.scores[name] = self.scores.get(name, 0.0) + weight
+        
+        # Trim in bulk so the tracker does not sort on every request
+        if len(self.scores) > self.max_products * 1.1:
+            self.scores = dict(heapq.nlargest(self.max_products, self.scores.items(), key=lambda item: item[1]))
+    
+    def top(self, n: int) -> List[str]:
+        """Return the n most popular generic product names, most popular first."""
+        return [name for name, _ in heapq.nlargest(n, self.scores.items(), key=lambda item: item[1])]
+
+class PrewarmScheduler:
+    """
+    Background task refreshing popular products before their prices go stale.
+    
+    Every `interval` seconds, the top-N products by request popularity are
+    looked up on every platform, and snapshots that are missing or turn
+    stale before the next cycle (plus `lead_time`) are re-scraped. Each
+    platform spends at most `rate_share` of its rate limit on pre-warming,
+    and is skipped while its circuit is open or its limiter is saturated,
+    so user requests keep priority.
+    """
+    
+    def __init__(
+        self,
+        registry: ScraperRegistry,
+        tracker: PopularityTracker,
+        top_n: int = 50,
+        interval: float = 10.0,
+        lead_time: float = 5.0,
+        rate_share: float = 0.2
+    ):
+        self.registry = registry
+        self.tracker = tracker
+        self.top_n = top_n
+        self.interval = interval
+        self.lead_time = lead_time
+        self.rate_share = rate_share
+        self.cycles = 0
+        self.refreshed = 0
+        self.deferred = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Start the pre-warming loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Price pre-warming started for the top {self.top_n} products every {self.interval}s")
+    
+    async def stop(self) -> None:
+        """Stop the pre-warming loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Price pre-warming cycle failed")
+    
+    async def run_once(self) -> int:
+        """
+        Run a single pre-warming cycle.
+        
+        Returns:
+            Number of products refreshed
+        """
+        popular = self.tracker.top(self.top_n)
+        if not popular:
+            return 0
+        
+        # Loading the mappings may recompile them, which must not block the event loop
+        mappings = await asyncio.to_thread(get_product_mappings)
+        horizon = self.interval + self.lead_time
+        
+        # platform -> {product_id: product_name}, most popular first
+        due: Dict[str, Dict[str, str]] = {}
+        for generic_name in popular:
+            for platform, details in mappings.get(generic_name, {}).items():
+                scraper = self.registry.scrapers.get(platform)
+                if scraper is None:
+                    continue
+                
+                stale_in = scraper.snapshot_stale_in(details["product_id"])
+                if stale_in is None or stale_in <= horizon:
+                    due.setdefault(platform, {})[details["product_id"]] = details["product_name"]
+        
+        refreshed = await asyncio.gather(*(
+            self._refresh_platform(self.registry.scrapers[platform], products)
+            for platform, products in due.items()
+        ))
+        
+        self.cycles += 1
+        self.refreshed += sum(refreshed)
+        if due:
+            logger.debug(f"Pre-warmed {sum(refreshed)} products on {len(due)} platforms")
+        return sum(refreshed)
+    
+    def _budget(self, scraper: BaseScraper) -> int:
+        """Return the number of upstream requests a platform may spend per cycle."""
+        return max(1, int(scraper.rate_limiter.bucket.rate * self.rate_share * self.interval))
+    
+    async def _refresh_platform(self, scraper: BaseScraper, products: Dict[str, str]) -> int:
+        """Refresh the most popular due products of a platform within its budget."""
+        if scraper.circuit_breaker.state != CircuitBreaker.CLOSED or not scraper.rate_limiter.has_capacity():
+            self.deferred += len(products)
+            return 0
+        
+        limit = self._budget(scraper) * max(1, scraper.batch_size)
+        selected = dict(islice(products.items(), limit))
+        self.deferred += len(products) - len(selected)
+        return await scraper.refresh_many(selected)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return pre-warming counters."""
+        return {
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "deferred": self.deferred,
+            "tracked_products": len(self.tracker.scores),
+        }
+
+# Request popularity is tracked per process, for the lifetime of the process
+_popularity_tracker = PopularityTracker(half_life=settings.PREWARM_HALF_LIFE)
+_scheduler: Optional[PrewarmScheduler] = None
+
+def get_popularity_tracker() -> PopularityTracker:
+    """Return the process-wide product popularity tracker."""
+    return _popularity_tracker
+
+def start_prewarm_scheduler(registry: ScraperRegistry) -> Optional[PrewarmScheduler]:
+    """Start the process-wide pre-warming scheduler, if enabled."""
+    global _scheduler
+    if settings.PREWARM_ENABLED and _scheduler is None:
+        _scheduler = PrewarmScheduler(
+            registry,
+            _popularity_tracker,
+            top_n=settings.PREWARM_TOP_N,
+            interval=settings.PREWARM_INTERVAL,
+            lead_time=settings.PREWARM_LEAD_TIME,
+            rate_share=settings.PREWARM_RATE_SHARE
+        )
+        _scheduler.start()
+    return _scheduler
+
+async def stop_prewarm_scheduler() -> None:
+    """Stop the process-wide pre-warming scheduler, if it was started."""
+    global _scheduler
+    if _scheduler is not None:
+        scheduler, _scheduler = _scheduler, None
+        await scheduler.stop()
+
+def get_prewarm_scheduler() -> Optional[PrewarmScheduler]:
+    """Return the process-wide pre-warming scheduler, or None if it is not running."""
+    return _scheduler
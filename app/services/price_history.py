@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+from app.services.price_matrix import to_minor_units
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+# (platform, product_id, scraped_at, price, discount, final_price, in_stock), prices in minor units
+Observation = Tuple[str, str, float, int, int, int, bool]
+
+class PriceHistoryStore:
+    """
+    Append-only price history in an SQLite database on local disk.
+    
+    Every observed price is kept in `price_history`, keyed by platform,
+    product and scrape time, so the same scrape recorded twice (by several
+    requests served from the cache, or by several workers) is stored once.
+    Per-day aggregates (lowest, highest, mean and last in-stock final
+    price) are maintained in `price_daily` as observations are written, so
+    trend and lowest-price queries read one row per day instead of
+    scanning raw history. Prices are stored in integer minor units.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) a price history database.
+        
+        Args:
+            path: Path of the database file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Writes happen in the recorder's worker thread; reads in the
+        # threads serving the endpoints, each thread on its own connection
+        self.writer = self._connect()
+        self.writer.execute(
+            "CREATE TABLE IF NOT EXISTS price_history ("
+            " platform TEXT NOT NULL,"
+            " product_id TEXT NOT NULL,"
+            " scraped_at REAL NOT NULL,"
+            " price INTEGER NOT NULL,"
+            " discount INTEGER NOT NULL,"
+            " final_price INTEGER NOT NULL,"
+            " in_stock INTEGER NOT NULL,"
+            " PRIMARY KEY (platform, product_id, scraped_at)) WITHOUT ROWID"
+        )
+        self.writer.execute(
+            "CREATE TABLE IF NOT EXISTS price_daily ("
+            " platform TEXT NOT NULL,"
+            " product_id TEXT NOT NULL,"
+            " day INTEGER NOT NULL,"
+            " min_price INTEGER NOT NULL,"
+            " max_price INTEGER NOT NULL,"
+            " total_price INTEGER NOT NULL,"
+            " samples INTEGER NOT NULL,"
+            " last_price INTEGER NOT NULL,"
+            " last_at REAL NOT NULL,"
+            " PRIMARY KEY (platform, product_id, day)) WITHOUT ROWID"
+        )
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+    
+    @property
+    def reader(self) -> sqlite3.Connection:
+        """Connection for reads, one per thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+    
+    def write(self, observations: List[Observation]) -> int:
+        """
+        Append observations and update the daily aggregates (blocking).
+        
+        Args:
+            observations: Observations to append
+        
+        Returns:
+            Number of observations not already stored
+        """
+        cursor = self.writer.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Aggregate only the observations actually inserted, in stock
+            daily: Dict[Tuple[str, str, int], List[Any]] = {}
+            inserted = 0
+            for observation in observations:
+                cursor.execute("INSERT OR IGNORE INTO price_history VALUES (?, ?, ?, ?, ?, ?, ?)", observation)
+                if cursor.rowcount != 1:
+                    continue
+                inserted += 1
+                
+                platform, product_id, scraped_at, _, _, final_price, in_stock = observation
+                if not in_stock:
+                    continue
+                key = (platform, product_id, int(scraped_at // SECONDS_PER_DAY))
+                day = daily.get(key)
+                if day is None:
+                    daily[key] = [final_price, final_price, final_price, 1, final_price, scraped_at]
+                else:
+                    day[0] = min(day[0], final_price)
+                    day[1] = max(day[1], final_price)
+                    day[2] += final_price
+                    day[3] += 1
+                    if scraped_at >= day[5]:
+                        day[4], day[5] = final_price, scraped_at
+            
+            cursor.executemany(
+                "INSERT INTO price_daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (platform, product_id, day) DO UPDATE SET"
+                " min_price = MIN(min_price, excluded.min_price),"
+                " max_price = MAX(max_price, excluded.max_price),"
+                " total_price = total_price + excluded.total_price,"
+                " samples = samples + excluded.samples,"
+                " last_price = CASE WHEN excluded.last_at >= last_at THEN excluded.last_price ELSE last_price END,"
+                " last_at = MAX(last_at, excluded.last_at)",
+                [(*key, *values) for key, values in daily.items()]
+            )
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return inserted
+    
+    def daily(self, platform: str, product_id: str, since_day: int) -> List[Tuple[int, int, int, int, int, int]]:
+        """
+        Return the daily aggregates of a product on a platform.
+        
+        Args:
+            platform: Platform name
+            product_id: Platform-specific product ID
+            since_day: First day (days since the epoch, UTC) to return
+        
+        Returns:
+            Rows of (day, min_price, max_price, total_price, samples, last_price), oldest first
+        """
+        return self.reader.execute(
+            "SELECT day, min_price, max_price, total_price, samples, last_price FROM price_daily"
+            " WHERE platform = ? AND product_id = ? AND day >= ? ORDER BY day",
+            (platform, product_id, since_day)
+        ).fetchall()
+    
+    def lowest(self, platform: str, product_id: str, since_day: int) -> Optional[Tuple[int, int]]:
+        """
+        Return the lowest in-stock final price of a product on a platform since a day.
+        
+        Returns:
+            Tuple of (lowest price, day it was seen on), or None if no price was recorded
+        """
+        return self.reader.execute(
+            "SELECT min_price, day FROM price_daily"
+            " WHERE platform = ? AND product_id = ? AND day >= ? ORDER BY min_price, day DESC LIMIT 1",
+            (platform, product_id, since_day)
+        ).fetchone()
+    
+    def latest(self, platform: str, product_id: str) -> Optional[Tuple[int, float, bool]]:
+        """
+        Return the most recent observation of a product on a platform.
+        
+        Returns:
+            Tuple of (final price, scraped_at, in_stock), or None if nothing was recorded
+        """
+        return self.reader.execute(
+            "SELECT final_price, scraped_at, in_stock FROM price_history"
+            " WHERE platform = ? AND product_id = ? ORDER BY scraped_at DESC LIMIT 1",
+            (platform, product_id)
+        ).fetchone()
+    
+    def close(self) -> None:
+        self.writer.close()
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+
+class PriceHistoryRecorder:
+    """
+    Buffers price observations and writes them to a PriceHistoryStore in batches.
+    
+    record() only appends to an in-memory buffer, so it is cheap to call
+    on the request path. A background task flushes the buffer every
+    `flush_interval` seconds, or as soon as it holds `batch_size`
+    observations, running the write in a worker thread. Beyond
+    `max_pending` buffered observations (a stalled disk), new ones are
+    dropped rather than growing memory without bound.
+    """
+    
+    def __init__(
+        self,
+        store: PriceHistoryStore,
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+        max_pending: int = 100000
+    ):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        
+        self._pending: List[Observation] = []
+        self._last_scraped_at: Dict[Tuple[str, str], float] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+    
+    def record(self, platform: str, result: Dict[str, Any]) -> None:
+        """
+        Record a combined scrape result (see ScraperManager).
+        
+        Results served from the cache repeat an observation already
+        recorded and are skipped.
+        """
+        scraped_at = result.get("scraped_at")
+        if scraped_at is None or "final_price" not in result:
+            return
+        
+        key = (platform, result["product_id"])
+        if self._last_scraped_at.get(key) == scraped_at:
+            return
+        self._last_scraped_at[key] = scraped_at
+        
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        
+        self._pending.append((
+            platform,
+            result["product_id"],
+            scraped_at,
+            to_minor_units(result["original_price"]),
+            to_minor_units(result["discount"]),
+            to_minor_units(result["final_price"]),
+            bool(result.get("in_stock", True))
+        ))
+        self.recorded += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+    
+    def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Price history recording to {self.store.path}")
+    
+    async def stop(self) -> None:
+        """Stop the flush loop and write what is still buffered."""
+        if self._task is not None:
+            # Let the loop finish its current write rather than cancelling the worker thread's caller
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+    
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Price history flush failed")
+    
+    async def flush(self) -> int:
+        """
+        Write the buffered observations.
+        
+        Returns:
+            Number of new observations stored
+        """
+        written = 0
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                stored = await asyncio.to_thread(self.store.write, batch)
+                # Removed only once written, so a failed write is retried by
+                # the next flush (observations already stored are ignored)
+                del self._pending[:len(batch)]
+                written += stored
+                self.written += stored
+        
+        # Dedup state only needs the latest scrape per product
+        if len(self._last_scraped_at) > self.max_pending:
+            self._last_scraped_at.clear()
+        return written
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return recording counters."""
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+        }
+
+def current_day() -> int:
+    """Return today's day number (days since the epoch, UTC)."""
+    return int(time.time() // SECONDS_PER_DAY)
+
+_recorder: Optional[PriceHistoryRecorder] = None
+
+def start_price_history() -> Optional[PriceHistoryRecorder]:
+    """Open the price history store and start recording, if enabled."""
+    global _recorder
+    if settings.PRICE_HISTORY_ENABLED and _recorder is None:
+        _recorder = PriceHistoryRecorder(
+            PriceHistoryStore(settings.PRICE_HISTORY_PATH),
+            flush_interval=settings.PRICE_HISTORY_FLUSH_INTERVAL,
+            batch_size=settings.PRICE_HISTORY_BATCH_SIZE,
+            max_pending=settings.PRICE_HISTORY_MAX_PENDING
+        )
+        _recorder.start()
+    return _recorder
+
+async def stop_price_history() -> None:
+    """Flush pending observations and close the price history store."""
+    global _recorder
+    if _recorder is not None:
+        recorder, _recorder = _recorder, None
+        await recorder.stop()
+        recorder.store.close()
+
+def get_price_history() -> Optional[PriceHistoryRecorder]:
+    """Return the process-wide price history recorder, or None if recording is disabled."""
+    return _recorder
@@ -0,0 +1,165 @@
+import numpy as np
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Any, Iterable, Optional
+from app.models.request import GroceryItem
+
+# Prices are held in integer minor units (cents)
+MINOR_UNITS = 100
+_MINOR_UNIT = Decimal(1) / MINOR_UNITS
+
+# Stands in for a missing price in argmin scans
+_MISSING = np.iinfo(np.int64).max
+
+def to_minor_units(amount: Decimal) -> int:
+    """
+    Convert an amount to integer minor units, rounding half units up.
+    
+    The amount is scaled in decimal arithmetic, so 1.005 becomes 101 units
+    rather than whatever its nearest binary float rounds to. Floats are
+    converted through their shortest decimal representation.
+    """
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * MINOR_UNITS).to_integral_value(rounding=ROUND_HALF_UP))
+
+def to_decimal(minor_units: int) -> Decimal:
+    """Convert integer minor units back to a Decimal amount."""
+    return Decimal(int(minor_units)) * _MINOR_UNIT
+
+class PriceMatrix:
+    """
+    Dense items x platforms view of scraped prices.
+    
+    Original and final prices are int64 minor units per unit of the item,
+    with an `available` mask for the cells no price arrived for, and stock
+    as a boolean matrix. Cells are filled one at a time as scrape results
+    arrive, so the optimizer gets arrays instead of scanning nested dicts;
+    amounts become Decimals again only when a basket is built for the
+    response.
+    """
+    
+    def __init__(self, items: Iterable[str], platforms: Iterable[str], quantities: Optional[Dict[str, int]] = None):
+        """
+        Initialize an empty matrix.
+        
+        Args:
+            items: Generic names of the rows
+            platforms: Platform names of the columns
+            quantities: Requested quantity per generic name (1 if missing)
+        """
+        self.items = list(dict.fromkeys(items))
+        self.platforms = list(dict.fromkeys(platforms))
+        self.rows = {generic_name: i for i, generic_name in enumerate(self.items)}
+        self.columns = {platform: j for j, platform in enumerate(self.platforms)}
+        
+        quantities = quantities or {}
+        self.quantities = np.array([quantities.get(generic_name, 1) for generic_name in self.items], dtype=np.int64)
+        
+        shape = (len(self.items), len(self.platforms))
+        self.original = np.zeros(shape, dtype=np.int64)
+        self.final = np.zeros(shape, dtype=np.int64)
+        self.in_stock = np.zeros(shape, dtype=bool)
+        self.available = np.zeros(shape, dtype=bool)
+        self.records = np.empty(shape, dtype=object)  # scrape result behind each cell
+    
+    @classmethod
+    def for_items(cls, items: List[GroceryItem], platforms: Iterable[str]) -> "PriceMatrix":
+        """Create an empty matrix for the items of a request."""
+        return cls((item.name for item in items), platforms, {item.name: item.quantity for item in items})
+    
+    @classmethod
+    def from_price_data(
+        cls,
+        price_data: Dict[str, Dict[str, Dict[str, Any]]],
+        quantities: Optional[Dict[str, int]] = None
+    ) -> "PriceMatrix":
+        """
+        Build a matrix from scraped results collected in nested dictionaries.
+        
+        Args:
+            price_data: Dictionary mapping generic names to platform-specific price data
+            quantities: Requested quantity per generic name (1 if missing)
+        
+        Returns:
+            Price matrix with one row per generic name and one column per platform seen
+        """
+        platforms = (platform for data in price_data.values() for platform in data)
+        matrix = cls(price_data, platforms, quantities)
+        for generic_name, data in price_data.items():
+            for platform, result in data.items():
+                matrix.add(generic_name, platform, result)
+        return matrix
+    
+    def add(self, generic_name: str, platform: str, result: Dict[str, Any]) -> None:
+        """Fill the cell of an item and platform from a combined scrape result (see ScraperManager)."""
+        if "final_price" not in result:
+            return
+        
+        cell = self.rows[generic_name], self.columns[platform]
+        self.final[cell] = to_minor_units(result["final_price"])
+        self.original[cell] = to_minor_units(result.get("original_price", result["final_price"]))
+        self.in_stock[cell] = result.get("in_stock", True)
+        self.available[cell] = True
+        self.records[cell] = result
+    
+    def select(self, items: List[GroceryItem]) -> "PriceMatrix":
+        """
+        Return a matrix with the rows of some items, at their requested quantities.
+        
+        Used to optimize many baskets against one shared matrix; items not in
+        this matrix get empty rows.
+        """
+        selected = PriceMatrix.for_items(items, self.platforms)
+        known = [i for i, generic_name in enumerate(selected.items) if generic_name in self.rows]
+        source = [self.rows[selected.items[i]] for i in known]
+        for name in ("original", "final", "in_stock", "available", "records"):
+            getattr(selected, name)[known] = getattr(self, name)[source]
+        return selected
+    
+    def priced_items(self) -> np.ndarray:
+        """Return a mask of the items priced on at least one platform."""
+        return self.available.any(axis=1)
+    
+    def cheapest(self) -> np.ndarray:
+        """Return the column of the lowest final price per item (-1 for items without a price)."""
+        choice = np.where(self.available, self.final, _MISSING).argmin(axis=1)
+        return np.where(self.priced_items(), choice, -1)
+    
+    def line_costs(self) -> np.ndarray:
+        """Return final price times quantity in minor units (0 where unavailable)."""
+        return np.where(self.available, self.final * self.quantities[:, None], 0)
+    
+    def basket(self, choice: np.ndarray) -> Dict[str, Any]:
+        """
+        Compute the totals of a selection of one platform per item.
+        
+        Args:
+            choice: Column per item (-1 to leave the item out)
+        
+        Returns:
+            Dictionary with the selected rows and columns and their line
+            totals, the basket totals and the subtotal per platform, all in
+            minor units
+        """
+        rows = np.flatnonzero(choice >= 0)
+        columns = choice[rows]
+        quantities = self.quantities[rows]
+        line_original = self.original[rows, columns] * quantities
+        line_final = self.final[rows, columns] * quantities
+        
+        subtotals = np.zeros(len(self.platforms), dtype=np.int64)
+        np.add.at(subtotals, columns, line_final)
+        
+        return {
+            "rows": rows,
+            "columns": columns,
+            "line_original": line_original,
+            "line_final": line_final,
+            "total_original": int(line_original.sum()),
+            "total_final": int(line_final.sum()),
+            "subtotals": subtotals,
+        }
+    
+    def record(self, row: int, column: int) -> Dict[str, Any]:
+        """Return the scrape result behind a filled cell."""
+        return self.records[row, column]
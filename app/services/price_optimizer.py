@@ -1,8 +1,13 @@
 import logging
+import time
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from app.models.request import GroceryItem
+from app.core.config import settings
 from app.core.exceptions import OptimizationError
+from app.services.exact_optimizer import ExactBasketSolver, get_delivery_terms
+from app.services.price_matrix import PriceMatrix, to_decimal
+from app.utils.metrics import OPTIMIZER_LATENCY
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
@@ -13,86 +18,133 @@ class PriceOptimizerService:
     create the most cost-effective basket.
     """
     
+    def __init__(self):
+        self.solver = ExactBasketSolver(settings.EXACT_OPTIMIZER_MAX_PLATFORMS)
+    
     def optimize_basket(
         self, 
-        price_data: Dict[str, Dict[str, Dict[str, Any]]], 
-        requested_items: List[GroceryItem]
+        matrix: PriceMatrix, 
+        requested_items: List[GroceryItem],
+        method: str = "greedy",
+        max_platforms: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Optimize the selection of items across platforms for the lowest total cost.
         
-        This uses a greedy approach, selecting the lowest-priced item from each category.
-        For more complex scenarios (e.g., bundle discounts), this could be enhanced with
-        more sophisticated optimization algorithms.
+        The greedy method (the fast path) selects the lowest-priced platform for
+        each item; delivery fees of the platforms it ends up using are added
+        but do not influence the choice, and minimum orders are not checked.
+        The exact method minimizes item prices plus delivery fees, honoring
+        free-delivery thresholds, minimum order values and max_platforms
+        (see ExactBasketSolver). A platform limit always uses the exact method.
+        Both run on the integer minor-unit prices of the matrix; amounts become
+        Decimals again only in the returned basket.
         
         Args:
-            price_data: Nested dictionary with price and discount data for all products
+            matrix: Price matrix filled with the scraped results (see PriceMatrix.add())
             requested_items: Original list of grocery items from the request
-            
+            method: "greedy" or "exact"
+            max_platforms: Maximum number of platforms to order from (None for no limit)
+        
         Returns:
             Dictionary containing the optimized basket details
         """
+        start_time = time.perf_counter()
         try:
-            # Create a quantity map for the requested items
-            quantity_map = {item.name: item.quantity for item in requested_items}
-            unit_map = {item.name: item.unit for item in requested_items}
-            
-            # Initialize the optimized basket
-            optimized_items = []
-            total_original_price = Decimal('0.0')
-            total_final_price = Decimal('0.0')
+            for row in np.flatnonzero(~matrix.priced_items()).tolist():
+                logger.warning(f"No price data available for {matrix.items[row]}")
             
-            # Process each requested item
-            for generic_name, platforms in price_data.items():
-                if not platforms:
-                    logger.warning(f"No price data available for {generic_name}")
-                    continue
-                
-                # Find the platform with the lowest final price for this item
-                best_platform = None
-                best_price_data = None
-                lowest_price = Decimal('Infinity')
-                
-                for platform, data in platforms.items():
-                    if "final_price" in data and data["final_price"] < lowest_price:
-                        lowest_price = data["final_price"]
-                        best_platform = platform
-                        best_price_data = data
-                
-                if best_platform and best_price_data:
-                    # Calculate total price based on quantity
-                    quantity = quantity_map.get(generic_name, 1)
-                    item_original_price = best_price_data["original_price"] * quantity
-                    item_final_price = best_price_data["final_price"] * quantity
-                    item_discount = best_price_data["discount"] * quantity
-                    
-                    # Add to running totals
-                    total_original_price += item_original_price
-                    total_final_price += item_final_price
-                    
-                    # Add the item to the optimized basket
-                    optimized_items.append({
-                        "name": generic_name,
-                        "platform": best_platform,
-                        "original_price": item_original_price,
-                        "discount": item_discount,
-                        "final_price": item_final_price,
-                        "quantity": quantity,
-                        "unit": unit_map.get(generic_name),
-                        "platform_specific_name": best_price_data.get("product_name"),
-                        "product_id": best_price_data.get("product_id"),
-                        "url": best_price_data.get("url")
-                    })
+            if method == "greedy" and max_platforms is None:
+                choice = matrix.cheapest()
+                optimal = True
+            elif method in ("greedy", "exact"):
+                choice = self._select_exact(matrix, max_platforms)
+                optimal = True
+                method = "exact"
+            else:
+                raise OptimizationError(f"Unknown optimization method: {method}")
             
-            # Calculate total savings
-            total_savings = total_original_price - total_final_price
-            
-            return {
-                "total_price": total_final_price,
-                "savings": total_savings,
-                "items": optimized_items
+            basket = {
+                **self._build_basket(matrix, choice, requested_items),
+                "optimizer": method,
+                "optimal": optimal
             }
-            
+            OPTIMIZER_LATENCY.labels(method, "ok").observe(time.perf_counter() - start_time)
+            return basket
+        
         except Exception as e:
+            OPTIMIZER_LATENCY.labels(method, "error").observe(time.perf_counter() - start_time)
             logger.exception("Error optimizing basket")
-            raise OptimizationError(f"Failed to optimize basket: {str(e)}")
\ No newline at end of file
+            raise OptimizationError(f"Failed to optimize basket: {str(e)}")
+    
+    def _select_exact(self, matrix: PriceMatrix, max_platforms: Optional[int]) -> np.ndarray:
+        """
+        Select platforms minimizing the total including delivery fees, under the order constraints.
+        
+        Returns:
+            Column per item, -1 for unpriced items
+        """
+        rows = np.flatnonzero(matrix.priced_items())
+        terms = [get_delivery_terms(platform) for platform in matrix.platforms]
+        result = self.solver.solve(matrix.line_costs()[rows], matrix.available[rows], terms, max_platforms)
+        if result is None:
+            raise OptimizationError("No basket satisfies the minimum order and platform constraints")
+        
+        assignment, _ = result
+        choice = np.full(len(matrix.items), -1, dtype=np.int64)
+        choice[rows] = assignment
+        return choice
+    
+    def _build_basket(
+        self,
+        matrix: PriceMatrix,
+        choice: np.ndarray,
+        requested_items: List[GroceryItem]
+    ) -> Dict[str, Any]:
+        """Build the basket for a selection of one platform per item, with totals and delivery fees."""
+        unit_map = {item.name: item.unit for item in requested_items}
+        basket = matrix.basket(choice)
+        
+        # Amounts turn back into Decimals only here, for the response
+        optimized_items = []
+        for row, column, line_original, line_final in zip(
+            basket["rows"].tolist(),
+            basket["columns"].tolist(),
+            basket["line_original"].tolist(),
+            basket["line_final"].tolist()
+        ):
+            generic_name = matrix.items[row]
+            best_price_data = matrix.record(row, column)
+            optimized_items.append({
+                "name": generic_name,
+                "platform": matrix.platforms[column],
+                "original_price": to_decimal(line_original),
+                "discount": to_decimal(line_original - line_final),
+                "final_price": to_decimal(line_final),
+                "quantity": int(matrix.quantities[row]),
+                "unit": unit_map.get(generic_name),
+                "platform_specific_name": best_price_data.get("product_name"),
+                "product_id": best_price_data.get("product_id"),
+                "url": best_price_data.get("url"),
+                "freshness": best_price_data.get("freshness", "fresh"),
+                "price_age_seconds": best_price_data.get("price_age_seconds"),
+                "from_cache": best_price_data.get("from_cache", False)
+            })
+        
+        delivery_fees = {
+            matrix.platforms[column]: to_decimal(
+                get_delivery_terms(matrix.platforms[column]).fee_for(int(basket["subtotals"][column]))
+            )
+            for column in np.unique(basket["columns"]).tolist()
+        }
+        delivery_fee = sum(delivery_fees.values(), Decimal('0.0'))
+        total_final_price = to_decimal(basket["total_final"])
+        
+        return {
+            "total_price": total_final_price,
+            "savings": to_decimal(basket["total_original"] - basket["total_final"]),
+            "items": optimized_items,
+            "delivery_fee": delivery_fee,
+            "delivery_fees": delivery_fees,
+            "total_cost": total_final_price + delivery_fee
+        }
@@ -0,0 +1,320 @@
+import math
+import re
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Units normalized to a base unit and the factor converting to it
+UNITS = {
+    "ml": ("ml", 1), "milliliter": ("ml", 1), "milliliters": ("ml", 1), "millilitre": ("ml", 1),
+    "l": ("ml", 1000), "ltr": ("ml", 1000), "liter": ("ml", 1000), "liters": ("ml", 1000),
+    "litre": ("ml", 1000), "litres": ("ml", 1000),
+    "g": ("g", 1), "gm": ("g", 1), "gms": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "kg": ("g", 1000), "kgs": ("g", 1000), "kilogram": ("g", 1000), "kilograms": ("g", 1000),
+    "pc": ("pc", 1), "pcs": ("pc", 1), "piece": ("pc", 1), "pieces": ("pc", 1),
+    "dozen": ("pc", 12),
+}
+
+STOPWORDS = {"a", "an", "and", "of", "the", "with", "for", "in"}
+
+# Weight of a token found only in a platform's product name, relative to the generic name
+ALIAS_WEIGHT = 0.7
+
+# Minimum trigram similarity for a misspelled token to match a known one
+FUZZY_MIN_SIMILARITY = 0.35
+
+# Tokens at least this long also match known tokens one edit away
+FUZZY_MIN_EDIT_LENGTH = 4
+
+# Posting lists up to this length always contribute match candidates
+COMMON_POSTING_MIN = 1024
+
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a product name into normalized tokens.
+    
+    Text is lowercased and split into words and numbers, stopwords and
+    units without an amount are dropped, and quantities are folded into
+    one token in a base unit, so "1L", "1 litre" and "1000 ml" all become
+    "1000ml". Words are folded to their singular ("eggs" -> "egg").
+    """
+    raw = _TOKEN_PATTERN.findall(text.lower())
+    tokens = []
+    i = 0
+    while i < len(raw):
+        token = raw[i]
+        if token[0].isdigit() and i + 1 < len(raw) and raw[i + 1] in UNITS:
+            unit, factor = UNITS[raw[i + 1]]
+            amount = float(token) * factor
+            tokens.append(f"{amount:g}{unit}")
+            i += 2
+            continue
+        if token[0].isdigit():
+            tokens.append(token)
+        elif token not in STOPWORDS and token not in UNITS:
+            tokens.append(singular(token))
+        i += 1
+    return tokens
+
+def singular(word: str) -> str:
+    """Fold a plural English word to its singular, by suffix ("tomatoes" -> "tomato", "berries" -> "berry")."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def is_quantity(token: str) -> bool:
+    """Return whether a token is an amount ("1000ml", "12") rather than a word."""
+    return token[0].isdigit()
+
+def _split_attached_units(text: str) -> str:
+    """Separate numbers from the units attached to them ("500g" -> "500 g")."""
+    return re.sub(r"(\d)([a-z])", r"\1 \2", text.lower())
+
+def _trigrams(token: str) -> set:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Return whether two strings are at most one insertion, deletion, substitution or transposition apart."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    prefix = 0
+    while prefix < len(a) and a[prefix] == b[prefix]:
+        prefix += 1
+    if len(a) < len(b):
+        return a[prefix:] == b[prefix + 1:]
+    # Same length: one substitution, or two adjacent characters swapped
+    if a[prefix + 1:] == b[prefix + 1:]:
+        return True
+    return (
+        prefix + 1 < len(a)
+        and a[prefix] == b[prefix + 1]
+        and a[prefix + 1] == b[prefix]
+        and a[prefix + 2:] == b[prefix + 2:]
+    )
+
+class ProductMatch:
+    """A mapping entry resolved from a free-text product name."""
+    
+    __slots__ = ("generic_name", "confidence")
+    
+    def __init__(self, generic_name: str, confidence: float):
+        self.generic_name = generic_name
+        self.confidence = confidence
+    
+    def __repr__(self) -> str:
+        return f"ProductMatch({self.generic_name!r}, {self.confidence:.2f})"
+
+class ProductIndex:
+    """
+    Search index resolving free-text product names to product mapping entries.
+    
+    Every entry is indexed by the tokens of its generic name and, at a lower
+    weight, of its platform-specific product names. Each token has a
+    posting list of (entry, weight) as numpy arrays, so scoring a query is
+    a handful of vectorized additions regardless of the catalog size;
+    tokens not in the vocabulary are matched to known ones through a
+    trigram index, which absorbs typos. Quantities ("1L", "500g") only
+    refine a match found by the words of the query, never make one.
+    
+    The confidence of a match is the idf-weighted share of the query's
+    tokens the entry contains, scaled down when the entry's generic name
+    has tokens the query lacks (so "milk" prefers "milk" over "almond
+    milk"). Recent resolutions are memoized in an LRU.
+    """
+    
+    def __init__(self, product_mappings: Dict[str, Dict[str, Any]], memo_size: int = 4096):
+        """
+        Build the index.
+        
+        Args:
+            product_mappings: Product mappings (generic name -> platform -> details)
+            memo_size: Number of recent resolutions memoized
+        """
+        self.names: List[str] = []
+        self.exact: Dict[str, int] = {}
+        self.memo_size = memo_size
+        self.memo: "OrderedDict[str, Optional[ProductMatch]]" = OrderedDict()
+        self.similar: Dict[str, Tuple[Optional[str], float]] = {}  # unknown token -> closest known token
+        self.hits = 0
+        self.misses = 0
+        
+        # token -> {entry: weight}, and the tokens of each generic name
+        token_entries: Dict[str, Dict[int, float]] = defaultdict(dict)
+        name_tokens: List[List[str]] = []
+        for entry, (generic_name, platforms) in enumerate(product_mappings.items()):
+            self.names.append(generic_name)
+            tokens = tokenize(_split_attached_units(generic_name))
+            self.exact.setdefault(" ".join(tokens), entry)
+            name_tokens.append(tokens)
+            for token in tokens:
+                token_entries[token][entry] = 1.0
+            for details in platforms.values():
+                for token in tokenize(_split_attached_units(details.get("product_name", ""))):
+                    token_entries[token].setdefault(entry, ALIAS_WEIGHT)
+        
+        n_entries = max(len(self.names), 1)
+        self.idf = {token: math.log(1 + n_entries / len(entries)) for token, entries in token_entries.items()}
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for token, entries in token_entries.items():
+            ids = np.fromiter(entries.keys(), dtype=np.int64, count=len(entries))
+            weights = np.fromiter(entries.values(), dtype=np.float64, count=len(entries))
+            self.postings[token] = (ids, weights * self.idf[token], weights == 1.0)
+        
+        # idf mass of each generic name, to penalize entries with unmatched name tokens
+        self.name_mass = np.array([sum(self.idf[token] for token in set(tokens)) for tokens in name_tokens])
+        self.name_mass[self.name_mass == 0] = 1.0
+        
+        self.trigram_tokens: Dict[str, List[str]] = defaultdict(list)
+        for token in self.postings:
+            if not is_quantity(token):
+                for gram in _trigrams(token):
+                    self.trigram_tokens[gram].append(token)
+    
+    def resolve(self, name: str, min_confidence: float = 0.0) -> Optional[ProductMatch]:
+        """
+        Resolve a free-text product name to the best matching entry.
+        
+        Args:
+            name: Product name as given by the user
+            min_confidence: Confidence below which no match is returned
+        
+        Returns:
+            The best match, or None if nothing matches well enough
+        """
+        key = " ".join(tokenize(_split_attached_units(name)))
+        if key in self.memo:
+            self.hits += 1
+            self.memo.move_to_end(key)
+            match = self.memo[key]
+        else:
+            self.misses += 1
+            match = self._search(key)
+            self.memo[key] = match
+            if len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        
+        if match is None or match.confidence < min_confidence:
+            return None
+        return match
+    
+    def _search(self, key: str) -> Optional[ProductMatch]:
+        if key in self.exact:
+            return ProductMatch(self.names[self.exact[key]], 1.0)
+        
+        postings = []
+        query_mass = 0.0
+        
+        for token in dict.fromkeys(key.split()):
+            match, similarity = (token, 1.0) if token in self.postings else self._similar_token(token)
+            if match is None:
+                # An unknown word still counts towards the query, at the highest
+                # idf; an unknown quantity ("2L" of a product sold in 1L) does not
+                if not is_quantity(token):
+                    query_mass += math.log(1 + len(self.names))
+                continue
+            
+            token_ids, token_weights, token_in_name = self.postings[match]
+            query_mass += self.idf[match]
+            postings.append((token_ids, token_weights * similarity, token_in_name, is_quantity(match)))
+        
+        # Quantities only add to the scores of entries a word matched, so
+        # "1L" alone does not resolve to whatever comes in litres
+        words = [posting for posting in postings if not posting[3]]
+        if not words:
+            return None
+        
+        # Candidates come from the selective tokens; tokens shared by a large
+        # part of the catalog ("fresh", ...) only add to their scores
+        common_size = max(COMMON_POSTING_MIN, len(self.names) // 32)
+        words.sort(key=lambda posting: len(posting[0]))
+        selective = [posting for posting in words if len(posting[0]) <= common_size] or words
+        candidates = np.unique(np.concatenate([posting[0] for posting in selective]))
+        
+        scores = np.zeros(len(candidates))
+        name_scores = np.zeros(len(candidates))
+        for token_ids, token_weights, token_in_name, _ in postings:
+            # Posting ids are sorted, so entries are located by binary search
+            positions = np.minimum(np.searchsorted(token_ids, candidates), len(token_ids) - 1)
+            found = token_ids[positions] == candidates
+            positions = positions[found]
+            scores[found] += token_weights[positions]
+            name_scores[found] += np.where(token_in_name[positions], token_weights[positions], 0.0)
+        
+        name_coverage = np.minimum(name_scores / self.name_mass[candidates], 1.0)
+        confidence = scores / query_mass * (0.75 + 0.25 * name_coverage)
+        best = int(confidence.argmax())
+        return ProductMatch(self.names[candidates[best]], float(confidence[best]))
+    
+    def _similar_token(self, token: str) -> Tuple[Optional[str], float]:
+        """
+        Find the known token most similar to an unknown one.
+        
+        Similarity is the trigram Jaccard similarity or, for a token one
+        edit away from a known one ("bred" -> "bread"), the share of
+        characters left unchanged, whichever is higher.
+        """
+        if len(token) < 3 or is_quantity(token):
+            return None, 0.0
+        if token in self.similar:
+            return self.similar[token]
+        
+        grams = _trigrams(token)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_tokens.get(gram, ()):
+                shared[candidate] += 1
+        
+        best, best_similarity = None, 0.0
+        for candidate, count in shared.items():
+            similarity = count / (len(grams) + len(candidate) - count)
+            if len(token) >= FUZZY_MIN_EDIT_LENGTH and _within_one_edit(token, candidate):
+                similarity = max(similarity, 1 - 1 / max(len(token), len(candidate)))
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        
+        if best_similarity < FUZZY_MIN_SIMILARITY:
+            best, best_similarity = None, 0.0
+        
+        if len(self.similar) >= self.memo_size:
+            self.similar.clear()
+        self.similar[token] = (best, best_similarity)
+        return best, best_similarity
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return index size and memo counters."""
+        return {
+            "entries": len(self.names),
+            "tokens": len(self.postings),
+            "memo_size": len(self.memo),
+            "memo_hits": self.hits,
+            "memo_misses": self.misses,
+        }
+
+# The index is rebuilt only when the mappings object changes; the lock
+# keeps requests in several threads from building it concurrently
+_cached_index: Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[ProductIndex]] = (None, None)
+_cached_index_lock = threading.Lock()
+
+def get_product_index(product_mappings: Dict[str, Dict[str, Any]], memo_size: int = 4096) -> ProductIndex:
+    """Return the search index of a product mappings object, building it on first use."""
+    global _cached_index
+    with _cached_index_lock:
+        mappings, index = _cached_index
+        if mappings is not product_mappings or index is None:
+            index = ProductIndex(product_mappings, memo_size)
+            _cached_index = (product_mappings, index)
+            logger.info(f"Built product search index with {len(index.names)} entries and {len(index.postings)} tokens")
+        return index
@@ -1,8 +1,11 @@
 import json
 import logging
-from typing import List, Dict, Any
-from app.core.config import get_product_mappings
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
 from app.models.request import GroceryItem
+from app.services.product_index import ProductIndex, ProductMatch, get_product_index
+from app.services.mapping_store import get_product_mappings
+from app.services.prewarm import PopularityTracker, get_popularity_tracker
 from fastapi import Depends
 
 logger = logging.getLogger(__name__)
@@ -10,35 +13,83 @@ logger = logging.getLogger(__name__)
 class ProductMappingService:
     """
     Service for mapping generic product names to platform-specific names and IDs.
+    
+    Names are resolved through a search index over the mappings, so free
+    text like "Whole Milk 1L" finds the "milk" entry; matches below
+    PRODUCT_MATCH_MIN_CONFIDENCE are treated as unmapped.
     """
     
-    def __init__(self, product_mappings: Dict[str, Dict[str, Any]] = Depends(get_product_mappings)):
+    def __init__(
+        self,
+        product_mappings: Dict[str, Dict[str, Any]] = Depends(get_product_mappings),
+        popularity: PopularityTracker = Depends(get_popularity_tracker)
+    ):
         self.product_mappings = product_mappings
+        self.popularity = popularity
+        self.index: ProductIndex = get_product_index(product_mappings, settings.PRODUCT_MATCH_MEMO_SIZE)
+    
+    def resolve(self, name: str) -> Optional[ProductMatch]:
+        """
+        Resolve a free-text product name to a product mapping entry.
+        
+        Args:
+            name: Product name as given in the request
+        
+        Returns:
+            The matched generic name and its confidence, or None if nothing matches well enough
+        """
+        return self.index.resolve(name, settings.PRODUCT_MATCH_MIN_CONFIDENCE)
     
     def map_products(self, items: List[GroceryItem]) -> Dict[str, Dict[str, Any]]:
         """
         Map generic product names to platform-specific names and IDs.
         
+        Mapped products are counted as requested, so the most popular ones
+        are kept warm in the cache by the pre-warming scheduler.
+        
         Args:
             items: List of grocery items from the API request
-            
+        
         Returns:
             Dictionary mapping generic names to platform-specific details
         """
+        mapped_products, requested = self.resolve_products(items)
+        self.record_requested(requested)
+        return mapped_products
+    
+    def resolve_products(self, items: List[GroceryItem]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Map generic product names to platform-specific names and IDs, without counting them as requested.
+        
+        Args:
+            items: List of grocery items from the API request
+        
+        Returns:
+            Tuple of (dictionary mapping generic names to platform-specific details,
+            generic names of the mapping entries matched)
+        """
         mapped_products = {}
+        requested = []
         
         for item in items:
-            generic_name = item.name.lower()
+            match = self.resolve(item.name)
             
             # Look up the mapping
-            if generic_name in self.product_mappings:
-                mapped_products[item.name] = self.product_mappings[generic_name]
+            if match is not None:
+                if match.confidence < 1.0:
+                    logger.debug(f"Matched product {item.name!r} to {match.generic_name!r} (confidence {match.confidence:.2f})")
+                mapped_products[item.name] = self.product_mappings[match.generic_name]
+                requested.append(match.generic_name)
             else:
                 # If no mapping exists, log a warning
                 logger.warning(f"No mapping found for product: {item.name}")
                 mapped_products[item.name] = {}
         
-        return mapped_products
+        return mapped_products, requested
+    
+    def record_requested(self, generic_names: List[str]) -> None:
+        """Count mapping entries as requested, e.g. for a response served from the response cache."""
+        self.popularity.record(generic_names)
 
 # Example product_mappings.json structure
 """
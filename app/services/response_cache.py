@@ -0,0 +1,159 @@
+import hashlib
+import time
+from typing import Dict, Any, Optional, Sequence
+from app.core.config import settings
+from app.models.request import PriceComparisonRequest
+from app.models.response import OptimizedBasketResponse
+from app.services.price_matrix import PriceMatrix
+from app.utils.cache import BoundedTTLCache
+from app.utils.serialization import dumps, encode_payload
+
+_AGE_FIELD = b'"price_age_seconds":'
+_AGE_PLACEHOLDER = _AGE_FIELD + b"null"
+
+class EncodedResponse:
+    """
+    A /get_prices response encoded once, with its ETag and expiry.
+    
+    The response is encoded with its price ages left out; the ETag hashes
+    that encoding, so it stays the same for as long as the prices do.
+    body() splices the ages as of the time the response is served into the
+    encoded bytes, without encoding the response again.
+    """
+    
+    __slots__ = ("products", "segments", "ages", "etag", "size", "created", "expires")
+    
+    def __init__(self, payload: Dict[str, Any], products: Sequence[str] = (), ttl: float = 0.0):
+        """
+        Args:
+            payload: Response payload in the shape of OptimizedBasketResponse
+            products: Generic names of the mapping entries the basket was resolved to
+            ttl: Seconds the response stays fresh
+        """
+        self.products = tuple(products)
+        self.ages = [item.get("price_age_seconds") for item in payload["items"]]
+        ageless = encode_payload(
+            OptimizedBasketResponse,
+            {**payload, "items": [{**item, "price_age_seconds": None} for item in payload["items"]]}
+        )
+        # Encoded strings escape their quotes, so the placeholders are the
+        # age fields of the items, in order
+        self.segments = ageless.split(_AGE_PLACEHOLDER)
+        if len(self.segments) != len(self.ages) + 1:
+            raise ValueError("Price ages of the response could not be located")
+        self.etag = f'"{hashlib.blake2b(ageless, digest_size=16).hexdigest()}"'
+        self.size = len(ageless)
+        self.created = time.time()
+        self.expires = self.created + ttl
+    
+    def body(self) -> bytes:
+        """Return the encoded response, with the price ages advanced to the current time."""
+        elapsed = time.time() - self.created
+        parts = [self.segments[0]]
+        for age, segment in zip(self.ages, self.segments[1:]):
+            parts.append(_AGE_FIELD + (b"null" if age is None else dumps(age + elapsed)))
+            parts.append(segment)
+        return b"".join(parts)
+    
+    def max_age(self) -> int:
+        """Return the whole seconds the response stays fresh."""
+        return max(0, int(self.expires - time.time()))
+
+class ResponseCache:
+    """
+    Cache of /get_prices responses, keyed by a hash of the basket.
+    
+    The key is the hash of the request as re-serialized by its model, with
+    the items sorted, so requests differing only in formatting, item order
+    or fields left at their defaults share an entry. Item names keep their
+    case, as the response repeats them. A response lives only as long as the first of its prices to go
+    stale, and an incomplete one at most RESPONSE_CACHE_INCOMPLETE_TTL
+    seconds, so platforms that missed the deadline are retried soon.
+    Responses that include stale prices are not cached at all. Entries
+    hold the response payload already built, so a hit is served without
+    scraping or optimizing again.
+    """
+    
+    def __init__(self, max_entries: int = 1000, max_bytes: Optional[int] = None):
+        """
+        Initialize the response cache.
+        
+        Args:
+            max_entries: Maximum number of responses kept
+            max_bytes: Maximum total size of the encoded responses (None for no limit)
+        """
+        self.cache = BoundedTTLCache(
+            ttl=settings.CACHE_TTL,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=lambda response: response.size
+        )
+    
+    @staticmethod
+    def key(request: PriceComparisonRequest) -> str:
+        """Return the cache key of a request."""
+        canonical = request.model_dump(mode="json")
+        canonical["items"] = sorted(canonical["items"], key=dumps)
+        return hashlib.blake2b(dumps(canonical), digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[EncodedResponse]:
+        """Return the cached response for a key, if it is still fresh."""
+        return self.cache.get(key)
+    
+    def put(
+        self,
+        key: str,
+        payload: Dict[str, Any],
+        matrix: PriceMatrix,
+        products: Sequence[str] = (),
+        complete: bool = True
+    ) -> EncodedResponse:
+        """
+        Cache a response for as long as the prices of its matrix stay fresh.
+        
+        Args:
+            key: Cache key of the request
+            payload: Response payload
+            matrix: Price matrix the response was computed from
+            products: Generic names of the mapping entries the basket was resolved to
+            complete: Whether every platform returned a result for every item
+        
+        Returns:
+            The response, whether or not it was cached
+        """
+        ttl = price_ttl(matrix)
+        if not complete:
+            ttl = min(ttl, settings.RESPONSE_CACHE_INCOMPLETE_TTL)
+        response = EncodedResponse(payload, products, ttl)
+        if ttl >= 1:
+            self.cache.set(key, response, ttl=int(ttl))
+        return response
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        return self.cache.stats()
+
+def price_ttl(matrix: PriceMatrix) -> float:
+    """
+    Return the seconds until the first price of a matrix turns stale.
+    
+    Returns 0 if any price is stale already, or if the matrix has no prices.
+    """
+    records = matrix.records[matrix.available]
+    if len(records) == 0:
+        return 0.0
+    
+    now = time.time()
+    ttl = float(settings.CACHE_TTL)
+    for record in records:
+        if record.get("freshness") == "stale" or "scraped_at" not in record:
+            return 0.0
+        ttl = min(ttl, record["scraped_at"] + settings.CACHE_TTL - now)
+    return max(ttl, 0.0)
+
+# Responses are cached per process
+_response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES)
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if response caching is disabled."""
+    return _response_cache if settings.RESPONSE_CACHE_ENABLED else None
@@ -1,14 +1,15 @@
 import asyncio
 import logging
-from typing import Dict, List, Any, Tuple
+import time
+from typing import Dict, List, Any, Tuple, Optional, AsyncIterator
 from app.scrapers.base_scraper import BaseScraper
-from app.scrapers.platform_a import PlatformAScraper
-from app.scrapers.platform_b import PlatformBScraper
-from app.scrapers.platform_c import PlatformCScraper
-from app.scrapers.platform_d import PlatformDScraper
+from app.scrapers.registry import ScraperRegistry, get_scraper_registry
+from app.services.price_matrix import PriceMatrix
+from app.services.price_history import PriceHistoryRecorder, get_price_history
 from app.core.config import settings
 from app.core.exceptions import ScrapingError
-from app.utils.async_utils import run_concurrently_with_limit
+from app.utils.async_utils import iterate_concurrently_with_limit
+from app.utils.metrics import SCRAPE_INCOMPLETE
 from fastapi import Depends
 from decimal import Decimal
 
@@ -17,59 +18,54 @@ logger = logging.getLogger(__name__)
 class ScraperManager:
     """
     Manages scrapers for all platforms and coordinates concurrent scraping.
+    
+    The scrapers themselves are owned by the process-wide ScraperRegistry,
+    so sessions, connection pools and the cache are shared across requests.
+    Every result is passed to the price history recorder, when enabled.
     """
     
-    def __init__(self):
-        # Initialize scrapers for all platforms
-        self.scrapers: Dict[str, BaseScraper] = {
-            "PlatformA": PlatformAScraper(),
-            "PlatformB": PlatformBScraper(),
-            "PlatformC": PlatformCScraper(),
-            "PlatformD": PlatformDScraper(),
-        }
+    def __init__(
+        self,
+        registry: ScraperRegistry = Depends(get_scraper_registry),
+        history: Optional[PriceHistoryRecorder] = Depends(get_price_history)
+    ):
+        self.registry = registry
+        self.scrapers: Dict[str, BaseScraper] = registry.scrapers
+        self.history = history
     
-    async def fetch_all_prices_and_discounts(self, mapped_products: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    async def fetch_all_prices_and_discounts(
+        self,
+        mapped_products: Dict[str, Dict[str, Any]],
+        deadline: Optional[float] = None,
+        matrix: Optional[PriceMatrix] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
         Fetch prices and discounts for all products from all platforms concurrently.
         
+        When a deadline is given, scrapes still running when it expires are
+        abandoned and cached data (even if stale) is used for them where
+        available; use find_incomplete() to see what is still missing.
+        Abandoned scrapes keep running in the background and fill the cache.
+        
         Args:
             mapped_products: Dictionary mapping generic product names to platform-specific names and IDs
-            
+            deadline: time.monotonic() value by which results are needed (None waits for all)
+            matrix: Price matrix to fill with the results as they arrive
+        
         Returns:
             Dictionary containing all price and discount data
         """
         try:
-            # Prepare tasks for concurrent execution
-            tasks = []
-            
-            for generic_name, platforms in mapped_products.items():
-                for platform, details in platforms.items():
-                    if platform in self.scrapers:
-                        # Add price scraping task
-                        tasks.append((
-                            self._fetch_price_and_discount,
-                            (
-                                generic_name,
-                                platform,
-                                details["product_id"],
-                                details["product_name"]
-                            )
-                        ))
-            
-            # Run tasks concurrently with a limit
-            results = await run_concurrently_with_limit(
-                tasks, 
-                limit=settings.MAX_CONCURRENT_REQUESTS
-            )
-            
             # Process and organize results
             organized_results = {}
             
-            for generic_name, platform, result in results:
+            async for generic_name, platform, result in self.stream_prices_and_discounts(mapped_products, deadline):
                 if generic_name not in organized_results:
                     organized_results[generic_name] = {}
-                    
+                
                 organized_results[generic_name][platform] = result
+                if matrix is not None:
+                    matrix.add(generic_name, platform, result)
             
             return organized_results
         
@@ -77,56 +73,201 @@ class ScraperManager:
             logger.exception("Error in fetch_all_prices_and_discounts")
             raise ScrapingError(f"Failed to fetch prices and discounts: {str(e)}")
     
+    async def stream_prices_and_discounts(
+        self,
+        mapped_products: Dict[str, Dict[str, Any]],
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Fetch prices and discounts concurrently, yielding each result as soon as it arrives.
+        
+        After the live results, cached data is yielded for pairs that did not
+        arrive before the deadline (see fetch_all_prices_and_discounts()).
+        
+        Args:
+            mapped_products: Dictionary mapping generic product names to platform-specific names and IDs
+            deadline: time.monotonic() value by which results are needed (None waits for all)
+        
+        Yields:
+            Tuples of (generic_name, platform, combined_data)
+        """
+        requested_at = time.time()
+        
+        # Prepare tasks for concurrent execution: one per product, except on
+        # platforms with a batch endpoint, where products are grouped per request
+        tasks = []
+        batches: Dict[str, Dict[str, Tuple[str, List[str]]]] = {}
+        
+        for generic_name, platforms in mapped_products.items():
+            for platform, details in platforms.items():
+                if platform not in self.scrapers:
+                    continue
+                
+                if self.scrapers[platform].supports_batch:
+                    product_name, generic_names = batches.setdefault(platform, {}).setdefault(
+                        details["product_id"], (details["product_name"], [])
+                    )
+                    generic_names.append(generic_name)
+                else:
+                    # Add price scraping task
+                    tasks.append((
+                        self._fetch_price_and_discount,
+                        (
+                            generic_name,
+                            platform,
+                            details["product_id"],
+                            details["product_name"],
+                            requested_at
+                        )
+                    ))
+        
+        for platform, products in batches.items():
+            batch_size = self.scrapers[platform].batch_size
+            product_ids = list(products)
+            for start in range(0, len(product_ids), batch_size):
+                tasks.append((
+                    self._fetch_batch,
+                    (
+                        platform,
+                        {product_id: products[product_id] for product_id in product_ids[start:start + batch_size]},
+                        requested_at
+                    )
+                ))
+        
+        # Run tasks concurrently with a limit, passing results on as they complete
+        received = {}
+        
+        async for results in iterate_concurrently_with_limit(
+            tasks,
+            limit=settings.MAX_CONCURRENT_REQUESTS,
+            timeout=deadline - time.monotonic() if deadline is not None else None
+        ):
+            for generic_name, platform, result in results:
+                received.setdefault(generic_name, {})[platform] = result
+                if self.history is not None:
+                    self.history.record(platform, result)
+                yield generic_name, platform, result
+        
+        # Fall back to cached data for anything that did not arrive in time
+        for generic_name, platforms in self.find_incomplete(mapped_products, received).items():
+            for platform in platforms:
+                SCRAPE_INCOMPLETE.labels(platform).inc()
+                details = mapped_products[generic_name][platform]
+                snapshot = self.scrapers[platform].peek_snapshot(details["product_id"])
+                if snapshot is not None:
+                    result = self._combine(self.scrapers[platform], generic_name, snapshot, requested_at)
+                    if self.history is not None:
+                        self.history.record(platform, result)
+                    yield generic_name, platform, result
+    
+    def find_incomplete(
+        self,
+        mapped_products: Dict[str, Dict[str, Any]],
+        price_data: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, List[str]]:
+        """
+        Find the (product, platform) pairs that were requested but have no price data.
+        
+        Args:
+            mapped_products: Dictionary mapping generic product names to platform-specific names and IDs
+            price_data: Price data returned by fetch_all_prices_and_discounts()
+        
+        Returns:
+            Dictionary mapping generic product names to the platforms missing for them
+        """
+        incomplete = {}
+        
+        for generic_name, platforms in mapped_products.items():
+            missing = [
+                platform for platform in platforms
+                if platform in self.scrapers and platform not in price_data.get(generic_name, {})
+            ]
+            if missing:
+                incomplete[generic_name] = missing
+        
+        return incomplete
+    
     async def _fetch_price_and_discount(
         self, 
         generic_name: str, 
         platform: str, 
         product_id: str, 
-        product_name: str
-    ) -> Tuple[str, str, Dict[str, Any]]:
+        product_name: str,
+        requested_at: float
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
         """
         Fetch both price and discount for a single product from a single platform.
         
         Returns:
-            Tuple of (generic_name, platform, combined_data)
+            List with one tuple of (generic_name, platform, combined_data)
         """
         scraper = self.scrapers[platform]
         
-        # Run price and discount scraping concurrently
-        price_task = asyncio.create_task(scraper.get_price(product_id, product_name))
-        discount_task = asyncio.create_task(scraper.get_discount(product_id, product_name))
+        # Price and discount come from a single fetch and parse of the product page
+        snapshot = await scraper.get_snapshot(product_id, product_name)
+        
+        return [(generic_name, platform, self._combine(scraper, generic_name, snapshot, requested_at))]
+    
+    async def _fetch_batch(
+        self,
+        platform: str,
+        products: Dict[str, Tuple[str, List[str]]],
+        requested_at: float
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Fetch price and discount for many products from a platform with a batch endpoint.
         
-        # Wait for both tasks to complete
-        price_data, discount_data = await asyncio.gather(price_task, discount_task)
+        Args:
+            platform: Platform name
+            products: Mapping of product ID to (product name, generic names mapped to it)
+            requested_at: time.time() at which the request started
         
+        Returns:
+            List of tuples of (generic_name, platform, combined_data) for the products found
+        """
+        scraper = self.scrapers[platform]
+        snapshots = await scraper.fetch_many({
+            product_id: product_name for product_id, (product_name, _) in products.items()
+        })
+        
+        return [
+            (generic_name, platform, self._combine(scraper, generic_name, snapshot, requested_at))
+            for product_id, snapshot in snapshots.items()
+            for generic_name in products[product_id][1]
+        ]
+    
+    def _combine(
+        self,
+        scraper: BaseScraper,
+        generic_name: str,
+        snapshot: Dict[str, Any],
+        requested_at: float
+    ) -> Dict[str, Any]:
+        """
+        Combine a product snapshot with its final price after discount.
+        
+        Snapshots scraped before the request started were served from the cache.
+        """
         # Calculate final price after discount
-        original_price = price_data["price"]
+        original_price = snapshot["price"]
         discount_amount = Decimal('0.0')
         
-        if discount_data["discount_type"] == "percentage":
-            discount_amount = original_price * (discount_data["discount"] / Decimal('100.0'))
-        elif discount_data["discount_type"] == "absolute":
-            discount_amount = discount_data["discount"]
+        if snapshot["discount_type"] == "percentage":
+            discount_amount = original_price * (snapshot["discount"] / Decimal('100.0'))
+        elif snapshot["discount_type"] == "absolute":
+            discount_amount = snapshot["discount"]
         
         final_price = original_price - discount_amount
+        freshness, price_age = scraper.get_freshness(snapshot)
         
         # Combine the data
-        combined_data = {
-            **price_data,
+        return {
+            **snapshot,
             "original_price": original_price,
             "discount": discount_amount,
             "final_price": final_price,
-            "generic_name": generic_name
+            "generic_name": generic_name,
+            "freshness": freshness,
+            "price_age_seconds": price_age,
+            "from_cache": snapshot.get("scraped_at", requested_at) < requested_at
         }
-        
-        return generic_name, platform, combined_data
-    
-    async def close(self):
-        """Close all scraper sessions."""
-        close_tasks = []
-        
-        for scraper in self.scrapers.values():
-            close_tasks.append(scraper.close())
-        
-        if close_tasks:
-            await asyncio.gather(*close_tasks)
\ No newline at end of file
@@ -1,13 +1,43 @@
 import asyncio
 import logging
-from typing import List, Tuple, Callable, Any, Coroutine
+import time
+from typing import List, Tuple, Callable, Any, Coroutine, Awaitable, Dict, Hashable, Optional, Set, AsyncIterator
 from app.core.config import settings
+from app.utils.metrics import SEMAPHORE_WAIT
 
 logger = logging.getLogger(__name__)
 
+def _start_with_limit(tasks: List[Tuple[Callable, Tuple]], limit: int) -> List[asyncio.Task]:
+    """Start all tasks, letting at most `limit` of them run at the same time."""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run_with_semaphore(func, args):
+        queued_at = time.monotonic()
+        async with semaphore:
+            SEMAPHORE_WAIT.observe(time.monotonic() - queued_at)
+            try:
+                return await func(*args)
+            except Exception as e:
+                logger.error(f"Error in concurrent task: {str(e)}")
+                raise
+    
+    return [
+        asyncio.create_task(run_with_semaphore(func, args))
+        for func, args in tasks
+    ]
+
+async def _cancel_pending(pending: Set[asyncio.Task], total: int, timeout: Optional[float]) -> None:
+    """Cancel tasks that did not finish in time and wait for them to unwind."""
+    if pending:
+        logger.warning(f"{len(pending)} of {total} tasks did not finish within {timeout} seconds")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
 async def run_concurrently_with_limit(
     tasks: List[Tuple[Callable, Tuple]], 
-    limit: int = settings.MAX_CONCURRENT_REQUESTS
+    limit: int = settings.MAX_CONCURRENT_REQUESTS,
+    timeout: Optional[float] = None
 ) -> List[Any]:
     """
     Run a list of tasks concurrently with a limit on the number of
@@ -16,38 +46,74 @@ async def run_concurrently_with_limit(
     Args:
         tasks: List of tuples (function, args) to run concurrently
         limit: Maximum number of tasks to run simultaneously
+        timeout: Seconds to wait for the tasks; tasks still running are
+            cancelled and left out of the results (None waits for all)
         
     Returns:
-        List of results from all tasks
+        List of results from all tasks that completed successfully, in task order
     """
-    semaphore = asyncio.Semaphore(limit)
-    results = []
+    concurrent_tasks = _start_with_limit(tasks, limit)
     
-    async def run_with_semaphore(func, args):
-        async with semaphore:
-            try:
-                return await func(*args)
-            except Exception as e:
-                logger.error(f"Error in concurrent task: {str(e)}")
-                raise
+    if not concurrent_tasks:
+        return []
     
-    # Create tasks with semaphore
-    concurrent_tasks = [
-        asyncio.create_task(run_with_semaphore(func, args))
-        for func, args in tasks
-    ]
+    # Wait for the tasks to complete, or for the timeout to expire
+    if timeout is not None and timeout <= 0:
+        pending = set(concurrent_tasks)
+    else:
+        _, pending = await asyncio.wait(concurrent_tasks, timeout=timeout)
     
-    # Wait for all tasks to complete
-    if concurrent_tasks:
-        results = await asyncio.gather(*concurrent_tasks, return_exceptions=True)
+    await _cancel_pending(pending, len(concurrent_tasks), timeout)
     
-    # Check for exceptions
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.error(f"Task {i} failed with error: {str(result)}")
+    results = []
+    for i, task in enumerate(concurrent_tasks):
+        if task.cancelled():
+            continue
+        if task.exception() is not None:
+            logger.error(f"Task {i} failed with error: {str(task.exception())}")
+            continue
+        results.append(task.result())
     
-    # Filter out exceptions
-    return [r for r in results if not isinstance(r, Exception)]
+    return results
+
+async def iterate_concurrently_with_limit(
+    tasks: List[Tuple[Callable, Tuple]],
+    limit: int = settings.MAX_CONCURRENT_REQUESTS,
+    timeout: Optional[float] = None
+) -> AsyncIterator[Any]:
+    """
+    Run a list of tasks concurrently with a limit, yielding results as they complete.
+    
+    Failed tasks are logged and skipped. Tasks still running when the
+    timeout expires, or when the consumer stops iterating, are cancelled.
+    
+    Args:
+        tasks: List of tuples (function, args) to run concurrently
+        limit: Maximum number of tasks to run simultaneously
+        timeout: Seconds to wait for the tasks (None waits for all)
+        
+    Yields:
+        Results of successful tasks, in completion order
+    """
+    concurrent_tasks = _start_with_limit(tasks, limit)
+    pending = set(concurrent_tasks)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    
+    try:
+        while pending:
+            remaining = deadline - loop.time() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    logger.error(f"Task failed with error: {str(task.exception())}")
+                    continue
+                yield task.result()
+    finally:
+        await _cancel_pending(pending, len(concurrent_tasks), timeout)
 
 async def with_timeout(coro: Coroutine, timeout: float = settings.SCRAPER_TIMEOUT) -> Any:
     """
@@ -67,4 +133,77 @@ async def with_timeout(coro: Coroutine, timeout: float = settings.SCRAPER_TIMEOU
         return await asyncio.wait_for(coro, timeout=timeout)
     except asyncio.TimeoutError:
         logger.error(f"Operation timed out after {timeout} seconds")
-        raise
\ No newline at end of file
+        raise
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share the same key.
+    
+    The first caller for a key starts the call; callers arriving while it
+    is still in flight await the same task instead of starting their own.
+    The call runs in its own task, so a cancelled caller does not cancel
+    the result for everybody else.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() for key, or join the call already in flight for key.
+        
+        Args:
+            key: Deduplication key
+            func: Zero-argument callable returning the awaitable to run
+            
+        Returns:
+            Result of the (shared) call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = self.start(key, func)
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced call for {key}")
+        
+        return await asyncio.shield(task)
+    
+    def start(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Start func() for key without waiting for it, or return the call already in flight.
+        
+        Must be called from within a running event loop.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+    
+    def is_in_flight(self, key: Hashable) -> bool:
+        """Return True if a call for key is currently running."""
+        return key in self._inflight
+    
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished task and mark its exception as retrieved."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+    
+    def cancel_all(self) -> None:
+        """Cancel every call still in flight."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return call, coalescing and in-flight counters."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
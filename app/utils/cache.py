@@ -1,58 +1,266 @@
-import time
-from typing import Dict, Any, Optional
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
 import threading
+import time
+import orjson
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Any, Optional, Callable
+from app.core.config import settings
+from app.core.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes.
+    
+    Containers are walked recursively; this is an approximation meant for
+    enforcing a memory budget, not an exact measurement.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v) for v in value)
+    return size
 
-class TTLCache:
+class CacheEntry:
     """
-    A simple Time-To-Live (TTL) cache implementation.
+    A single cache entry with its expiration times and estimated size.
     
-    This cache stores items with an expiration time. Items are automatically
-    considered expired after their TTL has passed.
+    An entry is fresh until stale_at and may still be served, marked as
+    stale, until it expires.
     """
     
-    def __init__(self, ttl: int = 60):
+    __slots__ = ("value", "stale_at", "expires", "size")
+    
+    def __init__(self, value: Any, stale_at: float, expires: float, size: int):
+        self.value = value
+        self.stale_at = stale_at
+        self.expires = expires
+        self.size = size
+    
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """Return True if the entry is past its soft TTL."""
+        return (now if now is not None else time.time()) >= self.stale_at
+
+class CacheBackend(ABC):
+    """
+    Interface for scraper cache backends.
+    
+    Backends store values with a soft TTL (after which they are served as
+    stale) and a hard expiry. All methods are synchronous; backends must be
+    fast enough to be called from the event loop, and move slow work
+    (disk writes, cleanup) off it.
+    """
+    
+    default_ttl: int
+    default_stale_ttl: int
+    _sweeper: Optional[asyncio.Task] = None
+    
+    def get(self, key: str) -> Optional[Any]:
         """
-        Initialize the TTL cache.
+        Get an item from the cache if it exists and is not expired.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            The cached value, or None if not found or expired
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+    
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Get a cache entry, including its freshness, if it has not expired."""
+        pass
+    
+    @abstractmethod
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> None:
+        """Set an item in the cache with a specified TTL and stale window."""
+        pass
+    
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete an item from the cache, returning True if it existed."""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Clear all items from the cache."""
+        pass
+    
+    @abstractmethod
+    def cleanup(self) -> int:
+        """Remove all expired items from the cache and return how many were removed."""
+        pass
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss/eviction counters."""
+        pass
+    
+    async def cleanup_async(self) -> int:
+        """Remove all expired items without blocking the event loop (see cleanup())."""
+        return self.cleanup()
+    
+    def close(self) -> None:
+        """Release resources held by the backend."""
+        pass
+    
+    def start_sweeper(self, interval: float) -> None:
+        """
+        Start a background task removing expired entries periodically.
+        
+        Must be called from within a running event loop.
+        
+        Args:
+            interval: Seconds between sweeps
+        """
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep(interval))
+    
+    async def stop_sweeper(self) -> None:
+        """Stop the background sweep task, if running."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+    
+    async def _sweep(self, interval: float) -> None:
+        """Periodically remove expired entries."""
+        while True:
+            await asyncio.sleep(interval)
+            removed = await self.cleanup_async()
+            if removed:
+                logger.debug(f"Cache sweep removed {removed} expired entries")
+
+class BoundedTTLCache(CacheBackend):
+    """
+    A bounded Time-To-Live (TTL) cache with LRU eviction.
+    
+    Entries are kept in least-recently-used order, so lookups, inserts and
+    evictions are O(1). The cache is bounded by entry count and, optionally,
+    by the estimated size of its values in bytes. Expired entries are removed
+    when they are read and by an optional background sweep.
+    
+    Items can outlive their TTL by a stale window, for stale-while-revalidate
+    reads through get_entry(). get() returns any item that has not expired.
+    
+    This is the in-process backend. It is meant to be used from a single
+    event loop and takes no lock; none of its methods await, so they cannot
+    interleave.
+    """
+    
+    def __init__(
+        self,
+        ttl: int = 60,
+        stale_ttl: int = 0,
+        max_entries: int = 10000,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        """
+        Initialize the bounded TTL cache.
         
         Args:
             ttl: Default Time-To-Live in seconds for cache items
+            stale_ttl: Default seconds an item may be served stale after its TTL
+            max_entries: Maximum number of items kept in the cache
+            max_bytes: Maximum estimated size of all values (None for no limit)
+            sizeof: Function estimating the size of a value in bytes
         """
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
         self.default_ttl = ttl
-        self.lock = threading.RLock()
+        self.default_stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
     
-    def get(self, key: str) -> Optional[Any]:
+    def __len__(self) -> int:
+        return len(self.cache)
+    
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
         """
-        Get an item from the cache if it exists and is not expired.
+        Get a cache entry, including its freshness, if it has not expired.
         
         Args:
             key: Cache key
-            
+        
         Returns:
-            The cached value, or None if not found or expired
+            The cache entry, or None if not found or expired
         """
-        with self.lock:
-            if key in self.cache:
-                item = self.cache[key]
-                if item["expires"] > time.time():
-                    return item["value"]
-                else:
-                    # Item is expired, remove it
-                    del self.cache[key]
+        entry = self.cache.get(key)
+        if entry is None:
+            self.misses += 1
             return None
+        
+        now = time.time()
+        if entry.expires <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        
+        self.cache.move_to_end(key)
+        self.hits += 1
+        if entry.is_stale(now):
+            self.stale_hits += 1
+        return entry
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> None:
         """
         Set an item in the cache with a specified TTL.
         
+        Least recently used items are evicted to make room if needed.
+        
         Args:
             key: Cache key
             value: Value to cache
             ttl: Time-To-Live in seconds (uses default if not specified)
+            stale_ttl: Seconds the item may be served stale after its TTL
+                (uses default if not specified)
         """
-        expires = time.time() + (ttl if ttl is not None else self.default_ttl)
-        with self.lock:
-            self.cache[key] = {"value": value, "expires": expires}
+        stale_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        expires = stale_at + (stale_ttl if stale_ttl is not None else self.default_stale_ttl)
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        
+        if key in self.cache:
+            self._remove(key)
+        
+        self.cache[key] = CacheEntry(value, stale_at, expires, size)
+        self.current_bytes += size
+        self._evict()
     
     def delete(self, key: str) -> bool:
         """
@@ -60,20 +268,23 @@ class TTLCache:
         
         Args:
             key: Cache key
-            
+        
         Returns:
             True if the item was deleted, False if it didn't exist
         """
-        with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-                return True
-            return False
+        if key in self.cache:
+            self._remove(key)
+            return True
+        return False
     
     def clear(self) -> None:
         """Clear all items from the cache."""
-        with self.lock:
-            self.cache.clear()
+        self.cache.clear()
+        self.current_bytes = 0
+    
+    def close(self) -> None:
+        """Drop all items; an in-process cache does not outlive its process."""
+        self.clear()
     
     def cleanup(self) -> int:
         """
@@ -83,13 +294,321 @@ class TTLCache:
             Number of items removed
         """
         now = time.time()
-        count = 0
-        with self.lock:
-            expired_keys = [
-                key for key, item in self.cache.items() 
-                if item["expires"] <= now
-            ]
-            for key in expired_keys:
-                del self.cache[key]
-                count += 1
-        return count
\ No newline at end of file
+        expired_keys = [
+            key for key, entry in self.cache.items()
+            if entry.expires <= now
+        ]
+        for key in expired_keys:
+            self._remove(key)
+        self.expirations += len(expired_keys)
+        return len(expired_keys)
+    
+    def _remove(self, key: str) -> None:
+        """Remove an entry and release its size from the byte budget."""
+        entry = self.cache.pop(key)
+        self.current_bytes -= entry.size
+    
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache is within bounds."""
+        while self.cache and (
+            len(self.cache) > self.max_entries
+            or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+        ):
+            _, entry = self.cache.popitem(last=False)
+            self.current_bytes -= entry.size
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.cache),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+# Tag of Decimals in SQLite cache values, which are stored as JSON
+DECIMAL_TAG = "$decimal"
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {DECIMAL_TAG: str(value)}
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and DECIMAL_TAG in obj:
+        return Decimal(obj[DECIMAL_TAG])
+    return obj
+
+def encode_value(value: Any) -> bytes:
+    """Encode a cache value (plain dicts, lists, scalars and Decimals) as JSON."""
+    return orjson.dumps(value, default=_encode_default)
+
+def decode_value(data: bytes) -> Any:
+    """Decode a cache value encoded with encode_value()."""
+    return json.loads(data, object_hook=_decode_object)
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    A cache backend stored in an SQLite database on local disk.
+    
+    Several worker processes on the same host can open the same database
+    file and share scraped results. The database runs in WAL mode so
+    readers do not block the writer. Values are stored as JSON, with
+    Decimals tagged so they round-trip unchanged.
+    
+    Only reads run on the event loop, on their own connection with a short
+    busy timeout: a read that cannot get the database in time counts as a
+    miss rather than stalling every request. Writes, deletes and cleanup
+    run on a dedicated writer thread; values written but not yet committed
+    are served from memory, so a value can be read back right after it is
+    set. The number of entries is bounded by trimming the entries closest
+    to expiry during cleanup().
+    """
+    
+    # Milliseconds a read on the event loop waits for a locked database
+    READ_BUSY_TIMEOUT_MS = 50
+    # Milliseconds the writer thread waits for other workers' writes
+    WRITE_BUSY_TIMEOUT_MS = 5000
+    
+    def __init__(
+        self,
+        path: str,
+        ttl: int = 60,
+        stale_ttl: int = 0,
+        max_entries: int = 10000
+    ):
+        """
+        Initialize the SQLite cache backend.
+        
+        Args:
+            path: Path of the database file (created if missing)
+            ttl: Default Time-To-Live in seconds for cache items
+            stale_ttl: Default seconds an item may be served stale after its TTL
+            max_entries: Maximum number of items kept after a cleanup
+        """
+        self.path = path
+        self.default_ttl = ttl
+        self.default_stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.busy = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.writer = self._connect(self.WRITE_BUSY_TIMEOUT_MS)
+        self.writer.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " stale_at REAL NOT NULL,"
+            " expires REAL NOT NULL)"
+        )
+        self.writer.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+        self.reader = self._connect(self.READ_BUSY_TIMEOUT_MS)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+        
+        # Entries set but not yet written, by key
+        self._pending: Dict[str, CacheEntry] = {}
+        self._pending_lock = threading.Lock()
+    
+    def _connect(self, busy_timeout_ms: int) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        return conn
+    
+    def __len__(self) -> int:
+        return self.reader.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get a cache entry, including its freshness, if it has not expired.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            The cache entry, or None if not found, expired or the database is busy
+        """
+        now = time.time()
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._read(key, now)
+        elif entry.expires <= now:
+            entry = None
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        if entry.is_stale(now):
+            self.stale_hits += 1
+        return entry
+    
+    def _read(self, key: str, now: float) -> Optional[CacheEntry]:
+        try:
+            row = self.reader.execute(
+                "SELECT value, stale_at, expires FROM cache WHERE key = ? AND expires > ?",
+                (key, now)
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            self.busy += 1
+            logger.debug(f"Cache read of {key} skipped: {str(e)}")
+            return None
+        if row is None:
+            return None
+        
+        value, stale_at, expires = row
+        try:
+            return CacheEntry(decode_value(value), stale_at, expires, len(value))
+        except ValueError:
+            # Written in another format, e.g. by an older version; scraped again
+            return None
+    
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> None:
+        """
+        Set an item in the cache with a specified TTL.
+        
+        The value is written in the background; it is readable at once.
+        
+        Args:
+            key: Cache key
+            value: Value to cache (plain dicts, lists, scalars and Decimals)
+            ttl: Time-To-Live in seconds (uses default if not specified)
+            stale_ttl: Seconds the item may be served stale after its TTL
+                (uses default if not specified)
+        """
+        stale_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        expires = stale_at + (stale_ttl if stale_ttl is not None else self.default_stale_ttl)
+        data = encode_value(value)
+        entry = CacheEntry(value, stale_at, expires, len(data))
+        
+        with self._pending_lock:
+            self._pending[key] = entry
+        future = self.executor.submit(self._write, key, data, stale_at, expires)
+        future.add_done_callback(lambda f: self._written(key, entry, f))
+    
+    def _write(self, key: str, data: bytes, stale_at: float, expires: float) -> None:
+        self.writer.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stale_at, expires) VALUES (?, ?, ?, ?)",
+            (key, data, stale_at, expires)
+        )
+    
+    def _written(self, key: str, entry: CacheEntry, future: Future) -> None:
+        """Stop serving a written entry from memory, unless it was replaced since."""
+        with self._pending_lock:
+            if self._pending.get(key) is entry:
+                del self._pending[key]
+        if future.exception() is not None:
+            logger.warning(f"Cache write of {key} failed: {str(future.exception())}")
+    
+    def delete(self, key: str) -> bool:
+        """
+        Delete an item from the cache (in the background).
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            True if the item existed, False if it didn't
+        """
+        with self._pending_lock:
+            existed = self._pending.pop(key, None) is not None
+        existed = self._read(key, time.time()) is not None or existed
+        self.executor.submit(self.writer.execute, "DELETE FROM cache WHERE key = ?", (key,))
+        return existed
+    
+    def clear(self) -> None:
+        """Clear all items from the cache (for every process sharing it), in the background."""
+        with self._pending_lock:
+            self._pending.clear()
+        self.executor.submit(self.writer.execute, "DELETE FROM cache")
+    
+    def cleanup(self) -> int:
+        """
+        Remove all expired items, then trim the cache to max_entries (blocking).
+        
+        Returns:
+            Number of items removed
+        """
+        expired = self.writer.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),)).rowcount
+        evicted = self.writer.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        self.expirations += expired
+        self.evictions += evicted
+        return expired + evicted
+    
+    async def cleanup_async(self) -> int:
+        """Run cleanup() on the writer thread."""
+        return await asyncio.wrap_future(self.executor.submit(self.cleanup))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss/eviction counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "pending_writes": len(self._pending),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "busy": self.busy,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+    
+    def close(self) -> None:
+        """Finish pending writes and close the database, keeping its contents for other workers."""
+        self.executor.shutdown(wait=True)
+        self.writer.close()
+        self.reader.close()
+
+def create_scraper_cache() -> CacheBackend:
+    """
+    Create the scraper cache backend configured in application settings.
+    
+    Raises:
+        ConfigurationError: If CACHE_BACKEND names an unknown backend
+    """
+    ttl = settings.CACHE_TTL
+    stale_ttl = max(0, settings.CACHE_HARD_TTL - settings.CACHE_TTL)
+    
+    if settings.CACHE_BACKEND == "memory":
+        return BoundedTTLCache(
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            max_bytes=settings.CACHE_MAX_BYTES
+        )
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(
+            settings.CACHE_SQLITE_PATH,
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            max_entries=settings.CACHE_MAX_ENTRIES
+        )
+    raise ConfigurationError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
@@ -0,0 +1,251 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram buckets in seconds, from cache-speed lookups to upstream timeouts
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _Metric:
+    """
+    A metric family with a fixed set of label names.
+    
+    Children (one per combination of label values) are created on first
+    use and kept, so hot paths can look a child up once and update it
+    directly. Updates are plain attribute writes on the event loop; no
+    locking is done beyond creating children.
+    """
+    
+    type_name = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+    
+    def labels(self, *values: str):
+        """Return the child for a combination of label values, creating it if needed."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def _samples(self, labels: Tuple[str, ...], child) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        """Return the lines of this metric in the text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for labels, child in list(self._children.items()):
+            for suffix, label_text, value in self._samples(labels, child):
+                lines.append(f"{self.name}{suffix}{label_text} {_format_value(value)}")
+        return lines
+
+class _CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+class Counter(_Metric):
+    """A monotonically increasing count, such as requests or errors."""
+    
+    type_name = "counter"
+    
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+    
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter of a metric without labels."""
+        self._default.inc(amount)
+    
+    def _samples(self, labels, child):
+        return [("_total", _format_labels(self.labelnames, labels), child.value)]
+
+class _GaugeChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+    
+    def set(self, value: float) -> None:
+        self.value = value
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as requests in flight."""
+    
+    type_name = "gauge"
+    
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+    
+    def set(self, value: float) -> None:
+        self._default.set(value)
+    
+    def _samples(self, labels, child):
+        return [("", _format_labels(self.labelnames, labels), child.value)]
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket (not cumulative) plus one for +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+class Histogram(_Metric):
+    """
+    A distribution of observed values, such as latencies, in fixed buckets.
+    
+    Observing is a binary search over the bucket bounds and two
+    additions; buckets are made cumulative only when rendered.
+    """
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+    
+    def observe(self, value: float) -> None:
+        """Observe a value on a metric without labels."""
+        self._default.observe(value)
+    
+    def _samples(self, labels, child):
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), list(child.counts)):
+            cumulative += count
+            samples.append((
+                "_bucket",
+                _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),)),
+                cumulative
+            ))
+        label_text = _format_labels(self.labelnames, labels)
+        samples.append(("_sum", label_text, child.sum))
+        samples.append(("_count", label_text, cumulative))
+        return samples
+
+class MetricsRegistry:
+    """The metrics of a process, rendered together for a scrape of /metrics."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Metrics are kept per process; with several workers, each exposes its own
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Time to produce the response headers of an API request",
+    ("method", "route", "status")
+))
+SCRAPE_LATENCY = registry.register(Histogram(
+    "scrape_request_duration_seconds",
+    "Duration of upstream requests to a platform, without waiting for the rate limiter",
+    ("platform",)
+))
+SCRAPE_ERRORS = registry.register(Counter(
+    "scrape_errors",
+    "Failed upstream requests to a platform, by reason (timeout, connection, throttled, http, circuit_open, other)",
+    ("platform", "reason")
+))
+SCRAPE_INCOMPLETE = registry.register(Counter(
+    "scrape_incomplete_results",
+    "Products of a request a platform returned no result for, having failed or missed the deadline",
+    ("platform",)
+))
+SCRAPER_CACHE_LOOKUPS = registry.register(Counter(
+    "scraper_cache_lookups",
+    "Snapshot cache lookups of a scraper, by result (hit, stale_hit, miss)",
+    ("platform", "result")
+))
+UPSTREAM_IN_FLIGHT = registry.register(Gauge(
+    "upstream_requests_in_flight",
+    "Upstream requests to a platform currently holding a connection",
+    ("platform",)
+))
+SEMAPHORE_WAIT = registry.register(Histogram(
+    "concurrency_limit_wait_seconds",
+    "Time tasks queue for a slot of run_concurrently_with_limit/iterate_concurrently_with_limit"
+))
+OPTIMIZER_LATENCY = registry.register(Histogram(
+    "optimizer_duration_seconds",
+    "Time to optimize a basket, by optimizer (greedy, exact) and outcome (ok, error)",
+    ("optimizer", "outcome")
+))
+
+def render_metrics() -> str:
+    """Return the process-wide metrics in the Prometheus text exposition format."""
+    return registry.render()
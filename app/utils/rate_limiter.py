@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from app.core.exceptions import RateLimitExceededError
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    A token bucket limiting the rate of operations.
+    
+    Tokens are added continuously at `rate` per second up to `capacity`;
+    each operation consumes one token.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize the token bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if they are available right now."""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+    
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Return seconds until the requested tokens will be available."""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+    
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until tokens are available and take them."""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.time_until_available(tokens))
+
+class AdaptiveConcurrencyLimiter:
+    """
+    A concurrency limit adjusted with AIMD (additive increase, multiplicative decrease).
+    
+    Every successful operation raises the limit by 1/limit, i.e. by about
+    one per round of `limit` operations; every backoff signal multiplies it
+    by `decrease_factor`. Backoffs closer together than `cooldown` seconds
+    count once, so a burst of failures from the same round does not
+    collapse the limit.
+    """
+    
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: float = 1.0,
+        max_limit: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit if max_limit is not None else initial_limit
+        self.limit = max(min_limit, min(initial_limit, self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.backoffs = 0
+        self._last_backoff = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+    
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+    
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit."""
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation
+                self.release()
+            raise
+    
+    def release(self) -> None:
+        """Release a slot and hand it to the next waiter, if any."""
+        self.in_flight -= 1
+        self._wake()
+    
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+    
+    def on_success(self) -> None:
+        """Additively increase the limit after a successful operation."""
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+    
+    def on_backoff(self) -> None:
+        """Multiplicatively decrease the limit after a congestion signal."""
+        now = time.monotonic()
+        if now - self._last_backoff < self.cooldown:
+            return
+        self._last_backoff = now
+        self.backoffs += 1
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+    
+    @property
+    def queued(self) -> int:
+        return sum(1 for future in self._waiters if not future.done())
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds.
+    
+    Both the delay-seconds and the HTTP-date forms are supported.
+    
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class PlatformRateLimiter:
+    """
+    Process-wide rate and concurrency limiter for a single platform.
+    
+    Combines a token bucket (requests per second) with an AIMD-adjusted
+    concurrency limit. Throttling responses (429/5xx) and timeouts shrink
+    the concurrency limit, and a Retry-After header pauses the platform
+    entirely until it has passed. Callers that would have to wait longer
+    than `max_wait` fail fast with RateLimitExceededError.
+    """
+    
+    def __init__(
+        self,
+        platform: str,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        max_wait: float = 10.0
+    ):
+        """
+        Initialize the platform rate limiter.
+        
+        Args:
+            platform: Platform name (used in errors and stats)
+            rate: Sustained requests per second
+            burst: Maximum burst of requests above the sustained rate
+            max_concurrency: Upper bound of the adaptive concurrency limit
+            min_concurrency: Lower bound of the adaptive concurrency limit
+            max_wait: Longest a caller may wait for the platform, in seconds
+        """
+        self.platform = platform
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial_limit=max_concurrency,
+            min_limit=min_concurrency,
+            max_limit=max_concurrency
+        )
+        self.max_wait = max_wait
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.rejected = 0
+    
+    def _check_wait(self, wait: float) -> None:
+        if wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimitExceededError(
+                f"Rate limit for {self.platform} exceeded, retry in {wait:.1f} seconds"
+            )
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Wait for permission to send one request to the platform.
+        
+        Raises:
+            RateLimitExceededError: If the platform is paused or saturated for longer than max_wait
+        """
+        blocked_for = self.blocked_until - time.monotonic()
+        if blocked_for > 0:
+            self._check_wait(blocked_for)
+            await asyncio.sleep(blocked_for)
+        
+        await self.concurrency.acquire()
+        try:
+            self._check_wait(self.bucket.time_until_available())
+            await self.bucket.acquire()
+            yield
+        finally:
+            self.concurrency.release()
+    
+    def has_capacity(self) -> bool:
+        """Return True if a request could be sent right now without waiting."""
+        return (
+            self.blocked_until <= time.monotonic()
+            and self.concurrency.in_flight < int(self.concurrency.limit)
+            and self.bucket.time_until_available() == 0.0
+        )
+    
+    def on_success(self) -> None:
+        """Record a successful request."""
+        self.concurrency.on_success()
+    
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Record a throttling signal (429, 5xx or timeout).
+        
+        Args:
+            retry_after: Seconds the platform asked us to wait, if any
+        """
+        self.throttled += 1
+        self.concurrency.on_backoff()
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            logger.warning(f"{self.platform} asked to retry after {retry_after:.1f} seconds")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limiter state."""
+        return {
+            "rate": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "tokens": round(self.bucket.tokens, 2),
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "queued": self.concurrency.queued,
+            "blocked_for": max(0.0, round(self.blocked_until - time.monotonic(), 2)),
+            "throttled": self.throttled,
+            "backoffs": self.concurrency.backoffs,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    A circuit breaker for calls to an unreliable dependency.
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected without being attempted. Once `reset_timeout`
+    seconds have passed, a single probe call is let through (half-open);
+    its success closes the circuit again, its failure re-opens it.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the circuit breaker.
+        
+        Args:
+            name: Name of the protected dependency (used in logs and stats)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+        
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        
+        self.rejected += 1
+        return False
+    
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit."""
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if the threshold is reached."""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    def release_probe(self) -> None:
+        """Let another probe through after a call ended without an outcome (e.g. cancelled)."""
+        self._probe_in_flight = False
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the current breaker state."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+class LatencyTracker:
+    """Track recent call latencies and report quantiles over a sliding window."""
+    
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Initialize the latency tracker.
+        
+        Args:
+            window: Number of most recent samples kept
+            min_samples: Samples required before quantiles are reported
+        """
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+    
+    def record(self, latency: float) -> None:
+        """Record the latency of a call in seconds."""
+        self.samples.append(latency)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Return the q-quantile of recent latencies.
+        
+        Returns:
+            Latency in seconds, or None if there are not enough samples yet
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def hedged(
+    func: Callable[[], Awaitable[Any]],
+    delay: float,
+    should_hedge: Optional[Callable[[], bool]] = None
+) -> Any:
+    """
+    Run func(), starting a second attempt if the first is still running after delay.
+    
+    The first attempt to succeed wins and the other is cancelled. If an
+    attempt fails while the other is still running, the other one is
+    awaited instead.
+    
+    Args:
+        func: Zero-argument callable returning the awaitable to run
+        delay: Seconds to wait before sending the hedged attempt
+        should_hedge: Called when the delay has passed; returning False
+            waits for the first attempt only
+    
+    Returns:
+        Result of the first successful attempt
+    """
+    first = asyncio.ensure_future(func())
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+    except asyncio.CancelledError:
+        first.cancel()
+        raise
+    if done:
+        return first.result()
+    
+    if should_hedge is not None and not should_hedge():
+        return await first
+    
+    pending = {first, asyncio.ensure_future(func())}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+            if not pending:
+                return done.pop().result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,45 @@
+import orjson
+from decimal import Decimal
+from typing import Any, Dict, Set, Type
+from pydantic import BaseModel
+
+def _default(value: Any) -> Any:
+    """Encode the types orjson does not handle natively."""
+    if isinstance(value, Decimal):
+        # As a string, like pydantic, so amounts keep their exact digits
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(value: Any) -> bytes:
+    """Encode plain dicts, lists, scalars and Decimals to compact JSON."""
+    return orjson.dumps(value, default=_default)
+
+_checked_models: Set[Type[BaseModel]] = set()
+
+def encode_payload(model: Type[BaseModel], payload: Dict[str, Any]) -> bytes:
+    """
+    Encode a payload built as plain dicts in the shape of a response model.
+    
+    Building and serializing the model would validate every nested item
+    again; instead the payload is encoded directly. The first payload of
+    each model is checked to encode exactly as the model would, so a
+    builder drifting from the model fails loudly instead of silently
+    changing the API.
+    
+    Args:
+        model: Response model the payload follows
+        payload: Payload with every field of the model, nested models as dicts
+    
+    Returns:
+        The encoded JSON body
+    
+    Raises:
+        ValueError: If the first payload of a model does not match it
+    """
+    body = dumps(payload)
+    if model not in _checked_models:
+        expected = model.model_validate(payload).model_dump(mode="json")
+        if orjson.loads(body) != expected:
+            raise ValueError(f"Payload does not match {model.__name__}")
+        _checked_models.add(model)
+    return body
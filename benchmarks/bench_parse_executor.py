@@ -0,0 +1,116 @@
+"""
+Benchmark HTML extraction on the event loop versus in a parse executor.
+
+Simulates many concurrent scrapes of a large product page while a probe
+task measures how late the event loop wakes it up. Run from the project
+root:
+
+    python -m benchmarks.bench_parse_executor
+    python -m benchmarks.bench_parse_executor --extractor tagscan --pages 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Optional
+from app.scrapers.extraction import create_parse_executor, extract_with
+
+SELECTORS = {
+    "price": "span.product-price",
+    "stock": "span.stock-status",
+    "discount": "span.product-discount",
+}
+
+PROBE_INTERVAL = 0.005  # seconds
+
+def build_page(filler_nodes: int) -> str:
+    """Build a product page with the interesting fields at the end."""
+    filler = "".join(
+        f'<div class="item"><a href="/p/{i}">Related product {i}</a><span class="meta">{i}</span></div>'
+        for i in range(filler_nodes)
+    )
+    return (
+        "<html><body>" + filler +
+        '<span class="product-price">$2.50</span>'
+        '<span class="stock-status">In stock</span>'
+        '<span class="product-discount">10% off</span>'
+        "</body></html>"
+    )
+
+async def probe_lag(samples: List[float], stop: asyncio.Event) -> None:
+    """Record how much later than requested the event loop resumes a sleeping task."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+async def run_mode(mode: str, args: argparse.Namespace, page: str) -> Dict[str, float]:
+    """Extract `args.pages` pages with `args.concurrency` concurrent scrapers."""
+    executor = create_parse_executor(mode, args.workers)
+    loop = asyncio.get_running_loop()
+    
+    async def extract() -> Dict[str, Optional[str]]:
+        if executor is None:
+            return extract_with(args.extractor, page, SELECTORS)
+        return await loop.run_in_executor(executor, extract_with, args.extractor, page, SELECTORS)
+    
+    try:
+        # Warm up the workers (process start-up is not part of the measurement)
+        if executor is not None:
+            await asyncio.gather(*(extract() for _ in range(args.workers or 4)))
+        
+        remaining = args.pages
+        
+        async def scraper() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await asyncio.sleep(0)  # stands in for the network round trip
+                result = await extract()
+                assert result["price"] == "$2.50"
+        
+        samples: List[float] = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_lag(samples, stop))
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(scraper() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        
+        stop.set()
+        await probe
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    samples.sort()
+    return {
+        "pages_per_second": args.pages / elapsed,
+        "lag_p50_ms": statistics.median(samples) * 1000 if samples else 0.0,
+        "lag_p99_ms": samples[min(len(samples) - 1, int(0.99 * len(samples)))] * 1000 if samples else 0.0,
+        "lag_max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--extractor", default="beautifulsoup", help="HTML extractor to benchmark")
+    parser.add_argument("--pages", type=int, default=200, help="Pages to extract per mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent scrapers")
+    parser.add_argument("--workers", type=int, default=None, help="Executor workers")
+    parser.add_argument("--filler", type=int, default=2000, help="Filler elements per page")
+    parser.add_argument("--modes", default="none,thread,process", help="Comma-separated executor modes")
+    args = parser.parse_args()
+    
+    page = build_page(args.filler)
+    print(f"extractor={args.extractor} pages={args.pages} concurrency={args.concurrency} "
+          f"page_size={len(page) // 1024}KiB")
+    print(f"{'mode':<10}{'pages/s':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for mode in args.modes.split(","):
+        result = await run_mode(mode, args, page)
+        print(
+            f"{mode:<10}{result['pages_per_second']:>10.1f}{result['lag_p50_ms']:>12.1f}"
+            f"{result['lag_p99_ms']:>12.1f}{result['lag_max_ms']:>12.1f}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
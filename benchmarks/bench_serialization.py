@@ -0,0 +1,98 @@
+"""
+Benchmark encoding /get_prices responses through the response models versus directly.
+
+Builds basket payloads of increasing size, as the router does, and
+times building an OptimizedBasketResponse and serializing it against
+encoding the plain payload with encode_payload(). Run from the project
+root:
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 100,1000 --repeat 50
+"""
+import argparse
+import statistics
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+from app.models.response import OptimizedBasketResponse
+from app.utils.serialization import encode_payload
+
+PLATFORMS = ["PlatformA", "PlatformB", "PlatformC", "PlatformD"]
+
+def build_payload(items: int) -> Dict[str, Any]:
+    """Build a basket payload with `items` items spread over the platforms."""
+    basket_items = []
+    for i in range(items):
+        platform = PLATFORMS[i % len(PLATFORMS)]
+        original = Decimal(f"{1 + i % 50}.{i % 100:02d}")
+        discount = (original * Decimal("0.1")).quantize(Decimal("0.01"))
+        basket_items.append({
+            "name": f"product {i}",
+            "platform": platform,
+            "original_price": original,
+            "discount": discount,
+            "final_price": original - discount,
+            "quantity": 1 + i % 3,
+            "unit": None,
+            "platform_specific_name": f"Product {i} 1L",
+            "product_id": str(i),
+            "url": f"https://example.com/{platform.lower()}/products/{i}",
+            "freshness": "fresh",
+            "price_age_seconds": float(i % 300),
+            "from_cache": i % 2 == 0,
+        })
+    
+    total = sum((item["final_price"] * item["quantity"] for item in basket_items), Decimal("0"))
+    return {
+        "total_price": total,
+        "savings": sum((item["discount"] * item["quantity"] for item in basket_items), Decimal("0")),
+        "items": basket_items,
+        "delivery_fee": Decimal("0.0"),
+        "delivery_fees": {platform: Decimal("0.0") for platform in PLATFORMS},
+        "total_cost": total,
+        "optimizer": "greedy",
+        "optimal": True,
+        "complete": True,
+        "incomplete_items": [],
+        "incomplete_platforms": [],
+    }
+
+def encode_with_model(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload the way the router did before: build the model, then serialize it."""
+    return OptimizedBasketResponse(**payload).model_dump_json().encode()
+
+def encode_direct(payload: Dict[str, Any]) -> bytes:
+    return encode_payload(OptimizedBasketResponse, payload)
+
+def time_encoder(encode: Callable[[Dict[str, Any]], bytes], payload: Dict[str, Any], repeat: int) -> List[float]:
+    """Return the time of each of `repeat` encodings of a payload, in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(payload)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,500,1000,5000", help="Comma-separated basket sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="Encodings per size and encoder")
+    args = parser.parse_args()
+    
+    print(f"{'items':>8}{'model ms':>12}{'direct ms':>12}{'speedup':>10}{'body KiB':>10}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        payload = build_payload(size)
+        
+        # Both encoders must produce the same document
+        body = encode_direct(payload)
+        assert body == encode_with_model(payload)
+        
+        model_ms = statistics.median(time_encoder(encode_with_model, payload, args.repeat)) * 1000
+        direct_ms = statistics.median(time_encoder(encode_direct, payload, args.repeat)) * 1000
+        print(
+            f"{size:>8}{model_ms:>12.2f}{direct_ms:>12.2f}"
+            f"{model_ms / direct_ms:>9.1f}x{len(body) // 1024:>10}"
+        )
+
+if __name__ == "__main__":
+    main()
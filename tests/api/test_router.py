@@ -0,0 +1,424 @@
+import asyncio
+import json
+import time
+from decimal import Decimal
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.endpoints import router as router_module
+from app.api.endpoints.router import _build_batch_result, router
+from app.core.config import settings
+from app.core.exceptions import OptimizationError
+from app.models.request import PriceComparisonRequest
+from app.services.mapping_store import get_product_mappings
+from app.services.prewarm import PopularityTracker, get_popularity_tracker
+from app.services import price_history as price_history_module
+from app.services.price_history import SECONDS_PER_DAY, PriceHistoryRecorder, PriceHistoryStore
+from app.services.price_matrix import PriceMatrix
+from app.services.price_optimizer import PriceOptimizerService
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import ResponseCache, get_response_cache
+from app.services.scraper_manager import ScraperManager
+
+MAPPINGS = {
+    "milk": {"PlatformA": {"product_id": "1", "product_name": "Whole Milk 1L"}},
+    "bread": {"PlatformA": {"product_id": "2", "product_name": "White Bread"}},
+    # Only on a platform that never answers, so baskets with eggs are incomplete
+    "eggs": {
+        "PlatformA": {"product_id": "3", "product_name": "Eggs 12"},
+        "PlatformB": {"product_id": "3", "product_name": "Eggs 12"},
+    },
+}
+
+class FailingOptimizer:
+    """Stands in for PriceOptimizerService, raising the given error for every basket."""
+    
+    def __init__(self, error: Exception):
+        self.error = error
+    
+    def optimize_basket(self, *args, **kwargs):
+        raise self.error
+
+def build_matrix() -> PriceMatrix:
+    return PriceMatrix.from_price_data({
+        "milk": {"PlatformA": {"final_price": Decimal("1.00")}}
+    })
+
+def test_batch_result_reports_optimization_errors():
+    basket = PriceComparisonRequest(items=[{"name": "milk"}])
+    result = _build_batch_result(FailingOptimizer(OptimizationError("no prices")), build_matrix(), basket, {}, 3)
+    
+    assert result["index"] == 3
+    assert result["basket"] is None
+    assert "no prices" in result["error"]
+
+def test_batch_result_reports_unexpected_errors_instead_of_raising():
+    basket = PriceComparisonRequest(items=[{"name": "milk"}])
+    result = _build_batch_result(FailingOptimizer(ValueError("bad cell")), build_matrix(), basket, {}, 1)
+    
+    assert result == {"index": 1, "basket": None, "error": "Unexpected error: bad cell"}
+
+@pytest.fixture
+def clock_targets():
+    return (response_cache_module, price_history_module)
+
+class FakeScraperManager:
+    """Stands in for ScraperManager, answering every product from PlatformA and counting scrapes."""
+    
+    scrapes = 0
+    
+    def __init__(self):
+        self.scrapers = {"PlatformA": None, "PlatformB": None}
+    
+    async def fetch_all_prices_and_discounts(self, mapped_products, deadline=None, matrix=None):
+        FakeScraperManager.scrapes += 1
+        price_data = {}
+        for name, platforms in mapped_products.items():
+            if "PlatformA" not in platforms:
+                continue
+            result = {
+                "product_name": platforms["PlatformA"]["product_name"],
+                "product_id": platforms["PlatformA"]["product_id"],
+                "original_price": Decimal("2.00"),
+                "discount": Decimal("0.0"),
+                "final_price": Decimal("2.00"),
+                "scraped_at": time.time() - 10,
+                "freshness": "fresh",
+                "price_age_seconds": 10.0,
+                "from_cache": False,
+            }
+            price_data[name] = {"PlatformA": result}
+            matrix.add(name, "PlatformA", result)
+        return price_data
+    
+    find_incomplete = ScraperManager.find_incomplete
+
+@pytest.fixture
+def popularity():
+    return PopularityTracker()
+
+def build_client(scraper_manager, popularity, response_cache):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[ScraperManager] = scraper_manager
+    app.dependency_overrides[get_product_mappings] = lambda: MAPPINGS
+    app.dependency_overrides[get_popularity_tracker] = lambda: popularity
+    app.dependency_overrides[get_response_cache] = lambda: response_cache
+    return TestClient(app)
+
+@pytest.fixture
+def client(popularity):
+    FakeScraperManager.scrapes = 0
+    return build_client(FakeScraperManager, popularity, ResponseCache())
+
+def test_get_prices_miss_hit_not_modified(client, popularity):
+    basket = {"items": [{"name": "milk"}, {"name": "bread", "quantity": 2}]}
+    
+    miss = client.post("/api/v1/get_prices", json=basket)
+    assert miss.status_code == 200
+    assert miss.headers["X-Cache"] == "MISS"
+    assert miss.json()["total_cost"] == "6.00"
+    etag = miss.headers["ETag"]
+    
+    hit = client.post("/api/v1/get_prices", json=basket)
+    assert hit.status_code == 200
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["ETag"] == etag
+    assert FakeScraperManager.scrapes == 1
+    
+    not_modified = client.post("/api/v1/get_prices", json=basket, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    
+    # Hits count as requests for pre-warming, as misses do
+    assert popularity.scores["milk"] == pytest.approx(3.0, rel=1e-3)
+
+def test_get_prices_hit_for_reordered_basket(client):
+    client.post("/api/v1/get_prices", json={"items": [{"name": "milk"}, {"name": "bread"}]})
+    hit = client.post("/api/v1/get_prices", json={"items": [{"name": "bread"}, {"name": "milk"}]})
+    
+    assert hit.headers["X-Cache"] == "HIT"
+    assert FakeScraperManager.scrapes == 1
+
+def test_get_prices_keeps_the_case_of_each_request(client):
+    client.post("/api/v1/get_prices", json={"items": [{"name": "milk"}]})
+    other_case = client.post("/api/v1/get_prices", json={"items": [{"name": "MILK"}]})
+    
+    assert other_case.headers["X-Cache"] == "MISS"
+    assert [item["name"] for item in other_case.json()["items"]] == ["MILK"]
+
+@pytest.mark.parametrize("if_none_match, modified", [
+    ("{etag}", False),
+    ('"other", {etag}', False),
+    ("W/{etag}", False),
+    ("*", False),
+    ('"other"', True),
+    ("{etag_prefix}", True),
+    ('"x{etag_body}"', True),
+])
+def test_get_prices_if_none_match(client, if_none_match, modified):
+    basket = {"items": [{"name": "milk"}]}
+    etag = client.post("/api/v1/get_prices", json=basket).headers["ETag"]
+    header = if_none_match.format(etag=etag, etag_prefix=etag[:-3] + '"', etag_body=etag[1:-1] + '"')
+    
+    response = client.post("/api/v1/get_prices", json=basket, headers={"If-None-Match": header})
+    assert response.status_code == (200 if modified else 304)
+
+def test_get_prices_hit_advances_price_ages(client, clock):
+    basket = {"items": [{"name": "milk"}]}
+    clock.now = time.time()
+    miss = client.post("/api/v1/get_prices", json=basket)
+    
+    clock.now += 30
+    hit = client.post("/api/v1/get_prices", json=basket)
+    
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["ETag"] == miss.headers["ETag"]
+    age = hit.json()["items"][0]["price_age_seconds"]
+    assert age == pytest.approx(miss.json()["items"][0]["price_age_seconds"] + 30, abs=1)
+
+def test_get_prices_caches_incomplete_responses_briefly(client, monkeypatch):
+    monkeypatch.setattr(response_cache_module.settings, "RESPONSE_CACHE_INCOMPLETE_TTL", 5)
+    basket = {"items": [{"name": "eggs"}]}
+    
+    miss = client.post("/api/v1/get_prices", json=basket)
+    assert miss.headers["X-Cache"] == "MISS"
+    assert miss.json()["incomplete_platforms"] == ["PlatformB"]
+    assert int(miss.headers["Cache-Control"].split("=")[1]) <= 5
+    
+    hit = client.post("/api/v1/get_prices", json=basket)
+    assert hit.headers["X-Cache"] == "HIT"
+    assert FakeScraperManager.scrapes == 1
+
+class LoopCheckingOptimizer(PriceOptimizerService):
+    """Optimizes as PriceOptimizerService does, failing if it is called on the event loop."""
+    
+    def optimize_basket(self, *args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return super().optimize_basket(*args, **kwargs)
+        raise AssertionError("Basket optimized on the event loop")
+
+@pytest.fixture
+def off_loop_client(client):
+    client.app.dependency_overrides[PriceOptimizerService] = LoopCheckingOptimizer
+    return client
+
+def test_batch_optimizes_baskets_off_the_event_loop(off_loop_client):
+    baskets = [{"items": [{"name": "milk"}]}, {"items": [{"name": "milk"}, {"name": "bread"}]}]
+    response = off_loop_client.post("/api/v1/get_prices/batch", json={"baskets": baskets})
+    
+    results = response.json()["results"]
+    assert [result["error"] for result in results] == [None, None]
+    assert [result["basket"]["total_cost"] for result in results] == ["2.00", "4.00"]
+    assert FakeScraperManager.scrapes == 1
+
+def test_streamed_batch_optimizes_baskets_off_the_event_loop(off_loop_client, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_STREAM_THRESHOLD", 1)
+    baskets = [{"items": [{"name": "milk"}]}, {"items": [{"name": "bread"}]}]
+    response = off_loop_client.post("/api/v1/get_prices/batch", json={"baskets": baskets})
+    
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["basket", "basket"]
+    assert [event["data"]["index"] for event in events] == [0, 1]
+    assert all(event["data"]["error"] is None for event in events)
+
+def test_get_prices_optimizes_off_the_event_loop(off_loop_client):
+    response = off_loop_client.post("/api/v1/get_prices", json={"items": [{"name": "milk"}]})
+    assert response.status_code == 200
+
+# Noon on 2024-10-04 (day 20000 since the epoch)
+HISTORY_DAY = 20000
+HISTORY_NOW = HISTORY_DAY * SECONDS_PER_DAY + 12 * 3600
+
+@pytest.fixture
+def history(tmp_path, monkeypatch, clock):
+    store = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    recorder = PriceHistoryRecorder(store)
+    monkeypatch.setattr(router_module, "get_price_history", lambda: recorder)
+    clock.now = HISTORY_NOW
+    yield store
+    store.close()
+
+def test_price_trend_reports_daily_aggregates(client, history):
+    history.write([
+        ("PlatformA", "1", HISTORY_NOW - SECONDS_PER_DAY, 260, 0, 260, True),
+        ("PlatformA", "1", HISTORY_NOW - 7200, 250, 0, 250, True),
+        ("PlatformA", "1", HISTORY_NOW - 3600, 230, 0, 230, True),
+        ("PlatformA", "2", HISTORY_NOW, 999, 0, 999, True),
+    ])
+    
+    response = client.get("/api/v1/price_history/Milk/trend", params={"days": 1})
+    assert response.status_code == 200
+    assert response.json() == {
+        "product": "milk",
+        "days": 1,
+        "platforms": {"PlatformA": [{
+            "date": "2024-10-04",
+            "min_price": "2.30",
+            "max_price": "2.50",
+            "avg_price": "2.40",
+            "last_price": "2.30",
+            "samples": 2,
+        }]},
+    }
+    
+    two_days = client.get("/api/v1/price_history/milk/trend", params={"days": 2}).json()
+    assert [day["date"] for day in two_days["platforms"]["PlatformA"]] == ["2024-10-03", "2024-10-04"]
+
+def test_lowest_price_compares_the_current_price(client, history):
+    history.write([
+        ("PlatformA", "1", HISTORY_NOW - 3 * SECONDS_PER_DAY, 150, 0, 150, True),
+        ("PlatformA", "1", HISTORY_NOW - SECONDS_PER_DAY, 200, 0, 200, True),
+        ("PlatformA", "1", HISTORY_NOW - 3600, 230, 0, 230, True),
+    ])
+    
+    lowest = client.get("/api/v1/price_history/milk/lowest", params={"days": 2}).json()
+    assert lowest["lowest"] == {
+        "platform": "PlatformA",
+        "product_id": "1",
+        "lowest_price": "2.00",
+        "lowest_on": "2024-10-03",
+        "current_price": "2.30",
+        "is_lowest": False,
+    }
+    assert lowest["platforms"] == {"PlatformA": lowest["lowest"]}
+    
+    history.write([("PlatformA", "1", HISTORY_NOW, 190, 0, 190, True)])
+    lowest = client.get("/api/v1/price_history/milk/lowest", params={"days": 2}).json()
+    assert lowest["lowest"]["lowest_price"] == "1.90"
+    assert lowest["lowest"]["is_lowest"] is True
+
+def test_price_history_endpoints_report_unknown_products_and_disabled_history(client, history, monkeypatch):
+    assert client.get("/api/v1/price_history/caviar/trend").status_code == 404
+    
+    monkeypatch.setattr(router_module, "get_price_history", lambda: None)
+    assert client.get("/api/v1/price_history/milk/lowest").status_code == 503
+
+class DelayedScraper:
+    """Stands in for a platform scraper, answering every product at a fixed price after a delay."""
+    
+    supports_batch = False
+    
+    def __init__(self, price: str, delay: float = 0.0, cached_price=None):
+        self.price = Decimal(price)
+        self.delay = delay
+        self.cached_price = Decimal(cached_price) if cached_price is not None else None
+    
+    def snapshot(self, product_id, price, scraped_at):
+        return {
+            "product_id": product_id,
+            "product_name": f"Product {product_id}",
+            "price": price,
+            "discount": Decimal("0"),
+            "discount_type": None,
+            "in_stock": True,
+            "url": None,
+            "scraped_at": scraped_at,
+        }
+    
+    async def get_snapshot(self, product_id, product_name):
+        await asyncio.sleep(self.delay)
+        return self.snapshot(product_id, self.price, time.time())
+    
+    def peek_snapshot(self, product_id):
+        if self.cached_price is None:
+            return None
+        return self.snapshot(product_id, self.cached_price, time.time() - 60)
+    
+    def get_freshness(self, snapshot):
+        return "fresh", time.time() - snapshot["scraped_at"]
+
+class StubRegistry:
+    def __init__(self, scrapers):
+        self.scrapers = scrapers
+
+@pytest.fixture
+def slow_platform_client(popularity):
+    """Builds uncached clients whose PlatformA answers at once, with the given PlatformB scraper."""
+    def build(platform_b: DelayedScraper):
+        registry = StubRegistry({"PlatformA": DelayedScraper("2.00"), "PlatformB": platform_b})
+        return build_client(lambda: ScraperManager(registry=registry, history=None), popularity, None)
+    return build
+
+def test_get_prices_reports_platforms_missing_the_deadline(slow_platform_client):
+    client = slow_platform_client(DelayedScraper("1.00", delay=2.0))
+    started = time.monotonic()
+    response = client.post("/api/v1/get_prices", params={"deadline_ms": 100}, json={"items": [{"name": "eggs"}]})
+    
+    assert time.monotonic() - started < 1.5
+    assert response.headers["X-Cache"] == "BYPASS"
+    basket = response.json()
+    assert basket["complete"] is False
+    assert basket["incomplete_items"] == ["eggs"]
+    assert basket["incomplete_platforms"] == ["PlatformB"]
+    assert [(item["platform"], item["final_price"]) for item in basket["items"]] == [("PlatformA", "2.00")]
+
+def test_get_prices_uses_cached_prices_of_platforms_missing_the_deadline(slow_platform_client):
+    client = slow_platform_client(DelayedScraper("1.00", delay=2.0, cached_price="1.50"))
+    response = client.post("/api/v1/get_prices", params={"deadline_ms": 100}, json={"items": [{"name": "eggs"}]})
+    
+    basket = response.json()
+    assert basket["complete"] is True
+    assert basket["incomplete_platforms"] == []
+    item = basket["items"][0]
+    assert (item["platform"], item["final_price"], item["from_cache"]) == ("PlatformB", "1.50", True)
+    assert item["price_age_seconds"] == pytest.approx(60, abs=5)
+
+def test_get_prices_waits_for_platforms_within_the_deadline(slow_platform_client):
+    client = slow_platform_client(DelayedScraper("1.00", delay=0.05))
+    response = client.post("/api/v1/get_prices", params={"deadline_ms": 2000}, json={"items": [{"name": "eggs"}]})
+    
+    basket = response.json()
+    assert basket["complete"] is True
+    assert [(item["platform"], item["final_price"]) for item in basket["items"]] == [("PlatformB", "1.00")]
+
+def stream_events(response):
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_stream_emits_prices_as_platforms_answer_then_the_basket(slow_platform_client):
+    client = slow_platform_client(DelayedScraper("1.00", delay=0.2))
+    response = client.post(
+        "/api/v1/get_prices/stream",
+        params={"deadline_ms": 2000},
+        json={"items": [{"name": "eggs"}, {"name": "milk", "quantity": 2}]}
+    )
+    
+    events = stream_events(response)
+    assert [event["event"] for event in events] == ["price", "price", "price", "basket"]
+    assert all(set(event) == {"event", "data"} for event in events)
+    # PlatformA answers first for both items, the slower PlatformB last
+    prices = [(event["data"]["name"], event["data"]["platform"]) for event in events[:3]]
+    assert sorted(prices[:2]) == [("eggs", "PlatformA"), ("milk", "PlatformA")]
+    assert prices[2] == ("eggs", "PlatformB")
+    assert events[2]["data"]["final_price"] == "1.00"
+    assert events[2]["data"]["in_stock"] is True
+    
+    basket = events[3]["data"]
+    assert basket["complete"] is True
+    assert basket["total_price"] == "5.00"
+    assert [(item["name"], item["platform"]) for item in basket["items"]] == [("eggs", "PlatformB"), ("milk", "PlatformA")]
+
+def test_stream_reports_platforms_missing_the_deadline(slow_platform_client):
+    client = slow_platform_client(DelayedScraper("1.00", delay=2.0))
+    response = client.post("/api/v1/get_prices/stream", params={"deadline_ms": 100}, json={"items": [{"name": "eggs"}]})
+    
+    events = stream_events(response)
+    assert [(event["event"], event["data"].get("platform")) for event in events] == [
+        ("price", "PlatformA"), ("basket", None)
+    ]
+    assert events[1]["data"]["complete"] is False
+    assert events[1]["data"]["incomplete_platforms"] == ["PlatformB"]
+
+def test_stream_ends_with_an_error_event_when_optimizing_fails(slow_platform_client):
+    client = slow_platform_client(DelayedScraper("1.00"))
+    client.app.dependency_overrides[PriceOptimizerService] = lambda: FailingOptimizer(OptimizationError("no prices"))
+    response = client.post("/api/v1/get_prices/stream", json={"items": [{"name": "milk"}]})
+    
+    events = stream_events(response)
+    assert [event["event"] for event in events] == ["price", "error"]
+    assert "no prices" in events[1]["data"]["detail"]
@@ -0,0 +1,31 @@
+import os
+import pytest
+
+# Settings are read when app modules are first imported; the platform URLs are required
+for platform in "ABCD":
+    os.environ.setdefault(f"PLATFORM_{platform}_URL", f"http://platform-{platform.lower()}.test")
+
+class Clock:
+    """Stands in for the time module of the modules under test."""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def monotonic(self) -> float:
+        return self.now
+    
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock_targets():
+    """Modules whose time module the clock fixture replaces; test modules override this."""
+    return ()
+
+@pytest.fixture
+def clock(clock_targets, monkeypatch):
+    """A clock that only moves when a test advances `clock.now`, for every module of clock_targets."""
+    clock = Clock()
+    for module in clock_targets:
+        monkeypatch.setattr(module, "time", clock)
+    return clock
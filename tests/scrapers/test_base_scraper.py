@@ -0,0 +1,324 @@
+import asyncio
+import aiohttp
+import pytest
+from app.core.exceptions import RateLimitExceededError, ScrapingError
+from app.scrapers.base_scraper import BaseScraper
+from app.utils.rate_limiter import PlatformRateLimiter
+from app.utils.cache import BoundedTTLCache
+from app.utils.resilience import CircuitBreaker
+
+class StubScraper(BaseScraper):
+    def _get_platform_name(self) -> str:
+        return "TestPlatform"
+    
+    def _get_base_url(self) -> str:
+        return "http://test-platform.test"
+    
+    async def _scrape_snapshot(self, product_id: str, product_name: str):
+        raise NotImplementedError
+
+class FailingSession:
+    """Session whose requests fail with a given exception."""
+    
+    closed = False
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+    
+    def get(self, url, headers=None):
+        raise self.error
+
+class ScriptedResponse:
+    """aiohttp response with a given status, headers and body."""
+    
+    def __init__(self, status: int, body: str = "", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+    
+    def raise_for_status(self):
+        pass
+    
+    async def text(self):
+        return self.body
+
+class ScriptedSession:
+    """Session answering requests with the given responses in turn, recording the request headers."""
+    
+    closed = False
+    
+    def __init__(self, *responses: ScriptedResponse):
+        self.responses = list(responses)
+        self.requests = []
+    
+    def get(self, url, headers=None):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+def scripted_scraper(*responses: ScriptedResponse) -> StubScraper:
+    scraper = StubScraper(rate_limiter=PlatformRateLimiter("TestPlatform", rate=100, burst=100, max_concurrency=4))
+    scraper.session = ScriptedSession(*responses)
+    return scraper
+
+def half_open_scraper(max_concurrency: int = 4) -> StubScraper:
+    """Return a scraper whose circuit is half-open, waiting for a probe."""
+    scraper = StubScraper(
+        rate_limiter=PlatformRateLimiter("TestPlatform", rate=100, burst=100, max_concurrency=max_concurrency)
+    )
+    breaker = scraper.circuit_breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+    return scraper
+
+def test_probe_cancelled_while_queued_for_a_slot_is_released():
+    async def main():
+        scraper = half_open_scraper(max_concurrency=1)
+        await scraper.rate_limiter.concurrency.acquire()  # every slot is taken
+        
+        probe = asyncio.create_task(scraper._request("http://test-platform.test/p/1"))
+        await asyncio.sleep(0)
+        assert scraper.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return scraper.circuit_breaker.allow_request()
+    
+    assert asyncio.run(main())
+
+def test_probe_rejected_by_the_rate_limiter_is_released():
+    async def main():
+        scraper = half_open_scraper()
+        scraper.rate_limiter.on_throttle(retry_after=3600)
+        
+        with pytest.raises(RateLimitExceededError):
+            await scraper._request("http://test-platform.test/p/1")
+        return scraper.circuit_breaker
+    
+    breaker = asyncio.run(main())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+def test_probe_failing_with_an_unexpected_error_reopens_the_circuit():
+    async def main():
+        scraper = half_open_scraper()
+        scraper.session = FailingSession(aiohttp.ClientPayloadError("truncated body"))
+        
+        with pytest.raises(aiohttp.ClientPayloadError):
+            await scraper._request("http://test-platform.test/p/1")
+        return scraper.circuit_breaker
+    
+    breaker = asyncio.run(main())
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_probe_timing_out_reopens_the_circuit():
+    async def main():
+        scraper = half_open_scraper()
+        scraper.session = FailingSession(asyncio.TimeoutError())
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await scraper._request("http://test-platform.test/p/1")
+        return scraper
+    
+    scraper = asyncio.run(main())
+    assert scraper.circuit_breaker.state == CircuitBreaker.OPEN
+    assert scraper.rate_limiter.throttled == 1
+
+URL = "http://test-platform.test/p/1"
+
+def fetch_parsed(scraper: StubScraper, times: int = 1):
+    """Fetch URL the given number of times, returning the parsed results and the number of parses."""
+    parses = []
+    
+    async def parse(body):
+        parses.append(body)
+        return {"body": body}
+    
+    async def main():
+        return [await scraper._fetch_parsed(URL, parse) for _ in range(times)]
+    
+    return asyncio.run(main()), parses
+
+def test_fetch_parsed_stores_the_validators_of_a_response():
+    validators = {"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    scraper = scripted_scraper(ScriptedResponse(200, "<p>1.00</p>", validators))
+    
+    results, _ = fetch_parsed(scraper)
+    assert results == [{"body": "<p>1.00</p>"}]
+    assert scraper.validators.get(URL) == (
+        {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        {"body": "<p>1.00</p>"}
+    )
+
+def test_fetch_parsed_reuses_the_parsed_result_on_not_modified():
+    scraper = scripted_scraper(ScriptedResponse(200, "<p>1.00</p>", {"ETag": '"v1"'}), ScriptedResponse(304))
+    
+    results, parses = fetch_parsed(scraper, times=2)
+    assert results == [{"body": "<p>1.00</p>"}] * 2
+    assert parses == ["<p>1.00</p>"]
+    assert scraper.session.requests == [{}, {"If-None-Match": '"v1"'}]
+    assert scraper.not_modified == 1
+
+def test_fetch_parsed_drops_validators_the_page_no_longer_has():
+    scraper = scripted_scraper(ScriptedResponse(200, "v1", {"ETag": '"v1"'}), ScriptedResponse(200, "v2"))
+    
+    results, _ = fetch_parsed(scraper, times=2)
+    assert results == [{"body": "v1"}, {"body": "v2"}]
+    assert scraper.validators.get(URL) is None
+
+def test_fetch_parsed_falls_back_to_a_full_get_without_a_result_to_reuse():
+    scraper = scripted_scraper(ScriptedResponse(304), ScriptedResponse(200, "<p>1.00</p>", {"ETag": '"v1"'}))
+    
+    results, parses = fetch_parsed(scraper)
+    assert results == [{"body": "<p>1.00</p>"}]
+    assert parses == ["<p>1.00</p>"]
+    assert scraper.session.requests == [{}, {"Cache-Control": "no-cache"}]
+    assert scraper.not_modified == 0
+
+def test_fetch_parsed_fails_when_the_full_get_is_not_modified_either():
+    scraper = scripted_scraper(ScriptedResponse(304), ScriptedResponse(304))
+    
+    with pytest.raises(ScrapingError):
+        fetch_parsed(scraper)
+
+class OpenSession:
+    """Session that is never used, so scrapers do not open a real one."""
+    
+    closed = False
+
+class RecordingScraper(StubScraper):
+    """Scraper answering from a price list, recording its single and batch scrapes."""
+    
+    def __init__(self, batch_size=0, prices=None, fail_batches=False, delay=0.0):
+        super().__init__(
+            cache=BoundedTTLCache(ttl=60, stale_ttl=600),
+            rate_limiter=PlatformRateLimiter("TestPlatform", rate=1000, burst=1000, max_concurrency=100)
+        )
+        self.batch_size = batch_size
+        self.session = OpenSession()
+        self.prices = prices or {}
+        self.fail_batches = fail_batches
+        self.delay = delay
+        self.singles = []
+        self.batches = []
+        self.running = 0
+        self.max_running = 0
+    
+    def snapshot(self, product_id):
+        return {"product_id": product_id, "price": self.prices.get(product_id, 1), "discount": 0, "discount_type": "none"}
+    
+    async def _scrape_snapshot(self, product_id, product_name):
+        self.singles.append(product_id)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return self.snapshot(product_id)
+    
+    async def _scrape_many(self, products):
+        self.batches.append(list(products))
+        await asyncio.sleep(self.delay)
+        if self.fail_batches:
+            raise RuntimeError("batch endpoint down")
+        # The platform does not know product "x"
+        return {product_id: self.snapshot(product_id) for product_id in products if product_id != "x"}
+
+def products(*product_ids):
+    return {product_id: f"Product {product_id}" for product_id in product_ids}
+
+def test_fetch_many_scrapes_in_batches_of_batch_size():
+    scraper = RecordingScraper(batch_size=2)
+    results = asyncio.run(scraper.fetch_many(products("1", "2", "3", "4", "5")))
+    
+    assert sorted(results) == ["1", "2", "3", "4", "5"]
+    assert scraper.batches == [["1", "2"], ["3", "4"], ["5"]]
+    assert scraper.singles == []
+    assert scraper.batch_requests == 3
+    assert scraper.peek_snapshot("5")["product_id"] == "5"
+
+def test_fetch_many_uses_the_cache_and_refreshes_stale_snapshots_in_batches():
+    scraper = RecordingScraper(batch_size=10)
+    
+    async def main():
+        scraper.cache.set(scraper._cache_key("1"), scraper.snapshot("1"))
+        scraper.cache.set(scraper._cache_key("2"), {**scraper.snapshot("2"), "price": 7}, ttl=0)
+        results = await scraper.fetch_many(products("1", "2", "3"))
+        # The stale snapshot is served as is, then refreshed in the background
+        stale_price = results["2"]["price"]
+        await asyncio.gather(*scraper._refresh_tasks)
+        return stale_price
+    
+    assert asyncio.run(main()) == 7
+    assert scraper.batches == [["3"], ["2"]]
+    assert scraper.peek_snapshot("2")["price"] == 1
+
+def test_fetch_many_leaves_out_products_it_cannot_scrape():
+    scraper = RecordingScraper(batch_size=10)
+    assert sorted(asyncio.run(scraper.fetch_many(products("1", "x")))) == ["1"]
+    
+    failing = RecordingScraper(batch_size=10, fail_batches=True)
+    assert asyncio.run(failing.fetch_many(products("1", "2"))) == {}
+
+def test_fetch_many_joins_scrapes_already_in_flight():
+    scraper = RecordingScraper(batch_size=10, delay=0.01)
+    
+    async def main():
+        single = asyncio.create_task(scraper.get_snapshot("1", "Product 1"))
+        await asyncio.sleep(0)
+        results = await scraper.fetch_many(products("1", "2"))
+        return await single, results
+    
+    single, results = asyncio.run(main())
+    assert results["1"] == single
+    assert scraper.singles == ["1"]
+    assert scraper.batches == [["2"]]
+
+def test_fetch_many_fans_out_on_platforms_without_batches():
+    scraper = RecordingScraper(delay=0.01)
+    results = asyncio.run(scraper.fetch_many(products("1", "2", "3", "4")))
+    
+    assert sorted(results) == ["1", "2", "3", "4"]
+    assert sorted(scraper.singles) == ["1", "2", "3", "4"]
+    assert scraper.max_running == 4
+    assert scraper.batches == []
+
+@pytest.mark.parametrize("batch_size", [0, 2])
+def test_refresh_many_rescrapes_fresh_snapshots(batch_size):
+    scraper = RecordingScraper(batch_size=batch_size, prices={"1": 5, "2": 6, "3": 7})
+    
+    async def main():
+        for product_id in ("1", "2", "3"):
+            scraper.cache.set(scraper._cache_key(product_id), {**scraper.snapshot(product_id), "price": 0})
+        return await scraper.refresh_many(products("1", "2", "3", "x"))
+    
+    refreshed = asyncio.run(main())
+    assert [scraper.peek_snapshot(product_id)["price"] for product_id in ("1", "2", "3")] == [5, 6, 7]
+    if batch_size:
+        # "x" is missing from the batch response
+        assert refreshed == 3
+        assert scraper.batches == [["1", "2"], ["3", "x"]]
+    else:
+        assert refreshed == 4
+        assert sorted(scraper.singles) == ["1", "2", "3", "x"]
+
+def test_refresh_many_skips_products_in_flight():
+    scraper = RecordingScraper(batch_size=10, delay=0.01)
+    
+    async def main():
+        single = asyncio.create_task(scraper.get_snapshot("1", "Product 1"))
+        await asyncio.sleep(0)
+        refreshed = await scraper.refresh_many(products("1", "2"))
+        await single
+        return refreshed
+    
+    assert asyncio.run(main()) == 1
+    assert scraper.singles == ["1"]
+    assert scraper.batches == [["2"]]
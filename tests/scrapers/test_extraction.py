@@ -0,0 +1,137 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from app.core.exceptions import ConfigurationError
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.extraction import (
+    EXTRACTORS,
+    BeautifulSoupExtractor,
+    SimpleSelector,
+    TagScanExtractor,
+    create_parse_executor,
+    get_extractor,
+)
+
+SELECTORS = {
+    "price": ".product-price",
+    "title": "h1#title",
+    "discount": "span.discount.active",
+}
+
+PAGES = {
+    "plain": (
+        '<html><body><h1 id="title">Whole Milk</h1>'
+        '<span class="product-price">$2.50</span>'
+        '<span class="discount active">10%</span></body></html>'
+    ),
+    "comment before match": (
+        '<!-- <span class="product-price">0.00</span> -->'
+        '<span class="product-price">$9.99</span>'
+    ),
+    "comment inside match": '<span class="product-price">$9.<!-- old -->99</span>',
+    "script before match": (
+        '<script>var tpl = "<span class=\'product-price\'>1.00</span>";</script>'
+        '<span class="product-price">$2.00</span>'
+    ),
+    "script inside match": '<span class="product-price">$9<script>var a = 1;</script>.99</span>',
+    "style before match": '<style>.product-price { color: red }</style><span class="product-price">$3.00</span>',
+    "cdata before match": '<![CDATA[<span class="product-price">1</span>]]><span class="product-price">$4.00</span>',
+    "anchor in text and attributes": (
+        '<p data-field="product-price">see product-price below</p>'
+        '<div class="product-price-old">$5.00</div><span class="product-price">$4.50</span>'
+    ),
+    "nested tags": (
+        '<div class="product-price"><span class="currency">$</span>'
+        '<div><div>7</div></div>.<b>25</b></div><div class="product-price">0.00</div>'
+    ),
+    "first of many": '<span class="product-price">$1.00</span><span class="product-price">$2.00</span>',
+    "classes in other order": '<span class="active sale discount">20%</span>',
+    "missing selectors": '<html><body><p class="description">No prices here</p></body></html>',
+    "empty element": '<h1 id="title"></h1><span class="product-price"/>',
+}
+
+def available_extractors():
+    names = []
+    for name in EXTRACTORS:
+        try:
+            get_extractor(name)
+        except ConfigurationError:
+            continue
+        names.append(name)
+    return names
+
+@pytest.mark.parametrize("extractor_name", available_extractors())
+@pytest.mark.parametrize("page", list(PAGES))
+def test_extractors_match_beautifulsoup(extractor_name, page):
+    expected = BeautifulSoupExtractor().extract(PAGES[page], SELECTORS)
+    assert get_extractor(extractor_name).extract(PAGES[page], SELECTORS) == expected
+
+def test_tagscan_skips_commented_out_prices():
+    html = '<!-- <span class="product-price">0.00</span> --><span class="product-price">$9.99</span>'
+    assert TagScanExtractor().extract(html, {"price": ".product-price"}) == {"price": "$9.99"}
+
+def test_tagscan_delegates_complex_selectors():
+    html = '<ul class="prices"><li>$1.00</li><li>$2.00</li></ul><span class="unit">1L</span>'
+    results = TagScanExtractor().extract(html, {"second": "ul.prices li:nth-of-type(2)", "unit": ".unit"})
+    assert results == {"second": "$2.00", "unit": "1L"}
+
+@pytest.mark.parametrize("selector, parsed", [
+    ("span", ("span", None, ())),
+    ("DIV.price", ("div", None, ("price",))),
+    ("#title", (None, "title", ())),
+    ("span#p.a.b", ("span", "p", ("a", "b"))),
+])
+def test_simple_selector_parse(selector, parsed):
+    simple = SimpleSelector.parse(selector)
+    assert (simple.tag, simple.id, simple.classes) == parsed
+
+@pytest.mark.parametrize("selector", ["", "div > span", "ul li", "a[href]", "li:first-child"])
+def test_simple_selector_rejects_complex_selectors(selector):
+    assert SimpleSelector.parse(selector) is None
+
+def test_get_extractor_rejects_unknown_names():
+    with pytest.raises(ConfigurationError):
+        get_extractor("regex")
+
+class InlineScraper(BaseScraper):
+    def _get_platform_name(self) -> str:
+        return "TestPlatform"
+    
+    def _get_base_url(self) -> str:
+        return "http://test-platform.test"
+    
+    async def _scrape_snapshot(self, product_id: str, product_name: str):
+        raise NotImplementedError
+
+def test_parse_executor_none_parses_inline():
+    assert create_parse_executor("none") is None
+
+@pytest.mark.parametrize("kind, executor_type", [("thread", ThreadPoolExecutor), ("process", ProcessPoolExecutor)])
+def test_parse_executors_extract_like_inline_parsing(kind, executor_type):
+    executor = create_parse_executor(kind, workers=1)
+    try:
+        assert isinstance(executor, executor_type)
+        
+        async def main():
+            inline = InlineScraper()
+            offloaded = InlineScraper(parse_executor=executor)
+            return [
+                (await inline._extract(PAGES[page], SELECTORS), await offloaded._extract(PAGES[page], SELECTORS))
+                for page in ("plain", "nested tags", "missing selectors")
+            ]
+        
+        for inline, offloaded in asyncio.run(main()):
+            assert offloaded == inline
+    finally:
+        executor.shutdown()
+
+def test_process_executor_spawns_its_workers():
+    executor = create_parse_executor("process", workers=1)
+    try:
+        assert executor._mp_context.get_start_method() == "spawn"
+    finally:
+        executor.shutdown()
+
+def test_create_parse_executor_rejects_unknown_kinds():
+    with pytest.raises(ConfigurationError):
+        create_parse_executor("fork")
@@ -0,0 +1,83 @@
+import json
+from decimal import Decimal
+import pytest
+from app.core.config import settings
+from app.core.exceptions import ConfigurationError
+from app.scrapers.base_scraper import NO_DISCOUNT
+from app.scrapers.spec import load_scraper_specs
+
+def write_specs(tmp_path, specs):
+    path = tmp_path / "scrapers.json"
+    path.write_text(json.dumps(specs))
+    return str(path)
+
+def spec(**overrides):
+    return {"base_url_setting": "PLATFORM_A_URL", "selectors": {"price": ".price"}, **overrides}
+
+def test_loads_the_enabled_specs_of_the_config_file():
+    specs = load_scraper_specs("config/scrapers.json")
+    
+    assert list(specs) == ["PlatformA"]
+    platform_a = specs["PlatformA"]
+    assert platform_a.base_url == settings.PLATFORM_A_URL.rstrip("/")
+    assert platform_a.selectors == {
+        "price": "span.product-price",
+        "stock": "span.stock-status",
+        "discount": "span.product-discount",
+    }
+    assert platform_a.build_url("123", "Whole Milk") == f"{platform_a.base_url}/products/123"
+
+def test_builds_urls_with_quoted_ids_and_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PLATFORM_A_URL", "http://shop.test/")
+    path = write_specs(tmp_path, {"PlatformA": spec(url_template="{base_url}/search/{product_name}/{product_id}")})
+    
+    compiled = load_scraper_specs(path)["PlatformA"]
+    assert compiled.build_url("a/b 1", "Whole Milk & Co") == "http://shop.test/search/Whole%20Milk%20%26%20Co/a%2Fb%201"
+
+def test_builds_batch_urls(tmp_path):
+    batch = {"url_template": "{base_url}/api/products?ids={product_ids}", "id_separator": ";", "max_size": 20}
+    compiled = load_scraper_specs(write_specs(tmp_path, {"PlatformA": spec(batch=batch)}))["PlatformA"]
+    
+    assert compiled.batch_size == 20
+    assert compiled.build_batch_url(["1", "2 3"]) == f"{compiled.base_url}/api/products?ids=1;2%203"
+
+def test_parses_prices_and_discounts_with_the_spec_patterns(tmp_path):
+    compiled = load_scraper_specs(write_specs(tmp_path, {"PlatformA": spec(currency="EUR", in_stock_text="available")}))["PlatformA"]
+    
+    assert compiled.parse_price({"price": "Now 1,299.50", "stock": "Available now"}) == {
+        "price": Decimal("1299.50"), "currency": "EUR", "in_stock": True
+    }
+    assert compiled.parse_price({"price": "2.00", "stock": "Sold out"})["in_stock"] is False
+    assert compiled.parse_discount({"discount": "15% off"}) == {"discount": Decimal("15"), "discount_type": "percentage"}
+    assert compiled.parse_discount({"discount": "Save $0.50"}) == {"discount": Decimal("0.50"), "discount_type": "absolute"}
+    assert compiled.parse_discount({"discount": None}) == NO_DISCOUNT
+    with pytest.raises(ValueError):
+        compiled.parse_price({"price": "call us"})
+
+def test_skips_disabled_specs(tmp_path):
+    specs = load_scraper_specs(write_specs(tmp_path, {
+        "PlatformA": spec(),
+        "PlatformB": spec(base_url_setting="PLATFORM_B_URL", enabled=False),
+    }))
+    assert list(specs) == ["PlatformA"]
+
+@pytest.mark.parametrize("specs", [
+    {"PlatformA": {"base_url_setting": "PLATFORM_A_URL"}},
+    {"PlatformA": spec(base_url_setting="PLATFORM_Z_URL")},
+    {"PlatformA": spec(price_pattern="(unclosed")},
+    {"PlatformA": spec(url_template="{base_url}/{sku}")},
+    {"PlatformA": spec(batch={"url_template": "{base_url}/{ids}"})},
+    {"PlatformA": spec(batch={"url_template": "{base_url}/{product_ids}", "numeric_discount_type": "bogo"})},
+])
+def test_rejects_invalid_specs(tmp_path, specs):
+    with pytest.raises(ConfigurationError):
+        load_scraper_specs(write_specs(tmp_path, specs))
+
+def test_rejects_missing_or_malformed_files(tmp_path):
+    with pytest.raises(ConfigurationError):
+        load_scraper_specs(str(tmp_path / "missing.json"))
+    
+    path = tmp_path / "broken.json"
+    path.write_text("{")
+    with pytest.raises(ConfigurationError):
+        load_scraper_specs(str(path))
@@ -0,0 +1,103 @@
+import itertools
+import random
+from typing import List, Optional
+import numpy as np
+import pytest
+from app.services.exact_optimizer import DeliveryTerms, ExactBasketSolver
+
+def basket_cost(
+    costs: np.ndarray,
+    available: np.ndarray,
+    terms: List[DeliveryTerms],
+    assignment,
+    max_platforms: Optional[int]
+) -> Optional[int]:
+    """Return the total cost of an assignment of platforms to items, or None if it is infeasible."""
+    subtotals = {}
+    for item, platform in enumerate(assignment):
+        if not available[item, platform]:
+            return None
+        subtotals[platform] = subtotals.get(platform, 0) + int(costs[item, platform])
+    
+    if max_platforms is not None and len(subtotals) > max_platforms:
+        return None
+    if any(subtotal < terms[platform].min_order for platform, subtotal in subtotals.items()):
+        return None
+    return sum(subtotal + terms[platform].fee_for(subtotal) for platform, subtotal in subtotals.items())
+
+def brute_force(
+    costs: np.ndarray,
+    available: np.ndarray,
+    terms: List[DeliveryTerms],
+    max_platforms: Optional[int]
+) -> Optional[int]:
+    n_items, n_platforms = costs.shape
+    totals = [
+        basket_cost(costs, available, terms, assignment, max_platforms)
+        for assignment in itertools.product(range(n_platforms), repeat=n_items)
+    ]
+    feasible = [total for total in totals if total is not None]
+    return min(feasible) if feasible else None
+
+def random_instance(rng: random.Random):
+    n_items = rng.randint(1, 6)
+    n_platforms = rng.randint(1, 4)
+    costs = np.array([[rng.randint(50, 2000) for _ in range(n_platforms)] for _ in range(n_items)], dtype=np.int64)
+    available = np.array([[rng.random() > 0.2 for _ in range(n_platforms)] for _ in range(n_items)])
+    terms = [
+        DeliveryTerms(
+            fee=rng.choice([0, 199, 299, 499]),
+            free_delivery_threshold=rng.choice([None, 1000, 2500]),
+            min_order=rng.choice([0, 0, 500, 1500])
+        )
+        for _ in range(n_platforms)
+    ]
+    max_platforms = rng.choice([None, 1, 2])
+    return costs, available, terms, max_platforms
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_brute_force_on_small_instances(seed):
+    costs, available, terms, max_platforms = random_instance(random.Random(seed))
+    
+    expected = brute_force(costs, available, terms, max_platforms)
+    result = ExactBasketSolver().solve(costs, available, terms, max_platforms)
+    
+    if expected is None:
+        assert result is None
+        return
+    
+    assignment, total = result
+    assert basket_cost(costs, available, terms, assignment.tolist(), max_platforms) == total
+    assert total == expected
+
+def test_free_delivery_threshold_can_make_one_platform_cheaper():
+    costs = np.array([[1000, 900], [1000, 950]])
+    terms = [DeliveryTerms(fee=500, free_delivery_threshold=2000), DeliveryTerms(fee=500)]
+    
+    assignment, total = ExactBasketSolver().solve(costs, np.ones(costs.shape, dtype=bool), terms)
+    assert assignment.tolist() == [0, 0]
+    assert total == 2000
+
+def test_rejects_baskets_priced_by_more_platforms_than_the_limit():
+    costs = np.full((2, 3), 100)
+    with pytest.raises(ValueError):
+        ExactBasketSolver(platform_limit=2).solve(costs, np.ones(costs.shape, dtype=bool), [DeliveryTerms()] * 3)
+
+def test_platforms_pricing_nothing_do_not_count_towards_the_limit():
+    costs = np.array([[100, 200, 0], [300, 150, 0]])
+    available = np.array([[True, True, False], [True, True, False]])
+    
+    assignment, total = ExactBasketSolver(platform_limit=2).solve(costs, available, [DeliveryTerms()] * 3)
+    assert assignment.tolist() == [0, 1]
+    assert total == 250
+
+def test_long_baskets_search_without_recursion():
+    rng = random.Random(7)
+    costs = np.array([[rng.randint(50, 2000) for _ in range(3)] for _ in range(2000)], dtype=np.int64)
+    available = np.ones(costs.shape, dtype=bool)
+    # Minimum orders above what each platform gets as the cheapest one,
+    # so the items are searched over
+    terms = [DeliveryTerms(fee=299, min_order=int(costs[:, p].sum() // 4)) for p in range(3)]
+    
+    assignment, total = ExactBasketSolver().solve(costs, available, terms)
+    assert basket_cost(costs, available, terms, assignment.tolist(), None) == total
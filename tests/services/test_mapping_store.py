@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+import pytest
+from app.core.exceptions import MappingError
+from app.services.mapping_store import MappingStore
+
+MAPPINGS = {
+    "milk": {"PlatformA": {"product_id": "1", "product_name": "Whole Milk 1L"}},
+    "bread": {"PlatformA": {"product_id": "2", "product_name": "White Bread"}},
+}
+
+def write_source(path, mappings, mtime=None):
+    path.write_text(json.dumps(mappings))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "product_mapping.json"
+    write_source(path, MAPPINGS, mtime=1_700_000_000)
+    return path
+
+@pytest.fixture
+def store(tmp_path, source):
+    return MappingStore(str(source), str(tmp_path / "compiled" / "mappings.sqlite3"), check_interval=0)
+
+def test_compiles_the_source_on_first_use(store):
+    mappings = store.current()
+    
+    assert os.path.exists(store.db_path)
+    assert len(mappings) == 2
+    assert mappings["milk"] == MAPPINGS["milk"]
+    assert dict(mappings.items()) == MAPPINGS
+    assert "eggs" not in mappings
+    assert store.stats()["products"] == 2
+
+def test_recompiles_when_the_source_changes(store, source):
+    first = store.current()
+    assert store.current() is first
+    
+    write_source(source, {**MAPPINGS, "eggs": {"PlatformB": {"product_id": "3"}}}, mtime=1_700_000_100)
+    second = store.current()
+    
+    assert second is not first
+    assert sorted(second) == ["bread", "eggs", "milk"]
+
+def test_swap_is_atomic_for_readers_of_the_previous_version(store, source):
+    first = store.current()
+    inode = os.stat(store.db_path).st_ino
+    
+    write_source(source, {"eggs": {"PlatformB": {"product_id": "3"}}}, mtime=1_700_000_100)
+    store.current()
+    
+    # The new version replaced the file; the old one still reads its own data
+    assert os.stat(store.db_path).st_ino != inode
+    assert first["milk"] == MAPPINGS["milk"]
+    assert not [name for name in os.listdir(os.path.dirname(store.db_path)) if name.endswith(".tmp")]
+
+def test_picks_up_a_database_compiled_by_another_worker(tmp_path, store, source):
+    store.current()
+    other = MappingStore(str(source), store.db_path, check_interval=0)
+    assert sorted(other.current()) == ["bread", "milk"]
+    
+    write_source(source, {"eggs": {"PlatformB": {"product_id": "3"}}}, mtime=1_700_000_100)
+    other.current()
+    # The first store sees the new database before checking the source
+    assert store.current().source_signature == other.current().source_signature
+
+def corrupt_garbage(path):
+    with open(path, "wb") as f:
+        f.write(b"not a database" * 100)
+
+def corrupt_old_schema(path):
+    os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE products (generic_name TEXT PRIMARY KEY, platforms TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+
+def corrupt_truncated(path):
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+@pytest.mark.parametrize("corrupt", [corrupt_garbage, corrupt_old_schema, corrupt_truncated])
+def test_recompiles_an_unreadable_database(tmp_path, source, corrupt):
+    db_path = str(tmp_path / "mappings.sqlite3")
+    MappingStore(str(source), db_path).current()
+    corrupt(db_path)
+    
+    mappings = MappingStore(str(source), db_path, check_interval=0).current()
+    assert dict(mappings.items()) == MAPPINGS
+
+def test_recompiles_a_database_corrupted_under_a_running_store(store):
+    store.current()
+    corrupt_garbage(store.db_path)
+    
+    assert dict(store.current().items()) == MAPPINGS
+
+def test_raises_without_source_or_database(tmp_path):
+    store = MappingStore(str(tmp_path / "missing.json"), str(tmp_path / "mappings.sqlite3"))
+    with pytest.raises(MappingError):
+        store.current()
+
+def test_keeps_the_loaded_version_when_the_source_turns_invalid(store, source):
+    first = store.current()
+    source.write_text("{not json")
+    os.utime(source, (1_700_000_100, 1_700_000_100))
+    
+    assert store.current() is first
+
+def test_threads_read_through_their_own_connections(store):
+    mappings = store.current()
+    connections = []
+    errors = []
+    
+    def read():
+        try:
+            for _ in range(200):
+                assert mappings["bread"] == MAPPINGS["bread"]
+                assert sorted(mappings) == ["bread", "milk"]
+            connections.append(mappings.conn)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len({id(conn) for conn in connections}) == 4
@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+import app.services.prewarm as prewarm_module
+from app.services.prewarm import PopularityTracker, PrewarmScheduler
+from app.utils.rate_limiter import PlatformRateLimiter
+from app.utils.resilience import CircuitBreaker
+
+@pytest.fixture
+def clock_targets():
+    return (prewarm_module,)
+
+def test_tracker_weighs_requests_down_by_half_per_half_life(clock):
+    tracker = PopularityTracker(half_life=60.0)
+    tracker.record(["milk", "milk"])
+    
+    clock.now += 60.0
+    tracker.record(["bread"])
+    # Two requests one half-life ago count as much as one request now
+    assert tracker.scores["milk"] == pytest.approx(tracker.scores["bread"])
+    
+    tracker.record(["bread"])
+    assert tracker.top(2) == ["bread", "milk"]
+
+def test_tracker_renormalizes_scores_without_changing_their_order(clock):
+    tracker = PopularityTracker(half_life=1.0)
+    tracker.record(["milk", "milk", "bread"])
+    
+    clock.now += 25.0
+    tracker.record(["eggs"])
+    
+    assert tracker._epoch == clock.now
+    assert tracker.scores["eggs"] == 1.0
+    assert tracker.scores["milk"] == pytest.approx(2.0 ** -24)
+    assert tracker.top(3) == ["eggs", "milk", "bread"]
+
+def test_tracker_top_returns_the_n_most_popular(clock):
+    tracker = PopularityTracker()
+    for count, name in enumerate(["eggs", "bread", "milk", "rice"], start=1):
+        tracker.record([name] * count)
+    
+    assert tracker.top(2) == ["rice", "milk"]
+    assert tracker.top(10) == ["rice", "milk", "bread", "eggs"]
+    assert PopularityTracker().top(5) == []
+
+def test_tracker_drops_the_least_popular_beyond_max_products(clock):
+    tracker = PopularityTracker(max_products=10)
+    tracker.record(["popular"] * 5)
+    # Trimmed in bulk, once 10% over max_products
+    tracker.record(f"product {i}" for i in range(10))
+    assert len(tracker.scores) == 11
+    
+    tracker.record(["product 10"])
+    assert len(tracker.scores) == 10
+    assert "popular" in tracker.scores
+
+class FakeScraper:
+    """Scraper exposing what the pre-warming scheduler uses, recording refreshes."""
+    
+    def __init__(self, rate=10.0, batch_size=0, stale_in=None):
+        self.rate_limiter = PlatformRateLimiter("TestPlatform", rate=rate, burst=10, max_concurrency=10)
+        self.circuit_breaker = CircuitBreaker("TestPlatform")
+        self.batch_size = batch_size
+        self.stale_in = stale_in or {}
+        self.refreshed = []
+    
+    def snapshot_stale_in(self, product_id):
+        return self.stale_in.get(product_id)
+    
+    async def refresh_many(self, products):
+        self.refreshed.append(list(products))
+        return len(products)
+
+class FakeRegistry:
+    def __init__(self, scrapers):
+        self.scrapers = scrapers
+
+MAPPINGS = {
+    name: {
+        "platform_a": {"product_id": f"a-{name}", "product_name": f"A {name}"},
+        "platform_b": {"product_id": f"b-{name}", "product_name": f"B {name}"},
+    }
+    for name in ("milk", "bread", "eggs", "rice")
+}
+
+@pytest.fixture
+def tracker(clock, monkeypatch):
+    monkeypatch.setattr(prewarm_module, "get_product_mappings", lambda: MAPPINGS)
+    tracker = PopularityTracker()
+    for count, name in enumerate(["eggs", "bread", "milk", "rice"], start=1):
+        tracker.record([name] * count)
+    return tracker
+
+def test_run_once_refreshes_the_top_n_due_products_on_every_platform(tracker):
+    platform_a = FakeScraper(stale_in={"a-rice": 100.0, "a-milk": 12.0})
+    platform_b = FakeScraper()
+    scheduler = PrewarmScheduler(
+        FakeRegistry({"platform_a": platform_a, "platform_b": platform_b}),
+        tracker, top_n=3, interval=10.0, lead_time=5.0
+    )
+    
+    assert asyncio.run(scheduler.run_once()) == 5
+    # Fresh beyond the next cycle plus lead time: a-rice is left alone
+    assert platform_a.refreshed == [["a-milk", "a-bread"]]
+    assert platform_b.refreshed == [["b-rice", "b-milk", "b-bread"]]
+    assert (scheduler.cycles, scheduler.refreshed, scheduler.deferred) == (1, 5, 0)
+
+@pytest.mark.parametrize("rate, batch_size, refreshed", [
+    (0.1, 0, [["a-rice"]]),
+    (0.4, 0, [["a-rice", "a-milk"]]),
+    (0.1, 3, [["a-rice", "a-milk", "a-bread"]]),
+])
+def test_run_once_spends_at_most_rate_share_of_the_rate_limit(tracker, rate, batch_size, refreshed):
+    platform_a = FakeScraper(rate=rate, batch_size=batch_size)
+    scheduler = PrewarmScheduler(FakeRegistry({"platform_a": platform_a}), tracker, top_n=4, interval=10.0, rate_share=0.5)
+    
+    asyncio.run(scheduler.run_once())
+    assert platform_a.refreshed == refreshed
+    assert scheduler.deferred == 4 - len(refreshed[0])
+
+def test_run_once_defers_platforms_with_an_open_circuit_or_no_capacity(tracker):
+    broken = FakeScraper()
+    broken.circuit_breaker.state = CircuitBreaker.OPEN
+    saturated = FakeScraper()
+    saturated.rate_limiter.blocked_until = float("inf")
+    scheduler = PrewarmScheduler(FakeRegistry({"platform_a": broken, "platform_b": saturated}), tracker, top_n=2)
+    
+    assert asyncio.run(scheduler.run_once()) == 0
+    assert broken.refreshed == saturated.refreshed == []
+    assert scheduler.deferred == 4
+
+def test_run_once_does_nothing_without_requests(clock):
+    scheduler = PrewarmScheduler(FakeRegistry({"platform_a": FakeScraper()}), PopularityTracker())
+    assert asyncio.run(scheduler.run_once()) == 0
+    assert scheduler.cycles == 0
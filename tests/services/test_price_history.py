@@ -0,0 +1,93 @@
+import asyncio
+from decimal import Decimal
+import pytest
+from app.services.price_history import SECONDS_PER_DAY, PriceHistoryRecorder, PriceHistoryStore
+
+DAY = 20000  # days since the epoch
+
+def observation(product_id, hour, final_price, in_stock=True, platform="PlatformA"):
+    return (platform, product_id, DAY * SECONDS_PER_DAY + hour * 3600, final_price, 0, final_price, in_stock)
+
+def scrape_result(product_id, scraped_at, final_price):
+    return {
+        "product_id": product_id,
+        "scraped_at": scraped_at,
+        "original_price": Decimal(final_price),
+        "discount": Decimal("0.00"),
+        "final_price": Decimal(final_price),
+        "in_stock": True,
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    store = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    yield store
+    store.close()
+
+class FailingStore:
+    """Stands in for PriceHistoryStore, failing the first `failures` writes."""
+    
+    def __init__(self, failures):
+        self.failures = failures
+        self.batches = []
+    
+    def write(self, observations):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.batches.append(list(observations))
+        return len(observations)
+
+def test_store_keeps_each_scrape_once(store):
+    assert store.write([observation("1", 8, 250), observation("1", 9, 240)]) == 2
+    assert store.write([observation("1", 9, 240), observation("1", 10, 230)]) == 1
+    
+    # The repeated scrape is not counted twice in the aggregates either
+    assert store.daily("PlatformA", "1", DAY) == [(DAY, 230, 250, 720, 3, 230)]
+
+def test_store_aggregates_in_stock_prices_per_day(store):
+    store.write([
+        observation("1", 10, 300),
+        observation("1", 8, 200),
+        observation("1", 12, 500, in_stock=False),
+        observation("1", 30, 260),
+        observation("2", 9, 999),
+        observation("1", 9, 100, platform="PlatformB"),
+    ])
+    # Written out of order in a later batch: the last price stays the latest scrape
+    store.write([observation("1", 9, 400)])
+    
+    assert store.daily("PlatformA", "1", DAY) == [
+        (DAY, 200, 400, 900, 3, 300),
+        (DAY + 1, 260, 260, 260, 1, 260),
+    ]
+    assert store.daily("PlatformA", "1", DAY + 1) == [(DAY + 1, 260, 260, 260, 1, 260)]
+    assert store.lowest("PlatformA", "1", DAY) == (200, DAY)
+    assert store.latest("PlatformA", "1") == (260, observation("1", 30, 260)[2], 1)
+    assert store.lowest("PlatformA", "3", DAY) is None
+
+def test_recorder_skips_results_served_from_the_cache(store):
+    recorder = PriceHistoryRecorder(store)
+    recorder.record("PlatformA", scrape_result("1", 1000.0, "2.50"))
+    recorder.record("PlatformA", scrape_result("1", 1000.0, "2.50"))
+    recorder.record("PlatformB", scrape_result("1", 1000.0, "2.40"))
+    recorder.record("PlatformA", scrape_result("1", 2000.0, "2.30"))
+    
+    assert recorder.recorded == 3
+    assert asyncio.run(recorder.flush()) == 3
+    assert recorder.stats()["pending"] == 0
+
+def test_recorder_keeps_observations_when_a_write_fails():
+    failing = FailingStore(failures=1)
+    recorder = PriceHistoryRecorder(failing, batch_size=2)
+    for second in range(3):
+        recorder.record("PlatformA", scrape_result("1", float(second), "2.50"))
+    
+    with pytest.raises(OSError):
+        asyncio.run(recorder.flush())
+    assert recorder.stats()["pending"] == 3
+    assert recorder.written == 0
+    
+    assert asyncio.run(recorder.flush()) == 3
+    assert [len(batch) for batch in failing.batches] == [2, 1]
+    assert recorder.stats()["pending"] == 0
@@ -0,0 +1,40 @@
+from decimal import Decimal
+import pytest
+from app.services.price_matrix import PriceMatrix, to_decimal, to_minor_units
+
+@pytest.mark.parametrize("amount, expected", [
+    (Decimal("1.005"), 101),
+    (Decimal("0.285"), 29),
+    (Decimal("1.115"), 112),
+    (Decimal("2.5"), 250),
+    (Decimal("0.004"), 0),
+    (Decimal("19.99"), 1999),
+])
+def test_to_minor_units_rounds_half_up(amount, expected):
+    assert to_minor_units(amount) == expected
+
+@pytest.mark.parametrize("amount, expected", [
+    (1.005, 101),
+    (0.285, 29),
+    (1.115, 112),
+    (2.5, 250),
+    (19.99, 1999),
+])
+def test_to_minor_units_floats_use_their_decimal_representation(amount, expected):
+    assert to_minor_units(amount) == expected
+
+@pytest.mark.parametrize("amount, expected", [("1.005", 101), ("0.285", 29), ("3", 300)])
+def test_to_minor_units_strings(amount, expected):
+    assert to_minor_units(amount) == expected
+
+def test_minor_units_round_trip():
+    for amount in (Decimal("0.01"), Decimal("1.99"), Decimal("1234.56")):
+        assert to_decimal(to_minor_units(amount)) == amount
+
+def test_matrix_cells_round_half_up():
+    matrix = PriceMatrix.from_price_data({
+        "milk": {"PlatformA": {"final_price": Decimal("1.005"), "original_price": Decimal("1.115")}}
+    })
+    cell = matrix.rows["milk"], matrix.columns["PlatformA"]
+    assert matrix.final[cell] == 101
+    assert matrix.original[cell] == 112
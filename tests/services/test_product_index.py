@@ -0,0 +1,89 @@
+import threading
+import pytest
+from app.services import product_index as product_index_module
+from app.services.product_index import ProductIndex, get_product_index, singular, tokenize
+
+MAPPINGS = {
+    "milk": {
+        "PlatformA": {"product_id": "1", "product_name": "Whole Milk 1L"},
+        "PlatformB": {"product_id": "9", "product_name": "Fresh Milk 1 litre"},
+    },
+    "almond milk": {"PlatformA": {"product_id": "5", "product_name": "Almond Milk 1L"}},
+    "bread": {"PlatformA": {"product_id": "2", "product_name": "White Bread 400g"}},
+    "eggs": {"PlatformA": {"product_id": "3", "product_name": "Eggs 12 pcs"}},
+    "butter": {"PlatformA": {"product_id": "4", "product_name": "Salted Butter 500g"}},
+    "tomatoes": {"PlatformA": {"product_id": "6", "product_name": "Tomatoes 1kg"}},
+}
+
+MIN_CONFIDENCE = 0.5
+
+@pytest.fixture
+def index():
+    return ProductIndex(MAPPINGS)
+
+def resolved_name(index, name):
+    match = index.resolve(name, MIN_CONFIDENCE)
+    return match.generic_name if match is not None else None
+
+@pytest.mark.parametrize("name, expected", [
+    ("milk", "milk"),
+    ("almond milk", "almond milk"),
+    ("Milk", "milk"),
+    ("  ALMOND   milk ", "almond milk"),
+    ("Whole Milk 1L", "milk"),
+    ("milk 1000 ml", "milk"),
+    ("Tomatoes 1 kg", "tomatoes"),
+    ("egg", "eggs"),
+    ("tomato", "tomatoes"),
+    ("butters", "butter"),
+    ("bred", "bread"),
+    ("mulk", "milk"),
+    ("almnod milk", "almond milk"),
+])
+def test_resolves_names(index, name, expected):
+    assert resolved_name(index, name) == expected
+
+@pytest.mark.parametrize("name", ["1l", "1000 ml", "500g", "12", "ml", "oat milk", "caviar", "", "the"])
+def test_rejects_names_without_a_good_match(index, name):
+    assert resolved_name(index, name) is None
+
+def test_exact_names_have_full_confidence(index):
+    assert index.resolve("Eggs").confidence == 1.0
+    assert index.resolve("whole milk").confidence < 1.0
+
+def test_quantities_fold_to_base_units():
+    assert tokenize("Milk 1L") == tokenize("milk 1 litre") == tokenize("MILK 1000ml") == ["milk", "1000ml"]
+    assert tokenize("dozen eggs") == ["egg"]
+
+@pytest.mark.parametrize("word, expected", [
+    ("eggs", "egg"), ("tomatoes", "tomato"), ("berries", "berry"), ("peaches", "peach"),
+    ("glass", "glass"), ("asparagus", "asparagus"), ("rice", "rice"),
+])
+def test_singular(word, expected):
+    assert singular(word) == expected
+
+def test_memoizes_resolutions(index):
+    index.resolve("whole milk")
+    index.resolve("Whole  Milk")
+    assert (index.hits, index.misses) == (1, 1)
+
+def test_index_is_built_once_across_threads(monkeypatch):
+    builds = []
+    
+    class CountingIndex(ProductIndex):
+        def __init__(self, *args, **kwargs):
+            builds.append(1)
+            super().__init__(*args, **kwargs)
+    
+    monkeypatch.setattr(product_index_module, "ProductIndex", CountingIndex)
+    monkeypatch.setattr(product_index_module, "_cached_index", (None, None))
+    mappings = dict(MAPPINGS)
+    indexes = []
+    threads = [threading.Thread(target=lambda: indexes.append(get_product_index(mappings))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(builds) == 1
+    assert all(index is indexes[0] for index in indexes)
@@ -0,0 +1,56 @@
+import orjson
+import pytest
+from decimal import Decimal
+from app.services.response_cache import EncodedResponse
+
+def build_payload(names, ages):
+    return {
+        "total_price": Decimal("4.00"),
+        "savings": Decimal("0.00"),
+        "items": [
+            {
+                "name": name,
+                "platform": "PlatformA",
+                "original_price": Decimal("2.00"),
+                "discount": Decimal("0.00"),
+                "final_price": Decimal("2.00"),
+                "quantity": 1,
+                "unit": None,
+                "platform_specific_name": name,
+                "product_id": str(index),
+                "url": None,
+                "freshness": "fresh",
+                "price_age_seconds": age,
+                "from_cache": False,
+            }
+            for index, (name, age) in enumerate(zip(names, ages))
+        ],
+        "delivery_fee": Decimal("0.00"),
+        "delivery_fees": {},
+        "total_cost": Decimal("4.00"),
+        "optimizer": "greedy",
+        "optimal": True,
+        "complete": True,
+        "incomplete_items": [],
+        "incomplete_platforms": [],
+    }
+
+def test_body_splices_current_ages_into_the_encoded_response():
+    # A name holding the age field's own text must not be mistaken for it
+    names = ['milk "price_age_seconds":null', "bread"]
+    encoded = EncodedResponse(build_payload(names, [10.0, None]))
+    
+    body = orjson.loads(encoded.body())
+    assert [item["name"] for item in body["items"]] == names
+    assert body["items"][0]["price_age_seconds"] == pytest.approx(10.0, abs=1)
+    assert body["items"][1]["price_age_seconds"] is None
+    assert body["total_cost"] == "4.00"
+
+def test_etag_ignores_price_ages():
+    names = ["milk", "bread"]
+    young = EncodedResponse(build_payload(names, [1.0, 2.0]))
+    old = EncodedResponse(build_payload(names, [100.0, 200.0]))
+    other = EncodedResponse(build_payload(["milk", "eggs"], [1.0, 2.0]))
+    
+    assert young.etag == old.etag
+    assert young.etag != other.etag
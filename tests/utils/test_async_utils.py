@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from app.utils.async_utils import SingleFlight
+
+def test_singleflight_coalesces_concurrent_calls():
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+    
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        return flight, results
+    
+    flight, results = asyncio.run(main())
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+def test_singleflight_runs_again_once_a_call_finished():
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+    
+    async def main():
+        flight = SingleFlight()
+        return await flight.do("key", fetch), await flight.do("key", fetch)
+    
+    assert asyncio.run(main()) == (1, 2)
+
+def test_singleflight_propagates_errors_to_every_caller():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+    
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        return flight, results
+    
+    flight, results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not flight.is_in_flight("key")
+
+def test_singleflight_cancelled_caller_does_not_cancel_the_call():
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "result"
+    
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+    
+    assert asyncio.run(main()) == "result"
@@ -0,0 +1,148 @@
+import asyncio
+from decimal import Decimal
+import pytest
+from app.scrapers.base_scraper import BaseScraper
+from app.utils import cache as cache_module
+from app.utils.cache import BoundedTTLCache, SQLiteCacheBackend
+
+@pytest.fixture
+def clock_targets():
+    return (cache_module,)
+
+def test_evicts_least_recently_used_entry():
+    cache = BoundedTTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_evicts_to_stay_within_byte_budget():
+    cache = BoundedTTLCache(max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.set("c", "xxxx")
+    
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.current_bytes == 8
+
+def test_replacing_an_entry_releases_its_size():
+    cache = BoundedTTLCache(max_bytes=10, sizeof=len)
+    cache.set("a", "xxxxxxxx")
+    cache.set("a", "xx")
+    
+    assert cache.current_bytes == 2
+
+def test_entries_turn_stale_then_expire(clock):
+    cache = BoundedTTLCache(ttl=60, stale_ttl=30)
+    cache.set("a", 1)
+    
+    clock.now += 59
+    assert not cache.get_entry("a").is_stale(clock.now)
+    
+    clock.now += 2
+    entry = cache.get_entry("a")
+    assert entry.value == 1
+    assert entry.is_stale(clock.now)
+    
+    clock.now += 30
+    assert cache.get_entry("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_cleanup_removes_expired_entries(clock):
+    cache = BoundedTTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=100)
+    
+    clock.now += 11
+    assert cache.cleanup() == 1
+    assert len(cache) == 1
+
+class CountingScraper(BaseScraper):
+    """Scraper returning the number of scrapes so far as the price."""
+    
+    def __init__(self, **kwargs):
+        self.scrapes = 0
+        super().__init__(**kwargs)
+    
+    def _get_platform_name(self) -> str:
+        return "TestPlatform"
+    
+    def _get_base_url(self) -> str:
+        return "http://test-platform.test"
+    
+    async def _scrape_snapshot(self, product_id: str, product_name: str):
+        self.scrapes += 1
+        await asyncio.sleep(0)
+        return {"product_id": product_id, "price": Decimal(self.scrapes)}
+
+def test_stale_snapshot_is_served_while_one_refresh_runs(clock):
+    async def main():
+        scraper = CountingScraper(cache=BoundedTTLCache(ttl=60, stale_ttl=60))
+        try:
+            first = await scraper.get_snapshot("1", "Milk")
+            
+            clock.now += 90
+            stale = await asyncio.gather(*(scraper.get_snapshot("1", "Milk") for _ in range(3)))
+            await asyncio.sleep(0.01)
+            refreshed = await scraper.get_snapshot("1", "Milk")
+            return first, stale, refreshed, scraper.scrapes
+        finally:
+            await scraper.close()
+    
+    first, stale, refreshed, scrapes = asyncio.run(main())
+    assert first["price"] == 1
+    assert [snapshot["price"] for snapshot in stale] == [1, 1, 1]
+    assert refreshed["price"] == 2
+    assert scrapes == 2
+
+def test_expired_snapshot_is_scraped_again(clock):
+    async def main():
+        scraper = CountingScraper(cache=BoundedTTLCache(ttl=60, stale_ttl=60))
+        try:
+            await scraper.get_snapshot("1", "Milk")
+            clock.now += 121
+            return await scraper.get_snapshot("1", "Milk")
+        finally:
+            await scraper.close()
+    
+    assert asyncio.run(main())["price"] == 2
+
+def test_sqlite_backend_round_trips_snapshots(tmp_path):
+    snapshot = {"product_id": "1", "price": Decimal("2.50"), "in_stock": True, "discount": {"value": Decimal("0.25")}}
+    cache = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), ttl=60)
+    try:
+        cache.set("a", snapshot)
+        assert cache.get("a") == snapshot  # readable before the write lands
+        
+        cache.executor.submit(lambda: None).result()
+        assert not cache._pending
+        assert cache.get("a") == snapshot
+        assert isinstance(cache.get("a")["price"], Decimal)
+    finally:
+        cache.close()
+    
+    # Shared with other workers through the file
+    other = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), ttl=60)
+    try:
+        assert other.get("a") == snapshot
+    finally:
+        other.close()
+
+def test_sqlite_backend_cleans_up_off_the_event_loop(tmp_path):
+    cache = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=2)
+    try:
+        for key in "abc":
+            cache.set(key, {"key": key}, ttl=60 + ord(key))
+        cache.set("expired", {}, ttl=-1)
+        
+        assert asyncio.run(cache.cleanup_async()) == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == {"key": "c"}
+    finally:
+        cache.close()
@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.metrics import CONTENT_TYPE, Counter, Gauge, Histogram, MetricsRegistry
+
+def test_counter_renders_a_total_per_label_combination():
+    counter = Counter("scrape_errors", "Failed upstream requests", ("platform", "reason"))
+    counter.labels("PlatformA", "timeout").inc()
+    counter.labels("PlatformA", "timeout").inc(2)
+    counter.labels("PlatformB", "http").inc()
+    
+    assert counter.render() == [
+        "# HELP scrape_errors Failed upstream requests",
+        "# TYPE scrape_errors counter",
+        'scrape_errors_total{platform="PlatformA",reason="timeout"} 3',
+        'scrape_errors_total{platform="PlatformB",reason="http"} 1',
+    ]
+
+def test_metrics_without_labels_render_from_the_start():
+    counter = Counter("requests", "Requests")
+    assert counter.render()[-1] == "requests_total 0"
+    
+    gauge = Gauge("in_flight", "Requests in flight")
+    gauge.inc(3)
+    gauge.dec()
+    assert gauge.render()[-1] == "in_flight 2"
+    gauge.set(0.25)
+    assert gauge.render()[-1] == "in_flight 0.25"
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(1.0, 0.1))
+    child = histogram.labels("/prices")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+    
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/prices",le="0.1"} 2',
+        'latency_seconds_bucket{route="/prices",le="1"} 3',
+        'latency_seconds_bucket{route="/prices",le="+Inf"} 4',
+        'latency_seconds_sum{route="/prices"} 3.65',
+        'latency_seconds_count{route="/prices"} 4',
+    ]
+
+def test_label_values_are_escaped():
+    counter = Counter("errors", "Errors", ("reason",))
+    counter.labels('say "hi"\\\n').inc()
+    assert counter.render()[-1] == 'errors_total{reason="say \\"hi\\"\\\\\\n"} 1'
+
+def test_labels_must_match_the_label_names():
+    counter = Counter("errors", "Errors", ("platform", "reason"))
+    with pytest.raises(ValueError):
+        counter.labels("PlatformA")
+
+def test_registry_renders_every_metric_and_rejects_duplicates():
+    registry = MetricsRegistry()
+    registry.register(Counter("requests", "Requests")).inc()
+    registry.register(Gauge("in_flight", "Requests in flight"))
+    
+    assert registry.render() == (
+        "# HELP requests Requests\n# TYPE requests counter\nrequests_total 1\n"
+        "# HELP in_flight Requests in flight\n# TYPE in_flight gauge\nin_flight 0\n"
+    )
+    with pytest.raises(ValueError):
+        registry.register(Counter("requests", "Requests again"))
+
+def request_count(body: str, route: str) -> int:
+    prefix = f'http_request_duration_seconds_count{{method="GET",route="{route}",status="200"}} '
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+def test_metrics_endpoint_exposes_request_latency_by_route():
+    client = TestClient(app)
+    before = request_count(client.get("/metrics").text, "/health")
+    client.get("/health")
+    client.get("/health")
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "# TYPE scrape_errors counter" in response.text
+    assert request_count(response.text, "/health") == before + 2
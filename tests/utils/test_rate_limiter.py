@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from app.core.exceptions import RateLimitExceededError
+from app.utils import rate_limiter as rate_limiter_module
+from app.utils.rate_limiter import AdaptiveConcurrencyLimiter, PlatformRateLimiter, TokenBucket, parse_retry_after
+
+@pytest.fixture
+def clock_targets():
+    return (rate_limiter_module,)
+
+def test_token_bucket_allows_a_burst_then_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.time_until_available() == pytest.approx(0.5)
+    
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+def test_token_bucket_does_not_refill_beyond_capacity(clock):
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    bucket.try_acquire()
+    
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+
+def test_aimd_increases_additively_and_decreases_multiplicatively(clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=8, cooldown=1.0)
+    limiter.on_backoff()
+    assert limiter.limit == 2
+    
+    limiter.on_success()
+    assert limiter.limit == 2.5
+    
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 8
+
+def test_aimd_counts_backoffs_within_the_cooldown_once(clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, min_limit=1, cooldown=1.0)
+    for _ in range(5):
+        limiter.on_backoff()
+    assert limiter.limit == 8
+    assert limiter.backoffs == 1
+    
+    clock.now += 1.0
+    limiter.on_backoff()
+    assert limiter.limit == 4
+    
+    for _ in range(10):
+        clock.now += 1.0
+        limiter.on_backoff()
+    assert limiter.limit == 1
+
+def test_aimd_queues_callers_beyond_the_limit():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        queued = limiter.queued
+        
+        limiter.release()
+        await waiter
+        return queued, limiter.in_flight
+    
+    assert asyncio.run(main()) == (1, 2)
+
+def test_aimd_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        await limiter.acquire()
+        
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        return limiter.in_flight, limiter.queued
+    
+    assert asyncio.run(main()) == (0, 0)
+
+def test_retry_after_pauses_the_platform(clock):
+    limiter = PlatformRateLimiter("PlatformA", rate=10, burst=10, max_concurrency=4, max_wait=5)
+    limiter.on_throttle(retry_after=30)
+    
+    assert not limiter.has_capacity()
+    assert limiter.concurrency.limit == 2
+    
+    async def request():
+        async with limiter.slot():
+            pass
+    
+    with pytest.raises(RateLimitExceededError):
+        asyncio.run(request())
+    assert limiter.rejected == 1
+    
+    clock.now += 30
+    assert limiter.has_capacity()
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,66 @@
+import pytest
+from app.utils import resilience as resilience_module
+from app.utils.resilience import CircuitBreaker
+
+@pytest.fixture
+def clock_targets():
+    return (resilience_module,)
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("PlatformA", failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    open_breaker(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()["rejected"] == 1
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker("PlatformA", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = CircuitBreaker("PlatformA", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker("PlatformA", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    
+    clock.now += 30
+    assert breaker.allow_request()
+
+def test_released_probe_lets_another_through(clock):
+    breaker = CircuitBreaker("PlatformA", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
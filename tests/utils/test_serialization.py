@@ -0,0 +1,86 @@
+from datetime import date
+from decimal import Decimal
+import orjson
+import pytest
+import app.utils.serialization as serialization_module
+from app.models.response import OptimizedBasketResponse, PlatformPrice, PriceTrendResponse
+from app.utils.serialization import dumps, encode_payload
+
+@pytest.fixture(autouse=True)
+def unchecked_models(monkeypatch):
+    monkeypatch.setattr(serialization_module, "_checked_models", set())
+
+ITEM = {
+    "name": "Milk",
+    "platform": "PlatformA",
+    "original_price": Decimal("2.50"),
+    "discount": Decimal("0.25"),
+    "final_price": Decimal("2.25"),
+    "quantity": 2,
+    "unit": "liter",
+    "platform_specific_name": "Whole Milk 1L",
+    "product_id": "123",
+    "url": None,
+    "freshness": "stale",
+    "price_age_seconds": 12.5,
+    "from_cache": True,
+}
+
+BASKET = {
+    "total_price": Decimal("4.50"),
+    "savings": Decimal("0.50"),
+    "items": [ITEM],
+    "delivery_fee": Decimal("2.99"),
+    "delivery_fees": {"PlatformA": Decimal("2.99")},
+    "total_cost": Decimal("7.49"),
+    "optimizer": "exact",
+    "optimal": True,
+    "complete": False,
+    "incomplete_items": ["Bread"],
+    "incomplete_platforms": ["PlatformC"],
+}
+
+def test_dumps_encodes_decimals_as_strings_with_their_digits():
+    assert dumps({"price": Decimal("2.50"), "count": 3, "ratio": 0.5}) == b'{"price":"2.50","count":3,"ratio":0.5}'
+
+def test_dumps_rejects_types_it_cannot_encode():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+@pytest.mark.parametrize("model, payload", [
+    (OptimizedBasketResponse, BASKET),
+    (PlatformPrice, {
+        "name": "Milk", "platform": "PlatformB", "original_price": Decimal("3"), "discount": Decimal("0.0"),
+        "final_price": Decimal("3"), "in_stock": False, "platform_specific_name": None, "product_id": None,
+        "url": "https://platform-b.test/p/1", "freshness": "fresh", "price_age_seconds": None, "from_cache": False,
+    }),
+    (PriceTrendResponse, {
+        "product": "milk",
+        "days": 7,
+        "platforms": {"PlatformA": [{
+            "date": date(2024, 2, 29), "min_price": Decimal("1.99"), "max_price": Decimal("2.50"),
+            "avg_price": Decimal("2.245"), "last_price": Decimal("2.50"), "samples": 4,
+        }]},
+    }),
+])
+def test_encode_payload_matches_the_model_json(model, payload):
+    body = encode_payload(model, payload)
+    assert orjson.loads(body) == orjson.loads(model.model_validate(payload).model_dump_json())
+
+def test_encode_payload_rejects_a_payload_drifting_from_its_model():
+    # A float where the model has a Decimal encodes as a number, not a string
+    with pytest.raises(ValueError, match="OptimizedBasketResponse"):
+        encode_payload(OptimizedBasketResponse, {**BASKET, "total_price": 4.5})
+    
+    # So does a payload leaving out a field the model fills with its default
+    payload = dict(BASKET)
+    del payload["incomplete_platforms"]
+    with pytest.raises(ValueError):
+        encode_payload(OptimizedBasketResponse, payload)
+
+def test_encode_payload_checks_only_the_first_payload_of_each_model():
+    encode_payload(OptimizedBasketResponse, BASKET)
+    assert serialization_module._checked_models == {OptimizedBasketResponse}
+    
+    body = encode_payload(OptimizedBasketResponse, {**BASKET, "total_price": 4.5})
+    assert orjson.loads(body)["total_price"] == 4.5